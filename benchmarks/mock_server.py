@@ -0,0 +1,230 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+""" Local mock of the Cobinhood REST API for benchmarks.
+
+    Serves a realistic payload for every route in the endpoint dicts of Cobinhood_API.
+    Run it standalone with: python benchmarks/mock_server.py [port]
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cobinhood_api.cobinhood import Cobinhood_API
+
+PAIRS = ["BTC-USDT", "ETH-BTC", "COB-ETH", "COB-BTC", "PAY-ETH", "OMG-ETH", "EOS-ETH", "ZRX-BTC"]
+
+def _price(rng, base=0.01):
+    return "%.8f" % (base * (1 + rng.uniform(-0.05, 0.05)))
+
+def _order(rng, pair, state="open"):
+    return {
+        "id": "%032x" % rng.getrandbits(128),
+        "trading_pair": pair,
+        "state": state,
+        "side": rng.choice(["bid", "ask"]),
+        "type": "limit",
+        "price": _price(rng),
+        "size": "%.4f" % rng.uniform(1, 100),
+        "filled": "0",
+        "timestamp": 1504459805123 + rng.randint(0, 10 ** 9),
+        "eq_price": "0"
+    }
+
+def _trade(rng, pair):
+    return {
+        "trading_pair_id": pair,
+        "id": "%032x" % rng.getrandbits(128),
+        "maker_side": rng.choice(["bid", "ask"]),
+        "price": _price(rng),
+        "size": "%.8f" % rng.uniform(0.01, 10),
+        "timestamp": 1504459805123 + rng.randint(0, 10 ** 9)
+    }
+
+def _transfer(rng, kind):
+    return {
+        kind + "_id": "%032x" % rng.getrandbits(128),
+        "user_id": "%032x" % rng.getrandbits(128),
+        "status": "tx_confirmed",
+        "confirmations": 25,
+        "required_confirmations": 25,
+        "created_at": 1504459805123 + rng.randint(0, 10 ** 9),
+        "completed_at": 1504459914233,
+        "txhash": "0x%064x" % rng.getrandbits(256),
+        "currency": "ETH",
+        "amount": "%.4f" % rng.uniform(0.01, 5),
+        "fee": "0.0003"
+    }
+
+def make_payloads(depth=100, items=50, seed=42):
+    """ Builds the result of every endpoint; callables take (path_params, query) """
+    rng = random.Random(seed)
+
+    def levels(side):
+        step = 0.00001 if side == "bid" else -0.00001
+        return [["%.8f" % (0.01 - step * (i + 1)), str(rng.randint(1, 5)), "%.8f" % rng.uniform(0.1, 500)] for i in range(depth)]
+
+    order_book = {"orderbook": {"sequence": 1938572, "bids": levels("bid"), "asks": levels("ask")}}
+    stats = {pair: {
+        "id": pair, "last_price": _price(rng), "lowest_ask": _price(rng), "highest_bid": _price(rng),
+        "base_volume": "%.8f" % rng.uniform(0, 1e4), "quote_volume": "%.8f" % rng.uniform(0, 1e4), "is_frozen": False,
+        "high_24hr": _price(rng), "low_24hr": _price(rng), "percent_changed_24hr": "%.6f" % rng.uniform(-5, 5)
+    } for pair in PAIRS}
+    candles = [{
+        "timestamp": 1507366756000 + i * 60000, "open": _price(rng), "close": _price(rng), "high": _price(rng),
+        "low": _price(rng), "volume": "%.8f" % rng.uniform(0, 100)
+    } for i in range(items * 10)]
+    orders = [_order(rng, rng.choice(PAIRS)) for _ in range(items)]
+    history = [_order(rng, rng.choice(PAIRS), "filled") for _ in range(items)]
+    trades = [_trade(rng, rng.choice(PAIRS)) for _ in range(items)]
+    ledger = [{
+        "action": "trade", "type": "exchange", "trade_id": "%032x" % rng.getrandbits(128), "currency": "BTC",
+        "amount": "+%.2f" % rng.uniform(0, 100), "balance": "%.2f" % rng.uniform(0, 1000), "timestamp": 1504685599302 - i
+    } for i in range(items)]
+
+    return {
+        "system_time": {"time": 1505204498376},
+        "system_info": {"info": {"phase": "production", "revision": "480bbd"}},
+        "currency_info": {"currencies": [{"currency": pair.split("-")[0], "name": pair, "min_unit": "0.00000001", "deposit_fee": "0", "withdrawal_fee": "0.01"} for pair in PAIRS]},
+        "all_trading_pairs": {"trading_pairs": [{"id": pair, "base_currency_id": pair.split("-")[0], "quote_currency_id": pair.split("-")[1], "base_min_size": "0.01", "base_max_size": "10000", "quote_increment": "0.00000001"} for pair in PAIRS]},
+        "order_book": order_book,
+        "trading_stats": stats,
+        "ticker": lambda path, query: {"ticker": {"trading_pair_id": path.get("pairId"), "timestamp": 1504459805123, "24h_high": "0.011", "24h_low": "0.009", "24h_open": "0.0101", "24h_volume": "7842.11542563", "last_trade_price": "0.0100", "highest_bid": "0.00999", "lowest_ask": "0.01001"}},
+        "recent_trades": {"trades": trades},
+        "candles": {"candles": candles},
+        "get_order": {"order": orders[0]},
+        "trades_from_order": {"trades": trades[:5]},
+        "all_orders": {"orders": orders},
+        "place_order": {"order": orders[0]},
+        "modify_order": {},
+        "cancel_order": {},
+        "order_history": {"order_history": history},
+        "get_trade": {"trade": trades[0]},
+        "trade_history": {"trades": trades},
+        "balances": {"balances": [{"currency": c, "type": "exchange", "total": "%.8f" % rng.uniform(0, 100), "on_order": "0", "locked": False} for c in ["BTC", "ETH", "COB", "USDT"]]},
+        "ledger_entries": {"ledger": ledger},
+        "deposit_addresses": {"deposit_addresses": [{"currency": "ETH", "address": "0x%040x" % rng.getrandbits(160), "created_at": 1504459805123, "type": "exchange"}]},
+        "withdrawal_addresses": {"withdrawal_addresses": [{"id": "%032x" % rng.getrandbits(128), "currency": "ETH", "name": "wallet", "type": "exchange", "address": "0x%040x" % rng.getrandbits(160), "created_at": 1504459805123}]},
+        "get_withdrawal": {"withdrawal": _transfer(rng, "withdrawal")},
+        "all_withdrawals": {"withdrawals": [_transfer(rng, "withdrawal") for _ in range(20)]},
+        "get_deposit": {"deposit": _transfer(rng, "deposit")},
+        "all_deposits": {"deposits": [_transfer(rng, "deposit") for _ in range(20)]}
+    }
+
+def compile_routes():
+    """ Returns a list of (method, regex, endpoint key) for every endpoint of Cobinhood_API """
+    routes = []
+
+    for endpoints in (Cobinhood_API.public_endpoints, Cobinhood_API.private_endpoints, Cobinhood_API.wallet_endpoints):
+        for name, endpoint in endpoints.items():
+            pattern = re.sub(r"\\{(\w+)\\}", r"(?P<\1>[^/]+)", re.escape(endpoint['url']))
+            routes.append((endpoint['method'], re.compile("^" + pattern + "$"), name))
+
+    return routes
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version        = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    routes   = compile_routes()
+    payloads = {}
+    encoded  = {}
+
+    def _handle(self):
+        length = int(self.headers.get("content-length") or 0)
+
+        if length:
+            self.rfile.read(length)
+
+        url = urlsplit(self.path)
+
+        for method, pattern, name in self.routes:
+            match = pattern.match(url.path)
+
+            if match and method == self.command:
+                break
+        else:
+            return self._send(404, b'{"success": false, "error": {"error_code": "not_found"}}')
+
+        if name in self.encoded:
+            return self._send(200, self.encoded[name])
+
+        payload = self.payloads[name]
+
+        if callable(payload):
+            payload = payload(match.groupdict(), parse_qs(url.query))
+
+        self._send(200, json.dumps({"success": True, "result": payload}).encode())
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    def log_message(self, *args):
+        pass
+
+class MockServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 overflows with many concurrent connections, and the
+    # resulting SYN retransmits would dominate the async results instead of the client
+    request_queue_size = 1024
+    daemon_threads     = True
+
+def make_server(host="127.0.0.1", port=0, **payload_options):
+    """ Returns a MockServer serving the mock API; responses without parameters are encoded once """
+    payloads = make_payloads(**payload_options)
+    encoded  = {name: json.dumps({"success": True, "result": payload}).encode() for name, payload in payloads.items() if not callable(payload)}
+    handler  = type("Handler", (MockHandler,), {"payloads": payloads, "encoded": encoded})
+
+    return MockServer((host, port), handler)
+
+def start_in_thread(**options):
+    """ Starts a mock server in a daemon thread and returns (server, base_url) """
+    server = make_server(**options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server, "http://%s:%d" % server.server_address
+
+def serve(port, ready=None):
+    """ Runs a mock server in this process; puts its base url on ready, a multiprocessing queue, once listening """
+    server = make_server(port=port)
+
+    if not ready is None:
+        ready.put("http://%s:%d" % server.server_address)
+
+    server.serve_forever()
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8080
+    print("Mock Cobinhood API on http://127.0.0.1:%d" % port)
+    serve(port)
@@ -0,0 +1,265 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+""" Offline benchmarks of the Cobinhood API client against the local mock server.
+
+    Usage: python benchmarks/run.py [--requests N] [--threads N] [--concurrency N] [--scenarios sync,threaded,async,coldstart] [--trace-memory] [--output results.json]
+
+    The mock server runs in a separate process so its CPU time is not counted. Results
+    are printed, or written to --output, as JSON. The coldstart scenario imports the client
+    in fresh interpreters; the run fails (exit status 1) if it exceeds COLD_START_BUDGET_MS
+    or loads one of HEAVY_MODULES on import.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import mock_server
+from cobinhood_api.cobinhood import Cobinhood_API
+
+# (method name, args) called round robin; a mix of small and large public and private responses
+WORKLOAD = [
+    ("get_ticker", ("COB-ETH",)),
+    ("get_order_book", ("COB-ETH",)),
+    ("get_trading_stats", ()),
+    ("get_recent_trades", ("COB-ETH",)),
+    ("get_all_orders", ()),
+    ("get_wallet_balances", ()),
+]
+
+# Median milliseconds allowed for importing cobinhood_api.cobinhood and creating a Cobinhood_API
+COLD_START_BUDGET_MS = 50
+
+# Modules that must not be loaded by importing the client or creating one, only on first use
+HEAVY_MODULES = ("requests", "urllib3", "orjson", "numpy", "aiohttp", "pandas")
+
+COLD_START_CODE = """
+import sys, time
+start = time.perf_counter()
+import cobinhood_api.cobinhood
+imported = time.perf_counter()
+cobinhood_api.cobinhood.Cobinhood_API("benchmark")
+created = time.perf_counter()
+loaded = [name for name in %r if name in sys.modules]
+print(imported - start, created - start, ",".join(loaded))
+"""
+
+def percentile(values, q):
+    if not values:
+        return None
+
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def summarize(name, latencies, wall, cpu, peak_memory):
+    count = len(latencies)
+
+    return {
+        "scenario": name,
+        "requests": count,
+        "seconds": wall,
+        "requests_per_second": count / wall if wall else None,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "cpu_ms_per_request": cpu / count * 1000 if count else None,
+        "peak_traced_memory_kb": peak_memory / 1024 if not peak_memory is None else None,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    }
+
+def _measure(name, run, trace_memory=False):
+    # tracemalloc slows down every allocation, so it is only used when asked for
+    if trace_memory:
+        tracemalloc.start()
+
+    cpu  = time.process_time()
+    wall = time.perf_counter()
+
+    latencies = run()
+
+    wall = time.perf_counter() - wall
+    cpu  = time.process_time() - cpu
+    peak = None
+
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return summarize(name, latencies, wall, cpu, peak)
+
+def _timed_call(api, index):
+    method, args = WORKLOAD[index % len(WORKLOAD)]
+    start = time.perf_counter()
+    getattr(api, method)(*args)
+    return time.perf_counter() - start
+
+def bench_sync(base_url, requests, trace_memory=False, **options):
+    with Cobinhood_API("benchmark", base_url=base_url) as api:
+        _timed_call(api, 0)
+        return _measure("sync", lambda: [_timed_call(api, i) for i in range(requests)], trace_memory)
+
+def bench_threaded(base_url, requests, threads=8, trace_memory=False, **options):
+    with Cobinhood_API("benchmark", base_url=base_url, pool_maxsize=threads) as api:
+        _timed_call(api, 0)
+
+        def run():
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                return list(executor.map(lambda i: _timed_call(api, i), range(requests)))
+
+        return _measure("threaded", run, trace_memory)
+
+def bench_async(base_url, requests, concurrency=64, trace_memory=False, **options):
+    from cobinhood_api.async_cobinhood import AsyncCobinhood_API
+
+    async def timed(api, index):
+        method, args = WORKLOAD[index % len(WORKLOAD)]
+        start = time.perf_counter()
+        await getattr(api, method)(*args)
+        return time.perf_counter() - start
+
+    async def main():
+        async with AsyncCobinhood_API("benchmark", base_url=base_url, max_concurrency=concurrency, pool_maxsize=concurrency) as api:
+            await timed(api, 0)
+
+            if trace_memory:
+                tracemalloc.start()
+
+            start = time.perf_counter()
+            cpu   = time.process_time()
+
+            latencies = await asyncio.gather(*[timed(api, i) for i in range(requests)])
+
+            cpu  = time.process_time() - cpu
+            wall = time.perf_counter() - start
+            peak = None
+
+            if trace_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+            return summarize("async", latencies, wall, cpu, peak)
+
+    return asyncio.run(main())
+
+def bench_cold_start(base_url=None, requests=None, runs=20, budget_ms=COLD_START_BUDGET_MS, **options):
+    """ Imports the client in runs fresh interpreters; no server is needed """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env  = dict(os.environ, PYTHONPATH=root + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    code = COLD_START_CODE % (HEAVY_MODULES,)
+
+    imports, creates, loaded, processes = [], [], set(), []
+
+    for _ in range(runs):
+        start  = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", code], env=env, check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout.split()
+        processes.append(time.perf_counter() - start)
+
+        imports.append(float(output[0]))
+        creates.append(float(output[1]))
+
+        if len(output) > 2:
+            loaded.update(output[2].split(","))
+
+    import_ms = percentile(imports, 0.5) * 1000
+    create_ms = percentile(creates, 0.5) * 1000
+
+    return {
+        "scenario": "coldstart",
+        "runs": runs,
+        "import_p50_ms": import_ms,
+        "import_max_ms": max(imports) * 1000,
+        "create_client_p50_ms": create_ms,
+        "process_p50_ms": percentile(processes, 0.5) * 1000,
+        "heavy_modules_loaded": sorted(loaded),
+        "budget_ms": budget_ms,
+        "within_budget": create_ms <= budget_ms and not loaded
+    }
+
+SCENARIOS = {"sync": bench_sync, "threaded": bench_threaded, "async": bench_async, "coldstart": bench_cold_start}
+
+def start_server():
+    """ Starts the mock server in a child process and returns (process, base_url) """
+    ready   = multiprocessing.Queue()
+    process = multiprocessing.Process(target=mock_server.serve, args=(0, ready), daemon=True)
+    process.start()
+
+    return process, ready.get(timeout=10)
+
+def run(scenarios, requests, threads, concurrency, base_url=None, trace_memory=False, cold_start_runs=20, cold_start_budget_ms=COLD_START_BUDGET_MS):
+    process = None
+
+    if base_url is None and any(name != "coldstart" for name in scenarios):
+        process, base_url = start_server()
+
+    try:
+        results = [SCENARIOS[name](base_url, requests, threads=threads, concurrency=concurrency, trace_memory=trace_memory,
+                                   runs=cold_start_runs, budget_ms=cold_start_budget_ms) for name in scenarios]
+    finally:
+        if not process is None:
+            process.terminate()
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": int(time.time()),
+        "results": results
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    parser.add_argument("--threads", type=int, default=8, help="worker threads for the threaded scenario")
+    parser.add_argument("--concurrency", type=int, default=64, help="requests in flight for the async scenario")
+    parser.add_argument("--scenarios", default="sync,threaded,async,coldstart", help="comma separated: " + ",".join(SCENARIOS))
+    parser.add_argument("--trace-memory", action="store_true", help="report the peak traced memory; slows down the client")
+    parser.add_argument("--cold-start-runs", type=int, default=20, help="fresh interpreters for the coldstart scenario")
+    parser.add_argument("--cold-start-budget-ms", type=float, default=COLD_START_BUDGET_MS, help="median import time allowed by the coldstart scenario")
+    parser.add_argument("--base-url", default=None, help="use a running mock server instead of starting one")
+    parser.add_argument("--output", default=None, help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    report = run(args.scenarios.split(","), args.requests, args.threads, args.concurrency, args.base_url, args.trace_memory,
+                 args.cold_start_runs, args.cold_start_budget_ms)
+    output = json.dumps(report, indent=2)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+    print(output)
+    return report
+
+if __name__ == "__main__":
+    report = main()
+
+    if any(result.get("within_budget") == False for result in report["results"]):
+        sys.exit(1)
@@ -0,0 +1,55 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import importlib
+
+# Importing the package loads nothing; every name is imported from its module on first access
+_exports = {
+    'Cobinhood_API': 'cobinhood',
+    'AsyncCobinhood_API': 'async_cobinhood',
+    'CobinhoodWebSocket': 'websocket',
+    'ClientPool': 'accounts',
+    'OrderBook': 'orderbook',
+    'OrderManager': 'orders',
+    'BalanceTracker': 'balances',
+    'RateLimiter': 'ratelimit',
+    'ResponseCache': 'cache',
+    'Decoder': 'decoding',
+    'Metrics': 'metrics',
+    'NonceGenerator': 'nonce',
+    'FileNonceGenerator': 'nonce',
+    'Retry': 'retry',
+    'CircuitBreaker': 'retry'
+}
+
+__all__ = list(_exports)
+
+def __getattr__(name):
+    if not name in _exports:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+    value = getattr(importlib.import_module("." + _exports[name], __name__), name)
+    globals()[name] = value
+
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,185 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .cobinhood import Cobinhood_API
+from .ratelimit import RateLimiter
+
+class ClientPool:
+    """ ClientPool:
+
+        One Cobinhood_API per account, all sending over one shared connection pool. The
+        decoder, metrics, cache, retry policy, circuit breaker and worker threads are shared
+        too. Every account has its own nonces, and its own rate limits for the private and
+        wallet endpoints. The public endpoints are limited per IP address, so all accounts
+        share one public limit.
+
+        Attributes:
+            clients: dict mapping the account name to its Cobinhood_API
+            public: Cobinhood_API without a key for the public endpoints
+            session: the shared session
+    """
+
+    def __init__(self, api_keys, session=None, base_url=None, pool_maxsize=50, rate_limits=None, max_workers=20, **options):
+        """ Inits ClientPool
+
+            Args:
+                Required:
+                    api_keys: dict mapping an account name to its API key, or a list of API keys used as their own names
+                Optional:
+                    session: object with a requests-compatible request() method shared by all accounts. Defaults to one pooled session
+                    base_url: string overriding the default base url; e.g. http://127.0.0.1:8080
+                    pool_maxsize: maximum amount of keep-alive connections of the shared session, defaults to 50
+                    rate_limits: dict with the arguments of RateLimiter, e.g. {'private': 10, 'wallet': 5}, applied per account.
+                                 Defaults to no limiting
+                    max_workers: maximum amount of requests in flight at once for the fan-out helpers, defaults to 20
+                    **options: other arguments of Cobinhood_API given to every client, e.g. metrics, cache, decoder, retry
+        """
+        if not isinstance(api_keys, dict):
+            api_keys = {key: key for key in api_keys}
+
+        if session is None:
+            session = Cobinhood_API.create_session(pool_maxsize=pool_maxsize)
+
+        self.session     = session
+        self.max_workers = max_workers
+        self.clients     = {}
+
+        self._options  = dict(options, session=session, base_url=base_url)
+        self._limits   = rate_limits
+        self._public   = None
+        self._lock     = threading.Lock()
+        self._executor = None
+
+        if not rate_limits is None:
+            self._public = RateLimiter(**rate_limits).buckets['public']
+
+        self.public = self._create("", rate_limits)
+
+        for name, api_key in api_keys.items():
+            self.clients[name] = self._create(api_key, rate_limits)
+
+    def _create(self, api_key, rate_limits):
+        limiter = None
+
+        if not rate_limits is None:
+            limiter = RateLimiter(**rate_limits)
+            limiter.buckets['public'] = self._public
+
+        return Cobinhood_API(api_key, rate_limiter=limiter, **self._options)
+
+    def add(self, name, api_key):
+        """ Adds an account and returns its Cobinhood_API """
+        client = self._create(api_key, self._limits)
+
+        with self._lock:
+            self.clients[name] = client
+
+        return client
+
+    def remove(self, name):
+        """ Removes an account; the shared session stays open """
+        with self._lock:
+            return self.clients.pop(name, None)
+
+    def __getitem__(self, name):
+        return self.clients[name]
+
+    def __contains__(self, name):
+        return name in self.clients
+
+    def __iter__(self):
+        return iter(list(self.clients))
+
+    def __len__(self):
+        return len(self.clients)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ClientPool")
+
+            return self._executor
+
+    def fan_out(self, func, names=None):
+        """ Calls func(client) for every account concurrently on the shared worker threads
+
+            Args:
+                Required:
+                    func: callable taking a Cobinhood_API; e.g. lambda api: api.get_ledger_entries('BTC')
+                Optional:
+                    names: list of account names; if none given then all accounts will be used
+
+            Returns:
+                dict with 'result' mapping every successful account to its result and 'errors'
+                mapping every failed account to the error response or the raised exception
+        """
+        clients  = dict(self.clients) if names is None else {name: self.clients[name] for name in names}
+        executor = self._get_executor()
+        futures  = {name: executor.submit(func, client) for name, client in clients.items()}
+        batch    = {"result": {}, "errors": {}}
+
+        for name, future in futures.items():
+            try:
+                res = future.result()
+            except Exception as e:
+                batch['errors'][name] = e
+                continue
+
+            if isinstance(res, dict) and res.get('success') == False:
+                batch['errors'][name] = res
+            else:
+                batch['result'][name] = res
+
+        return batch
+
+    def get_wallet_balances(self, names=None):
+        """ Retrieves the wallet balances of every account concurrently. See fan_out() for the response """
+        return self.fan_out(lambda client: client.get_wallet_balances(), names)
+
+    def get_all_orders(self, names=None):
+        """ Retrieves the open orders of every account concurrently. See fan_out() for the response """
+        return self.fan_out(lambda client: client.get_all_orders(), names)
+
+    def get_trade_history(self, pair, limit=20, names=None):
+        """ Retrieves the trade history of every account concurrently. See fan_out() for the response """
+        return self.fan_out(lambda client: client.get_trade_history(pair, limit), names)
+
+    def rate_limit_stats(self):
+        """ Returns RateLimiter.stats() per account; empty without rate_limits """
+        return {name: client.rate_limiter.stats() for name, client in self.clients.items() if not client.rate_limiter is None}
+
+    def close(self):
+        """ Stops the worker threads and closes the shared connections """
+        if not self._executor is None:
+            self._executor.shutdown()
+            self._executor = None
+
+        if hasattr(self.session, "close"):
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
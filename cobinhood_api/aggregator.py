@@ -0,0 +1,215 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import threading
+from collections import deque
+
+from .decoding import require_unscaled
+
+# Length of a candle in millis per timeframe of get_candle_chart; '1M' has no fixed length
+timeframe_millis = {
+    '1m': 60000, '5m': 300000, '15m': 900000, '30m': 1800000, '1h': 3600000, '3h': 10800000,
+    '6h': 21600000, '12h': 43200000, '1D': 86400000, '7D': 604800000, '14D': 1209600000
+}
+
+class CandleRing:
+    """ CandleRing:
+
+        The last capacity candles of one timeframe in a ring buffer. A trade updates the
+        candle in its slot in O(1); a trade for a newer candle resets the slot, so the oldest
+        candle drops out.
+
+        Attributes:
+            timeframe: string with the timeframe; e.g. 1m
+            millis: length of a candle in millis
+            capacity: amount of candles kept
+    """
+
+    def __init__(self, timeframe, capacity=1440):
+        if not timeframe in timeframe_millis:
+            raise ValueError("Timeframe value invalid")
+
+        self.timeframe = timeframe
+        self.millis    = timeframe_millis[timeframe]
+        self.capacity  = capacity
+
+        self.starts  = [-1] * capacity
+        self.opens   = [0.0] * capacity
+        self.highs   = [0.0] * capacity
+        self.lows    = [0.0] * capacity
+        self.closes  = [0.0] * capacity
+        self.volumes = [0.0] * capacity
+        self.counts  = [0] * capacity
+
+        # Timestamps of the trades that set open and close, so trades may arrive out of order
+        self._first = [0] * capacity
+        self._last  = [0] * capacity
+        self._newest = 0
+
+    def add(self, timestamp, price, size):
+        """ Adds a trade. Returns False if it belongs to a candle that already dropped out """
+        start = timestamp - timestamp % self.millis
+        slot  = (start // self.millis) % self.capacity
+
+        if self.starts[slot] != start:
+            if start < self.starts[slot]:
+                return False
+
+            self.starts[slot]  = start
+            self.opens[slot]   = self.highs[slot] = self.lows[slot] = self.closes[slot] = price
+            self.volumes[slot] = size
+            self.counts[slot]  = 1
+            self._first[slot]  = self._last[slot] = timestamp
+
+            if start > self.starts[self._newest]:
+                self._newest = slot
+
+            return True
+
+        if price > self.highs[slot]:
+            self.highs[slot] = price
+
+        if price < self.lows[slot]:
+            self.lows[slot] = price
+
+        if timestamp < self._first[slot]:
+            self._first[slot] = timestamp
+            self.opens[slot]  = price
+
+        if timestamp >= self._last[slot]:
+            self._last[slot]  = timestamp
+            self.closes[slot] = price
+
+        self.volumes[slot] += size
+        self.counts[slot]  += 1
+        return True
+
+    def _candle(self, slot):
+        return {
+            "timestamp": self.starts[slot],
+            "open": self.opens[slot],
+            "high": self.highs[slot],
+            "low": self.lows[slot],
+            "close": self.closes[slot],
+            "volume": self.volumes[slot],
+            "trades": self.counts[slot]
+        }
+
+    def latest(self):
+        """ Returns the newest candle, or None if there are no trades yet """
+        return self._candle(self._newest) if self.starts[self._newest] >= 0 else None
+
+    def candles(self, limit=None):
+        """ Returns the candles with trades, oldest first, in the format of get_candle_chart with floats; at most the newest limit """
+        slots = sorted((slot for slot in range(self.capacity) if self.starts[slot] >= 0), key=self.starts.__getitem__)
+
+        if not limit is None:
+            slots = slots[-limit:] if limit else []
+
+        return [self._candle(slot) for slot in slots]
+
+class TradeAggregator:
+    """ TradeAggregator:
+
+        Builds rolling candles of one trading pair from its trades, e.g. from repeated
+        get_recent_trades polls or the trade channel of CobinhoodWebSocket. Trades that were
+        seen before are skipped, so overlapping polls are counted once.
+
+        Attributes:
+            pair: string containing the trading pair on Cobinhood; e.g. PAY-ETH
+            rings: dict mapping the timeframe to its CandleRing
+    """
+
+    def __init__(self, pair, timeframes=('1m', '5m', '1h'), capacity=1440, dedupe_size=10000):
+        """ Inits TradeAggregator
+
+            Args:
+                Required:
+                    pair: string containing the trading pair on Cobinhood; e.g. PAY-ETH
+                Optional:
+                    timeframes: timeframes to build candles for, defaults to ('1m', '5m', '1h')
+                    capacity: amount of candles kept per timeframe, defaults to 1440
+                    dedupe_size: amount of recent trade ids remembered to skip duplicates, defaults to 10000
+        """
+        self.pair  = pair
+        self.rings = {timeframe: CandleRing(timeframe, capacity) for timeframe in timeframes}
+
+        self._seen  = set()
+        self._order = deque()
+        self._size  = dedupe_size
+        self._lock  = threading.Lock()
+
+    def add_trade(self, trade):
+        """ Adds a trade, a dict as returned by get_recent_trades or a list [id, timestamp, side, price, size]
+            as sent by the websocket. Returns False if it was seen before
+        """
+        if isinstance(trade, dict):
+            trade_id, timestamp, price, size = trade['id'], trade['timestamp'], trade['price'], trade['size']
+        else:
+            trade_id, timestamp, price, size = trade[0], trade[1], trade[3], trade[4]
+
+        with self._lock:
+            if trade_id in self._seen:
+                return False
+
+            self._seen.add(trade_id)
+            self._order.append(trade_id)
+
+            if len(self._order) > self._size:
+                self._seen.discard(self._order.popleft())
+
+            timestamp = int(timestamp)
+            price     = float(price)
+            size      = float(size)
+
+            for ring in self.rings.values():
+                ring.add(timestamp, price, size)
+
+            return True
+
+    def add_trades(self, trades):
+        """ Adds trades, or the result of get_recent_trades. Returns the amount of new trades """
+        if isinstance(trades, dict):
+            if trades.get('success') == False:
+                raise ValueError("Trades response is an error: " + str(trades))
+
+            trades = trades.get('trades', [])
+
+        return sum(1 for trade in trades if self.add_trade(trade))
+
+    def poll(self, api):
+        """ Adds the trades from api.get_recent_trades(pair). Returns the amount of new trades """
+        require_unscaled(api, "TradeAggregator")
+        return self.add_trades(api.get_recent_trades(self.pair))
+
+    def on_message(self, channel, mtype, data):
+        """ Callback for CobinhoodWebSocket.subscribe_trades """
+        self.add_trades(data or [])
+
+    def candles(self, timeframe, limit=None):
+        """ Returns the candles of timeframe, oldest first; see CandleRing.candles """
+        with self._lock:
+            return self.rings[timeframe].candles(limit)
+
+    def latest(self, timeframe):
+        """ Returns the newest candle of timeframe, or None """
+        with self._lock:
+            return self.rings[timeframe].latest()
@@ -0,0 +1,208 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import aiohttp
+import asyncio
+import json
+import time
+
+from .cobinhood import _Endpoints
+
+class AsyncCobinhood_API(_Endpoints):
+    """ AsyncCobinhood_API:
+
+        asyncio version of Cobinhood_API. Every endpoint method of Cobinhood_API is available
+        as a coroutine with the same arguments and return values, going through the same
+        middleware: rate limiting, caching, retries and metrics. All calls share one aiohttp
+        connection pool and at most max_concurrency requests are in flight at once.
+
+        Attributes:
+            api_key: string for storing API key
+            self.base_url: base url for the api
+            self.public_endpoints: dict where all public API calls are stored
+            self.private_endpoints: dict where all private API calls are stored
+            self.wallet_endpoints: dict where all wallet API calls are stored
+    """
+
+    def __init__(self, api_key, session=None, base_url=None, max_concurrency=100, pool_maxsize=100, timeout=10, decoder=None, nonce=None, rate_limiter=None, cache=None, middleware=None, metrics=None, retry=None, circuit_breaker=None):
+        """ Inits AsyncCobinhood_API with api_key
+
+            Args:
+                Required:
+                    api_key: string containing your API key
+                Optional:
+                    session: aiohttp.ClientSession to use instead of the pooled session
+                    base_url: string overriding the default base url; e.g. http://127.0.0.1:8080
+                    max_concurrency: maximum amount of requests in flight at once, defaults to 100
+                    pool_maxsize: maximum amount of open connections, defaults to 100
+                    timeout: total seconds to wait for a request, defaults to 10
+                    decoder: Decoder for the response bodies, e.g. Decoder(numbers='decimal'). Defaults to Decoder(), which uses orjson if installed
+                    nonce: NonceGenerator for the nonce header of order calls, e.g. FileNonceGenerator(path) to share it between processes. Defaults to NonceGenerator()
+                    rate_limiter: RateLimiter shared by all calls, also with Cobinhood_API clients; order traffic gets priority. Defaults to no limiting
+                    cache: ResponseCache for the slow-changing public endpoints. Defaults to no caching
+                    middleware: list of middleware wrapped around every request, outermost first; see middleware.py
+                    metrics: Metrics recording latency per phase, bytes and results of every call. Defaults to no instrumentation
+                    retry: Retry for requests that failed with a connection error, timeout or 5xx response. Defaults to no retries
+                    circuit_breaker: CircuitBreaker failing requests fast while their endpoint group keeps failing. Defaults to none
+        """
+        self.max_concurrency = max_concurrency
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.session = session
+        self._semaphore = None
+        self._traced    = False
+
+        self._setup(api_key, base_url, rate_limiter, cache, middleware, decoder, metrics, nonce, retry, circuit_breaker)
+
+    def _get_session(self):
+        # The session and semaphore bind to the running loop, so they are created on first use
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_maxsize)
+            traces    = [self._trace_config()] if not self.metrics is None else []
+            self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout), trace_configs=traces)
+            self._traced = bool(traces)
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        return self.session
+
+    @staticmethod
+    def _trace_config():
+        """ Returns a TraceConfig timing DNS and new connections into the dict passed as trace_request_ctx """
+        trace = aiohttp.TraceConfig()
+
+        def start(key):
+            async def callback(session, context, params):
+                if not context.trace_request_ctx is None:
+                    context.trace_request_ctx[key] = time.perf_counter()
+
+            return callback
+
+        def end(key):
+            async def callback(session, context, params):
+                timing = context.trace_request_ctx
+
+                if not timing is None and key + '_start' in timing:
+                    timing[key] = timing.get(key, 0.0) + time.perf_counter() - timing.pop(key + '_start')
+
+            return callback
+
+        # Resolving happens while the connection is created, so connect includes dns until send() subtracts it
+        trace.on_dns_resolvehost_start.append(start('dns_start'))
+        trace.on_dns_resolvehost_end.append(end('dns'))
+        trace.on_connection_create_start.append(start('connect_start'))
+        trace.on_connection_create_end.append(end('connect'))
+
+        return trace
+
+    async def close(self):
+        """ Closes all pooled connections """
+        if not self.session is None:
+            await self.session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def call(self, name, path=None, params=None, json=None, success_value=None):
+        """ Performs the request for an endpoint through the middleware and returns its result; see Cobinhood_API.call """
+        request = self._build_request(name, path, params, json)
+
+        if self.metrics is None:
+            res = await (self._dispatch(request, 0) if self.middleware else self.send(request))
+        else:
+            start = time.perf_counter()
+
+            try:
+                res = await (self._dispatch(request, 0) if self.middleware else self.send(request))
+            except Exception:
+                self.metrics.record_result(name, time.perf_counter() - start, 'exception')
+                raise
+
+            self.metrics.record_result(name, time.perf_counter() - start, 'success' if res['success'] == True else 'error')
+
+        return self._unwrap(res, success_value)
+
+    def _dispatch(self, request, index):
+        if index == len(self.middleware):
+            return self.send(request)
+
+        middleware = self.middleware[index]
+        return getattr(middleware, 'call_async', middleware)(request, lambda request: self._dispatch(request, index + 1))
+
+    async def _then(self, res, func):
+        return func(await res)
+
+    async def send(self, request):
+        """ Sends request over the session and returns the decoded response """
+        session = self._get_session()
+        kwargs  = {}
+
+        if not request.headers is None:
+            kwargs['headers'] = request.headers
+
+        if request.params:
+            kwargs['params'] = request.params
+
+        if not request.json is None:
+            kwargs['json'] = request.json
+
+        async with self._semaphore:
+            if self.metrics is None:
+                async with session.request(request.method, request.url, **kwargs) as response:
+                    # A 5xx is an outage even with a JSON error body; raising lets retries and the circuit breaker see it
+                    if response.status >= 500:
+                        response.raise_for_status()
+
+                    return self.decoder(await response.read())
+
+            timing = {}
+            start  = time.perf_counter()
+
+            async with session.request(request.method, request.url, trace_request_ctx=timing, **kwargs) as response:
+                received = time.perf_counter()
+
+                if response.status >= 500:
+                    response.raise_for_status()
+
+                content  = await response.read()
+                read     = time.perf_counter()
+
+        res     = self.decoder(content)
+        decoded = time.perf_counter()
+        sent    = len(json.dumps(request.json)) if not request.json is None else 0
+
+        dns     = timing.get('dns')
+        connect = timing.get('connect')
+
+        if not connect is None and not dns is None:
+            connect = max(connect - dns, 0.0)
+
+        # The request returns once the headers are parsed, so the body is read separately
+        server = max(received - start - (connect or 0.0) - (dns or 0.0), 0.0)
+        reused = connect is None if self._traced else None
+
+        self.metrics.record_transfer(request.name, server, read - received, decoded - read, sent, len(content), reused=reused, connect=connect, dns=dns)
+
+        return res
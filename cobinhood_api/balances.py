@@ -0,0 +1,420 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import threading
+from collections import deque
+from decimal import Decimal
+
+from .decoding import require_unscaled
+
+ZERO = Decimal(0)
+
+# Fills of an order the exchange balances already include, as far as reconcile() can tell
+SETTLED = Decimal('Infinity')
+
+open_states = ('open', 'queued', 'partially_filled', 'new')
+
+def _decimal(value):
+    if value is None or value == "":
+        return ZERO
+
+    return Decimal(str(value))
+
+def _is_error(res):
+    return isinstance(res, dict) and res.get('success') == False
+
+def _pair(order):
+    return order.get('trading_pair', order.get('trading_pair_id'))
+
+class _Reservation:
+    """ The funds an open order holds: amount of currency, at price per unit of the base currency """
+
+    __slots__ = ('pair', 'side', 'price', 'remaining', 'currency')
+
+    def __init__(self, pair, side, price, remaining):
+        base, quote = pair.split("-")
+
+        self.pair      = pair
+        self.side      = side
+        self.price     = price
+        self.remaining = remaining
+        self.currency  = quote if side == 'bid' else base
+
+    @property
+    def amount(self):
+        return self.remaining * self.price if self.side == 'bid' else self.remaining
+
+class _Fills:
+    """ The fills of an order: pair and side to apply them with, the sizes of the trades seen by id,
+        and the size of fills the totals already include without their trades being seen
+    """
+
+    __slots__ = ('pair', 'side', 'trades', 'counted')
+
+    def __init__(self, pair, side):
+        self.pair    = pair
+        self.side    = side
+        self.trades  = {}
+        self.counted = ZERO
+
+class BalanceTracker:
+    """ BalanceTracker:
+
+        Keeps the wallet balances locally: seeded from get_wallet_balances and updated from
+        the orders placed, canceled and filled through it, so checking the available funds
+        is a dict lookup instead of a request. reconcile() reloads the balances and open
+        orders of the exchange, e.g. to correct for fees, without counting fills twice.
+        It also forgets the orders that have closed, so memory doesn't grow with the history.
+
+        Attributes:
+            api: Cobinhood_API used for all calls
+    """
+
+    def __init__(self, api, reconcile=True, settled_size=10000):
+        """ Inits BalanceTracker
+
+            Args:
+                Required:
+                    api: Cobinhood_API used for all calls
+                Optional:
+                    reconcile: whether to load the balances and open orders right away, defaults to True
+                    settled_size: amount of closed order ids remembered after reconcile() dropped their fills, defaults to 10000
+        """
+        require_unscaled(api, "BalanceTracker")
+
+        self.api = api
+
+        self._total    = {}
+        self._on_order = {}
+        self._orders   = {}
+        self._fills    = {}
+        self._settled  = set()
+        self._order    = deque()
+        self._size     = settled_size
+        self._journals = []
+        self._lock     = threading.Lock()
+        self._stop     = threading.Event()
+        self._thread   = None
+
+        if reconcile:
+            self.reconcile()
+
+    def _add(self, balances, currency, amount):
+        balances[currency] = balances.get(currency, ZERO) + amount
+
+    def available(self, currency):
+        """ Returns the amount of currency not held by open orders, as a Decimal """
+        with self._lock:
+            return self._total.get(currency, ZERO) - self._on_order.get(currency, ZERO)
+
+    def total(self, currency):
+        with self._lock:
+            return self._total.get(currency, ZERO)
+
+    def on_order(self, currency):
+        with self._lock:
+            return self._on_order.get(currency, ZERO)
+
+    def balances(self):
+        """ Returns a dict per currency with 'total', 'on_order' and 'available' as Decimals """
+        with self._lock:
+            return {currency: {
+                "total": total,
+                "on_order": self._on_order.get(currency, ZERO),
+                "available": total - self._on_order.get(currency, ZERO)
+            } for currency, total in self._total.items()}
+
+    def can_afford(self, pair, side, size, price=0):
+        """ True if the available funds cover an order; market bids need an estimated price """
+        base, quote = pair.split("-")
+
+        if side == 'bid':
+            return self.available(quote) >= _decimal(size) * _decimal(price)
+
+        return self.available(base) >= _decimal(size)
+
+    def _apply(self, event):
+        # Called with the lock held; reconcile() replays the events it waited for
+        for journal in self._journals:
+            journal.append(event)
+
+        kind = event[0]
+
+        if kind == 'order':
+            order = event[1]
+
+            if order['id'] in self._settled:
+                return
+
+            if not order['id'] in self._fills:
+                self._fills[order['id']] = _Fills(_pair(order), order.get('side'))
+
+            self._release(order['id'])
+
+            if order.get('state', 'open') in open_states:
+                remaining   = _decimal(order.get('size')) - _decimal(order.get('filled'))
+                reservation = _Reservation(_pair(order), order.get('side'), _decimal(order.get('price')), remaining)
+
+                self._orders[order['id']] = reservation
+                self._add(self._on_order, reservation.currency, reservation.amount)
+        elif kind == 'cancel':
+            self._release(event[1])
+        else:
+            self._fill(event[1], event[2], event[3])
+
+    def _fill(self, order_id, size, price):
+        fills       = self._fills.get(order_id)
+        reservation = self._orders.get(order_id)
+
+        if fills is None:
+            # Settled and dropped by reconcile()
+            return
+
+        if fills.counted >= size:
+            # Part of the totals and of the reservation reconcile() loaded
+            fills.counted -= size
+            return
+
+        fills.counted = ZERO
+
+        if not reservation is None:
+            held = reservation.amount
+
+            reservation.remaining = max(ZERO, reservation.remaining - size)
+            self._add(self._on_order, reservation.currency, reservation.amount - held)
+
+            if reservation.remaining <= ZERO:
+                del self._orders[order_id]
+
+        base, quote = fills.pair.split("-")
+        value = size * price
+
+        if fills.side == 'bid':
+            self._add(self._total, base, size)
+            self._add(self._total, quote, -value)
+        else:
+            self._add(self._total, base, -size)
+            self._add(self._total, quote, value)
+
+    def record_order(self, order):
+        """ Tracks an order as returned by place_order, or its 'order', and holds its funds while it is open """
+        order = order.get('order', order)
+
+        with self._lock:
+            self._apply(('order', order))
+
+    def _release(self, order_id):
+        reservation = self._orders.pop(order_id, None)
+
+        if not reservation is None:
+            self._add(self._on_order, reservation.currency, -reservation.amount)
+
+        return reservation
+
+    def record_cancel(self, order_id):
+        """ Releases the funds held by a canceled order """
+        with self._lock:
+            self._apply(('cancel', order_id))
+
+    def record_fills(self, order_id, trades, pair=None, side=None):
+        """ Applies the trades of an order, or the result of get_trades_from_order. Trades seen before are skipped
+
+            Fills move the totals for every tracked order, including market orders placed
+            filled and orders filled after their cancel. Other orders need pair and side.
+
+            Args:
+                Required:
+                    order_id: string with the id of the order
+                    trades: list of trades, or the result of get_trades_from_order
+                Optional:
+                    pair: string containing the trading pair of an order not placed through the tracker
+                    side: string with possible values: ['bid', 'ask']
+
+            Returns:
+                the amount of new trades
+        """
+        if isinstance(trades, dict):
+            if _is_error(trades):
+                raise ValueError("Trades response is an error: " + str(trades))
+
+            trades = trades.get('trades', [])
+
+        count = 0
+
+        with self._lock:
+            fills = self._fills.get(order_id)
+
+            if fills is None:
+                if pair is None or side is None or order_id in self._settled:
+                    return 0
+
+                fills = self._fills[order_id] = _Fills(pair, side)
+
+            for trade in sorted(trades, key=lambda trade: trade.get('timestamp', 0)):
+                if trade['id'] in fills.trades:
+                    continue
+
+                size = _decimal(trade['size'])
+                fills.trades[trade['id']] = size
+                count += 1
+
+                self._apply(('fill', order_id, size, _decimal(trade['price'])))
+
+        return count
+
+    def place_order(self, pair, side, ttype, size, price=0):
+        """ Places an order with api.place_order and holds its funds. Returns the response of place_order """
+        res = self.api.place_order(pair, side, ttype, size, price)
+
+        if not _is_error(res) and 'order' in res:
+            order = dict(res['order'])
+            order.setdefault('trading_pair', pair)
+            order.setdefault('side', side)
+            self.record_order(order)
+
+        return res
+
+    def cancel_order(self, order_id):
+        """ Cancels an order with api.cancel_order and releases its funds. Returns the response of cancel_order """
+        res = self.api.cancel_order(order_id)
+
+        if res == True:
+            self.record_cancel(order_id)
+
+        return res
+
+    def sync_fills(self, order_id):
+        """ Applies new trades of order_id from api.get_trades_from_order. Returns the amount of new trades """
+        return self.record_fills(order_id, self.api.get_trades_from_order(order_id))
+
+    def _fetch(self):
+        balances = self.api.get_wallet_balances()
+
+        if _is_error(balances) or not 'balances' in balances:
+            raise ValueError("Could not retrieve balances: " + str(balances))
+
+        orders = self.api.get_all_orders()
+
+        if _is_error(orders) or not 'orders' in orders:
+            raise ValueError("Could not retrieve orders: " + str(orders))
+
+        return balances['balances'], orders['orders']
+
+    def reconcile(self):
+        """ Reloads the balances from get_wallet_balances and the open orders from get_all_orders
+
+            The totals of the exchange include the fills of closed orders and the 'filled' size
+            of open orders, so those are not applied again when their trades are synced later.
+            Orders, cancels and fills recorded while waiting for the exchange are replayed.
+        """
+        journal = []
+
+        with self._lock:
+            self._journals.append(journal)
+
+        try:
+            balances, orders = self._fetch()
+        finally:
+            with self._lock:
+                self._journals.remove(journal)
+
+        opened = {order['id']: order for order in orders if order.get('state', 'open') in open_states}
+
+        with self._lock:
+            self._total    = {}
+            self._on_order = {}
+            self._orders   = {}
+
+            # The exchange reports on_order itself, including orders placed elsewhere
+            for balance in balances:
+                self._add(self._total, balance['currency'], _decimal(balance.get('total')))
+                self._add(self._on_order, balance['currency'], _decimal(balance.get('on_order')))
+
+            for order_id, order in opened.items():
+                remaining = _decimal(order.get('size')) - _decimal(order.get('filled'))
+                self._orders[order_id] = _Reservation(_pair(order), order.get('side'), _decimal(order.get('price')), remaining)
+
+                if not order_id in self._fills:
+                    self._fills[order_id] = _Fills(_pair(order), order.get('side'))
+
+                self._settled.discard(order_id)
+
+            # Fills recorded while waiting are replayed below, whether or not the response includes them
+            waited = {}
+            placed = set()
+
+            for event in journal:
+                if event[0] == 'fill':
+                    waited[event[1]] = waited.get(event[1], ZERO) + event[2]
+                elif event[0] == 'order' and not event[1]['id'] in opened:
+                    placed.add(event[1]['id'])
+
+            for order_id, fills in self._fills.items():
+                if order_id in opened:
+                    seen = sum(fills.trades.values(), ZERO) - waited.get(order_id, ZERO)
+                    fills.counted = max(ZERO, _decimal(opened[order_id].get('filled')) - seen)
+                elif order_id in placed:
+                    # Placed after the orders were listed, so nothing of it is in the totals
+                    fills.counted = ZERO
+                else:
+                    fills.counted = SETTLED
+
+            for event in journal:
+                if event[0] != 'order' or event[1]['id'] in placed:
+                    self._apply(event)
+
+            # Their fills are all in the totals; only the id is kept, in a bounded window, to skip late syncs
+            for order_id in [order_id for order_id, fills in self._fills.items() if fills.counted == SETTLED]:
+                del self._fills[order_id]
+                self._settle(order_id)
+
+    def _settle(self, order_id):
+        if order_id in self._settled:
+            return
+
+        self._settled.add(order_id)
+        self._order.append(order_id)
+
+        if len(self._order) > self._size:
+            self._settled.discard(self._order.popleft())
+
+    def start_reconciling(self, interval=300):
+        """ Calls reconcile() every interval seconds on a background thread until stop() """
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.reconcile()
+                except Exception:
+                    # Keep the local state; the next round tries again
+                    pass
+
+        self._thread = threading.Thread(target=run, name="BalanceTracker-reconcile", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """ Stops the background reconciliation """
+        self._stop.set()
+
+        if not self._thread is None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,223 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import threading
+import time
+from collections import OrderedDict
+
+class _Flight:
+    """ A fetch in progress which other callers for the same key wait on """
+
+    def __init__(self):
+        self.event  = threading.Event()
+        self.result = None
+        self.error  = None
+
+class ResponseCache:
+    """ ResponseCache:
+
+        Thread-safe LRU cache with a TTL per endpoint. Concurrent misses for the same key
+        are collapsed into one fetch. Cached results are shared, so don't modify them.
+
+        Attributes:
+            ttls: dict mapping the endpoint key in Cobinhood_API.public_endpoints to the seconds its results stay fresh
+            maxsize: maximum amount of cached results
+    """
+
+    default_ttls = {
+        "currency_info": 3600,
+        "all_trading_pairs": 300,
+        "system_info": 60,
+        "trading_stats": 10
+    }
+
+    def __init__(self, ttls=None, maxsize=128):
+        """ Inits ResponseCache
+
+            Args:
+                ttls: dict updating default_ttls; e.g. {'trading_stats': 5}
+                maxsize: maximum amount of cached results, defaults to 128
+        """
+        self.ttls = dict(self.default_ttls)
+        self.ttls.update(ttls or {})
+        self.maxsize = maxsize
+
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._async_flights = {}
+        self._lock    = threading.Lock()
+        self._stats   = {"hits": 0, "misses": 0, "collapsed": 0, "evictions": 0}
+
+    def get(self, name, fetch, key=None):
+        """ Returns the cached result for name, or calls fetch and caches its result
+
+            Args:
+                Required:
+                    name: string with the name of the endpoint; looked up in ttls
+                    fetch: callable returning the result
+                Optional:
+                    key: hashable further identifying the request; e.g. its arguments
+        """
+        ttl = self.ttls.get(name)
+
+        if not ttl:
+            return fetch()
+
+        key = (name, key)
+
+        with self._lock:
+            hit, result = self._lookup(key)
+
+            if hit:
+                return result
+
+            flight = self._flights.get(key)
+
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                leader = True
+                self._stats['misses'] += 1
+            else:
+                leader = False
+                self._stats['collapsed'] += 1
+
+        if not leader:
+            flight.event.wait()
+
+            if not flight.error is None:
+                raise flight.error
+
+            return flight.result
+
+        try:
+            result = fetch()
+        except BaseException as e:
+            # Also KeyboardInterrupt and the like: nothing was fetched, so nothing is stored
+            flight.error = e
+
+            with self._lock:
+                del self._flights[key]
+
+            flight.event.set()
+            raise
+
+        with self._lock:
+            del self._flights[key]
+            self._store(key, ttl, result)
+
+        flight.result = result
+        flight.event.set()
+
+        return result
+
+    async def get_async(self, name, fetch, key=None):
+        """ Like get(), for AsyncCobinhood_API: fetch returns an awaitable. Concurrent misses on one event loop are collapsed """
+        import asyncio
+
+        ttl = self.ttls.get(name)
+
+        if not ttl:
+            return await fetch()
+
+        key  = (name, key)
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            hit, result = self._lookup(key)
+
+            if hit:
+                return result
+
+            future = self._async_flights.get((loop, key))
+
+            if future is None:
+                future = self._async_flights[(loop, key)] = loop.create_future()
+                leader = True
+                self._stats['misses'] += 1
+            else:
+                leader = False
+                self._stats['collapsed'] += 1
+
+        if not leader:
+            # A waiter being cancelled must not cancel the fetch the others wait on
+            return await asyncio.shield(future)
+
+        try:
+            result = await fetch()
+        except BaseException as e:
+            with self._lock:
+                del self._async_flights[(loop, key)]
+
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Marks the exception as retrieved in case nobody was waiting
+                future.exception()
+
+            raise
+
+        with self._lock:
+            del self._async_flights[(loop, key)]
+            self._store(key, ttl, result)
+
+        future.set_result(result)
+        return result
+
+    def _lookup(self, key):
+        # Called with the lock held
+        entry = self._entries.get(key)
+
+        if not entry is None and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return True, entry[1]
+
+        return False, None
+
+    def _store(self, key, ttl, result):
+        # Called with the lock held. Error responses are handed to the waiting callers but never cached
+        if isinstance(result, dict) and result.get('success') == False:
+            return
+
+        self._entries[key] = (time.monotonic() + ttl, result)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def invalidate(self, name=None):
+        """ Removes the cached results for name, or everything if no name is given """
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == name]:
+                    del self._entries[key]
+
+    def stats(self):
+        """ Returns a copy of the counters: hits, misses, collapsed, evictions and size """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+
+            return stats
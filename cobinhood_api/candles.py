@@ -0,0 +1,72 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import numpy as np
+
+columns = ['open', 'high', 'low', 'close', 'volume']
+
+def candles_to_arrays(res, decimals=None):
+    """ Converts the result of get_candle_chart into one NumPy array per column
+
+        Args:
+            Required:
+                res: dict returned by get_candle_chart, or its list of candles
+            Optional:
+                decimals: if given, prices and volumes are returned as int64 scaled by 10 ** decimals
+                          instead of float64; e.g. decimals=8 turns "0.00000123" into 123
+
+        Returns:
+            dict with 'timestamp' as int64 and 'open', 'high', 'low', 'close' and 'volume'
+            as float64 (or scaled int64), sorted by timestamp
+    """
+    if isinstance(res, dict):
+        if res.get('success') == False:
+            raise ValueError("Candle response is an error: " + str(res))
+
+        res = res.get('candles', [])
+
+    count  = len(res)
+    arrays = {"timestamp": np.fromiter((candle['timestamp'] for candle in res), dtype=np.int64, count=count)}
+
+    for column in columns:
+        # Parsing the strings in one go is much faster than converting them one by one
+        values = np.array([candle[column] for candle in res], dtype=np.float64) if count else np.empty(0, dtype=np.float64)
+
+        if not decimals is None:
+            values = np.rint(values * 10 ** decimals).astype(np.int64)
+
+        arrays[column] = values
+
+    order = np.argsort(arrays['timestamp'], kind='stable')
+
+    if count and not np.all(order[:-1] < order[1:]):
+        arrays = {name: values[order] for name, values in arrays.items()}
+
+    return arrays
+
+def candles_to_dataframe(res):
+    """ Converts the result of get_candle_chart into a pandas DataFrame indexed by timestamp. Requires pandas """
+    import pandas as pd
+
+    arrays = candles_to_arrays(res)
+    index  = pd.to_datetime(arrays.pop('timestamp'), unit='ms')
+
+    return pd.DataFrame(arrays, index=index)
@@ -0,0 +1,88 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+""" Command line access to common Cobinhood API calls.
+
+    Usage: python -m cobinhood_api [--key KEY] [--base-url URL] <command> [arguments]
+
+    Results are printed as JSON. Private and wallet commands need an API key, given with
+    --key or the COBINHOOD_API_KEY environment variable. Exits with 1 if the call failed.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from .cobinhood import Cobinhood_API
+
+# command: (method, help, arguments as (name, options))
+commands = {
+    "time": ("get_system_time", "system time in epoch millis", []),
+    "info": ("get_system_info", "system info", []),
+    "currencies": ("get_all_currencies", "all currencies", []),
+    "pairs": ("get_all_trading_pairs", "all trading pairs", []),
+    "stats": ("get_trading_stats", "trading stats of all pairs", []),
+    "ticker": ("get_ticker", "ticker of a pair", [("pair", {})]),
+    "book": ("get_order_book", "order book of a pair", [("pair", {})]),
+    "trades": ("get_recent_trades", "recent trades of a pair", [("pair", {})]),
+    "candles": ("get_candle_chart", "candles of a pair", [("pair", {}), ("timeframe", {"nargs": "?", "default": "1h"})]),
+    "balances": ("get_wallet_balances", "wallet balances", []),
+    "orders": ("get_all_orders", "open orders", []),
+    "order": ("get_order", "an order", [("order", {})]),
+    "place": ("place_order", "place an order", [("pair", {}), ("side", {"choices": ["bid", "ask"]}), ("ttype", {"metavar": "type", "choices": ["market", "limit", "stop", "stop_limit"]}), ("size", {}), ("price", {"nargs": "?", "default": 0})]),
+    "cancel": ("cancel_order", "cancel an order", [("order", {})])
+}
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cobinhood_api", description=__doc__.split("\n")[0])
+    parser.add_argument("--key", default=os.environ.get("COBINHOOD_API_KEY", ""), help="API key, defaults to $COBINHOOD_API_KEY")
+    parser.add_argument("--base-url", default=None, help="base url of the API; e.g. http://127.0.0.1:8080")
+    parser.add_argument("--timeout", type=float, default=10, help="seconds to wait for the server")
+
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+    subparsers.required = True
+
+    for command, (method, description, arguments) in commands.items():
+        subparser = subparsers.add_parser(command, help=description)
+
+        for name, options in arguments:
+            subparser.add_argument(name, **options)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    method, _, arguments = commands[args.command]
+    values = [getattr(args, name) for name, _ in arguments]
+
+    with Cobinhood_API(args.key, base_url=args.base_url, timeout=args.timeout) as api:
+        try:
+            res = getattr(api, method)(*values)
+        except (ValueError, OSError) as e:
+            # Connection errors of requests are OSErrors
+            print("error: " + str(e), file=sys.stderr)
+            return 1
+
+    print(json.dumps(res, indent=2, default=str))
+
+    return 1 if isinstance(res, dict) and res.get('success') == False else 0
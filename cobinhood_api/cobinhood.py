@@ -19,14 +19,77 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
-import requests
+import threading
 import time
 import json
 
-class Cobinhood_API:
-    """ Cobinhood_API:
+from .decoding import Decoder, require_unscaled
+from .nonce import NonceGenerator
+from .middleware import Request, RateLimitMiddleware, CacheMiddleware, RetryMiddleware
+from .pagination import PageIterator
+from .validation import OrderValidator, possible_sides, possible_types
 
-        This class wraps around the Cobinhood API, for communicating with them.
+possible_timeframes = ['1m', '5m', '15m', '30m', '1h', '3h', '6h', '12h', '1D', '7D', '14D', '1M']
+
+# Seconds the current thread spent opening connections during its request, or None if it reused one
+_connecting = threading.local()
+_timed_pools = None
+
+def _timed_pool_classes():
+    """ Returns urllib3 pool classes per scheme whose connections add the time connect() takes to _connecting """
+    global _timed_pools
+
+    if _timed_pools is None:
+        import urllib3.connection
+        import urllib3.connectionpool
+
+        # urllib3 connects lazily, on the thread sending the request; connect() includes DNS and TLS
+        def connect(cls):
+            def timed(self):
+                start = time.perf_counter()
+
+                try:
+                    cls.connect(self)
+                finally:
+                    _connecting.seconds = (getattr(_connecting, 'seconds', None) or 0.0) + time.perf_counter() - start
+
+            return timed
+
+        http  = type("TimedHTTPConnection", (urllib3.connection.HTTPConnection,), {"connect": connect(urllib3.connection.HTTPConnection)})
+        https = type("TimedHTTPSConnection", (urllib3.connection.HTTPSConnection,), {"connect": connect(urllib3.connection.HTTPSConnection)})
+
+        _timed_pools = {
+            "http": type("TimedHTTPConnectionPool", (urllib3.connectionpool.HTTPConnectionPool,), {"ConnectionCls": http}),
+            "https": type("TimedHTTPSConnectionPool", (urllib3.connectionpool.HTTPSConnectionPool,), {"ConnectionCls": https})
+        }
+
+    return _timed_pools
+
+class _Route:
+    """ An endpoint with its url template compiled against the base url """
+
+    __slots__ = ('name', 'group', 'method', 'url', 'has_params')
+
+    def __init__(self, name, group, endpoint, base_url):
+        self.name       = name
+        self.group      = group
+        self.method     = endpoint['method']
+        self.url        = base_url + endpoint['url']
+        self.has_params = "{" in endpoint['url']
+
+def _as_arrays(res):
+    if isinstance(res, dict) and res.get('success') == False:
+        return res
+
+    from .candles import candles_to_arrays
+    return candles_to_arrays(res)
+
+class _Endpoints:
+    """ _Endpoints:
+
+        The endpoints of the Cobinhood API, shared by Cobinhood_API and AsyncCobinhood_API.
+        Every method checks its arguments and hands the request to call(), which each client
+        implements; AsyncCobinhood_API.call is a coroutine, so there the methods return awaitables.
 
         Attributes:
             api_key: string for storing API key
@@ -152,63 +215,90 @@ class Cobinhood_API:
         }
     }
 
-    def __init__(self, api_key):
-        """ Inits Cobinhood_API with api_key """
+    def _setup(self, api_key, base_url, rate_limiter, cache, middleware, decoder, metrics, nonce, retry, circuit_breaker):
+        """ Sets up what both clients share: the routes and the middleware around every request """
         self.api_key = api_key
 
+        if not base_url is None:
+            self.base_url = base_url
+
+        self.rate_limiter = rate_limiter
+        self.cache        = cache
+        self.retry        = retry
+        self.circuit_breaker = circuit_breaker
+        self.decoder      = decoder if not decoder is None else Decoder()
+        self.metrics      = metrics
+        self.nonce        = nonce if not nonce is None else NonceGenerator()
+        self.middleware   = []
+
+        # Cached responses don't use up the rate limit, so the cache goes first
+        if not cache is None:
+            self.middleware.append(CacheMiddleware(cache))
+
+        # Every retry takes a token of the rate limiter again
+        if not retry is None or not circuit_breaker is None:
+            self.middleware.append(RetryMiddleware(retry, circuit_breaker, self.nonce, metrics))
+
+        if not rate_limiter is None:
+            self.middleware.append(RateLimitMiddleware(rate_limiter))
+
+        self.middleware.extend(middleware or [])
+
+        self._auth_headers = {"authorization": self.api_key}
+        self._routes = {}
+
+        for group, endpoints in (("public", self.public_endpoints), ("private", self.private_endpoints), ("wallet", self.wallet_endpoints)):
+            for name, endpoint in endpoints.items():
+                self._routes[name] = _Route(name, group, endpoint, self.base_url)
+
     def get_auth_headers(self, nonce=False):
         if not nonce:
-            return {"authorization": self.api_key}
+            return self._auth_headers
         else:
-            return {"authorization": self.api_key, "nonce": str(round(time.time() * 1000.0))}
+            return {"authorization": self.api_key, "nonce": str(self.nonce.next())}
 
-    def get_system_time(self):
-        """ Retrieves system time in epoch millis """
-        method = self.public_endpoints['system_time']['method']
-        url    = self.base_url + self.public_endpoints['system_time']['url']
-        req    = requests.request(method, url)
-        res    = req.json()
+    def add_middleware(self, middleware):
+        """ Adds middleware innermost, i.e. closest to the actual HTTP request. See middleware.py """
+        self.middleware.append(middleware)
 
-        if res['success'] == True:
-            return res["result"]
+    def _build_request(self, name, path=None, params=None, json=None):
+        """ Returns the Request for an endpoint with its url filled in and the headers of its group; see call() """
+        route = self._routes[name]
+        url   = route.url.format(**path) if route.has_params else route.url
+
+        if route.group == "public":
+            headers = None
         else:
-            return res
+            headers = self.get_auth_headers(nonce=route.method != "GET")
 
-    def get_system_info(self):
-        """ Retrieves system info such as system version """
-        method = self.public_endpoints['system_info']['method']
-        url    = self.base_url + self.public_endpoints['system_info']['url']
-        req    = requests.request(method, url)
-        res    = req.json()
+        return Request(name, route.group, route.method, url, headers, params, json)
 
+    @staticmethod
+    def _unwrap(res, success_value):
         if res['success'] == True:
-            return res["result"]
+            return res["result"] if success_value is None else success_value
         else:
             return res
 
+    def _then(self, res, func):
+        """ Applies func to the result of call(); AsyncCobinhood_API applies it once the result is awaited """
+        return func(res)
+
+    def get_system_time(self):
+        """ Retrieves system time in epoch millis """
+        return self.call('system_time')
+
+    def get_system_info(self):
+        """ Retrieves system info such as system version """
+        return self.call('system_info')
+
     def get_all_currencies(self):
         """ Retrieves info for all currencies currently supported by Cobinhood """
-        method = self.public_endpoints['currency_info']['method']
-        url    = self.base_url + self.public_endpoints['currency_info']['url']
-        req    = requests.request(method, url)
-        res    = req.json()
-
-        if res['success'] == True:
-            return res["result"]
-        else:
-            return res
+        return self.call('currency_info')
 
     def get_all_trading_pairs(self):
         """ Retrieves all trading pairs supported by Cobinhood """
-        method = self.public_endpoints['all_trading_pairs']['method']
-        url    = self.base_url + self.public_endpoints['all_trading_pairs']['url']
-        req    = requests.request(method, url)
-        res    = req.json()
-
-        if res['success'] == True:
-            return res["result"]
-        else:
-            return res
+        return self.call('all_trading_pairs')
 
     def get_order_book(self, pair):
         """ Retrieves all orders per trading pairs
@@ -216,27 +306,11 @@ class Cobinhood_API:
             Args:
                 pair: string containing the trading pair on Cobinhood; e.g. PAY-ETH
         """
-        method = self.public_endpoints['order_book']['method']
-        url    = self.base_url + self.public_endpoints['order_book']['url'].format(pairId=pair)
-        req    = requests.request(method, url)
-        res    = req.json()
-
-        if res['success'] == True:
-            return res["result"]
-        else:
-            return res
+        return self.call('order_book', {"pairId": pair})
 
     def get_trading_stats(self):
         """ Retrieves trading stats from Cobinhood """
-        method = self.public_endpoints['trading_stats']['method']
-        url    = self.base_url + self.public_endpoints['trading_stats']['url']
-        req    = requests.request(method, url)
-        res    = req.json()
-
-        if res['success'] == True:
-            return res["result"]
-        else:
-            return res
+        return self.call('trading_stats')
 
     def get_ticker(self, pair):
         """ Retrieves ticker for trading pairs
@@ -244,15 +318,7 @@ class Cobinhood_API:
             Args:
                 pair: string containing the trading pair on Cobinhood; e.g. PAY-ETH
         """
-        method = self.public_endpoints['ticker']['method']
-        url    = self.base_url + self.public_endpoints['ticker']['url'].format(pairId=pair)
-        req    = requests.request(method, url)
-        res    = req.json()
-
-        if res['success'] == True:
-            return res["result"]
-        else:
-            return res
+        return self.call('ticker', {"pairId": pair})
 
     def get_recent_trades(self, pair):
         """ Retrieves recent trades for pair
@@ -260,31 +326,44 @@ class Cobinhood_API:
             Args:
                 pair: string containing the trading pair on Cobinhood; e.g. PAY-ETH
         """
-        method = self.public_endpoints['recent_trades']['method']
-        url    = self.base_url + self.public_endpoints['recent_trades']['url'].format(pairId=pair)
-        req    = requests.request(method, url)
-        res    = req.json()
+        return self.call('recent_trades', {"pairId": pair})
 
-        if res['success'] == True:
-            return res["result"]
-        else:
-            return res
-
-    def get_candle_chart(self, pair):
+    def get_candle_chart(self, pair, timeframe="", start_time="", end_time="", as_arrays=False):
         """ Retrieves candle chart data for pair
 
             Args:
-                pair: string containing the trading pair on Cobinhood; e.g. PAY-ETH
+                Required:
+                    pair: string containing the trading pair on Cobinhood; e.g. PAY-ETH
+                Optional:
+                    timeframe: string with possible values: ['1m', '5m', '15m', '30m', '1h', '3h', '6h', '12h', '1D', '7D', '14D', '1M']. Raises ValueError if the value is different.
+                    start_time: epoch millis of the first candle
+                    end_time: epoch millis of the last candle
+                    as_arrays: if True, the candles are returned as a dict of NumPy arrays; see candles.candles_to_arrays. Requires numpy
+                               and a decoder with numbers other than 'scaled'
         """
-        method = self.public_endpoints['candles']['method']
-        url    = self.base_url + self.public_endpoints['candles']['url'].format(pairId=pair)
-        req    = requests.request(method, url)
-        res    = req.json()
+        query = {}
 
-        if res['success'] == True:
-            return res["result"]
-        else:
-            return res
+        if not timeframe == "":
+            if not timeframe in possible_timeframes:
+                raise ValueError("Timeframe value invalid")
+
+            query['timeframe'] = timeframe
+
+        if not start_time == "":
+            query['start_time'] = str(start_time)
+
+        if not end_time == "":
+            query['end_time'] = str(end_time)
+
+        if as_arrays:
+            require_unscaled(self, "candles_to_arrays")
+
+        res = self.call('candles', {"pairId": pair}, params=query)
+
+        if as_arrays:
+            return self._then(res, _as_arrays)
+
+        return res
 
     def get_order(self, order):
         """ Retrieves order info
@@ -292,15 +371,7 @@ class Cobinhood_API:
             Args:
                 order: string containing the orderId for your order; e.g. 37f550a202aa6a3fe120f420637c894c
         """
-        method = self.private_endpoints['get_order']['method']
-        url    = self.base_url + self.private_endpoints['get_order']['url'].format(orderId=order)
-        req    = requests.request(method, url, headers=self.get_auth_headers())
-        res    = req.json()
-
-        if res['success'] == True:
-            return res["result"]
-        else:
-            return res
+        return self.call('get_order', {"orderId": order})
 
     def get_trades_from_order(self, order):
         """ Retrieves all trades from orders
@@ -308,27 +379,11 @@ class Cobinhood_API:
             Args:
                 order: string containing the orderId for your order; ie; 37f550a202aa6a3fe120f420637c894c
         """
-        method = self.private_endpoints['trades_from_order']['method']
-        url    = self.base_url + self.private_endpoints['trades_from_order']['url'].format(orderId=order)
-        req    = requests.request(method, url, headers=self.get_auth_headers())
-        res    = req.json()
-
-        if res['success'] == True:
-            return res["result"]
-        else:
-            return res
+        return self.call('trades_from_order', {"orderId": order})
 
     def get_all_orders(self):
         """ Retrieves all orders """
-        method = self.private_endpoints['all_orders']['method']
-        url    = self.base_url + self.private_endpoints['all_orders']['url']
-        req    = requests.request(method, url, headers=self.get_auth_headers())
-        res    = req.json()
-
-        if res['success'] == True:
-            return res["result"]
-        else:
-            return res
+        return self.call('all_orders')
 
     def place_order(self, pair, side, ttype, size, price=0):
         """ Places a new order
@@ -342,9 +397,6 @@ class Cobinhood_API:
                 Optional:
                     price: if type is market this is optional, else you should give the price as a float or a string
         """
-        possible_sides = ['bid','ask']
-        possible_types = ['market', 'limit', 'stop', 'stop_limit']
-
         side  = side.lower()
         ttype = ttype.lower()
 
@@ -364,16 +416,7 @@ class Cobinhood_API:
         if not price == 0:
             payload['price'] = str(price)
 
-        method = self.private_endpoints['place_order']['method']
-        url    = self.base_url + self.private_endpoints['place_order']['url']
-        req    = requests.request(method, url, headers=self.get_auth_headers(nonce=True), json=payload)
-        res    = req.json()
-
-        if res['success'] == True:
-            return res["result"]
-        else:
-            return res
-
+        return self.call('place_order', json=payload)
 
     def modify_order(self, order, price, size):
         """ Modifies price and size on order with given orderId
@@ -388,15 +431,7 @@ class Cobinhood_API:
             "size": str(size)
         }
 
-        method = self.private_endpoints['modify_order']['method']
-        url    = self.base_url + self.private_endpoints['modify_order']['url'].format(orderId=order)
-        req    = requests.request(method, url, headers=self.get_auth_headers(nonce=True), json=request_params)
-        res    = req.json()
-
-        if res['success'] == True:
-            return True
-        else:
-            return res
+        return self.call('modify_order', {"orderId": order}, json=request_params, success_value=True)
 
     def cancel_order(self, order):
         """ Cancels order with given orderId
@@ -404,27 +439,29 @@ class Cobinhood_API:
             Args:
                 order: string containing the orderId for your order; ie; 37f550a202aa6a3fe120f420637c894c
         """
-        method = self.private_endpoints['cancel_order']['method']
-        url    = self.base_url + self.private_endpoints['cancel_order']['url'].format(orderId=order)
-        req    = requests.request(method, url, headers=self.get_auth_headers(nonce=True))
-        res    = req.json()
+        return self.call('cancel_order', {"orderId": order}, success_value=True)
 
-        if res['success'] == True:
-            return True
-        else:
-            return res
+    def get_order_history(self, pair="", limit="", page=""):
+        """ Retrieves order history
 
-    def get_order_history(self):
-        """ Retrieves order history """
-        method = self.private_endpoints['order_history']['method']
-        url    = self.base_url + self.private_endpoints['order_history']['url']
-        req    = requests.request(method, url, headers=self.get_auth_headers())
-        res    = req.json()
+            Args:
+                Optional:
+                    pair: string containing the trading pair on Cobinhood; e.g. PAY-ETH; if none given then all will be retrieved
+                    limit: the amount of results you want, defaults to 50, max 50
+                    page: the page of results you want, starting at 1
+        """
+        query = {}
 
-        if res['success'] == True:
-            return res["result"]
-        else:
-            return res
+        if not pair == "":
+            query['trading_pair_id'] = str(pair)
+
+        if not limit == "":
+            query['limit'] = str(limit)
+
+        if not page == "":
+            query['page'] = str(page)
+
+        return self.call('order_history', params=query)
 
     def get_trade(self, trade):
         """ Retrieves trade info
@@ -432,17 +469,9 @@ class Cobinhood_API:
             Args:
                 trade: string containing tradeId; e.g. 09619448-e48a-3bd7-3d49-3a4194f9020b
         """
-        method = self.private_endpoints['get_trade']['method']
-        url    = self.base_url + self.private_endpoints['get_trade']['url'].format(tradeId=trade)
-        req    = requests.request(method, url, headers=self.get_auth_headers())
-        res    = req.json()
-
-        if res['success'] == True:
-            return res["result"]
-        else:
-            return res
+        return self.call('get_trade', {"tradeId": trade})
 
-    def get_trade_history(self, pair, limit=20):
+    def get_trade_history(self, pair, limit=20, page=""):
         """ Retrieves trade history to the limit given
 
             Args:
@@ -450,36 +479,27 @@ class Cobinhood_API:
                     pair: string containing the trading pair on Cobinhood; e.g. PAY-ETH
                 Optional:
                     limit: int or string which contains limit the amount of items you get. defaults to 20, max: 50
+                    page: the page of results you want, starting at 1
         """
-        method = self.private_endpoints['trade_history']['method']
-        url    = self.base_url + self.private_endpoints['trade_history']['url'].format(pair=pair, limit=str(limit))
-        req    = requests.request(method, url, headers=self.get_auth_headers())
-        res    = req.json()
+        query = {}
 
-        if res['success'] == True:
-            return res["result"]
-        else:
-            return res
+        if not page == "":
+            query['page'] = str(page)
+
+        return self.call('trade_history', {"pair": pair, "limit": str(limit)}, params=query)
 
     def get_wallet_balances(self):
         """ Retrieves all balances in your wallet """
-        method = self.wallet_endpoints['balances']['method']
-        url    = self.base_url + self.wallet_endpoints['balances']['url']
-        req    = requests.request(method, url, headers=self.get_auth_headers())
-        res    = req.json()
-
-        if res['success'] == True:
-            return res["result"]
-        else:
-            return res
+        return self.call('balances')
 
-    def get_ledger_entries(self, currency="", limit=20):
+    def get_ledger_entries(self, currency="", limit=20, page=""):
         """ Retrieves balance mutations for the given currency. Returns as many results as limit specifies.
 
             Args:
                 Optional:
                     currency: string of the currency; e.g. BTC; if none given then all will be retrieved
                     limit: the amount of results you want, defaults to 20, max 50
+                    page: the page of results you want, starting at 1
         """
         query = {
             "limit": str(limit)
@@ -488,15 +508,10 @@ class Cobinhood_API:
         if not currency == "":
             query['currency'] = str(currency)
 
-        method = self.wallet_endpoints['ledger_entries']['method']
-        url    = self.base_url + self.wallet_endpoints['ledger_entries']['url']
-        req    = requests.request(method, url, headers=self.get_auth_headers(), params=query)
-        res    = req.json()
+        if not page == "":
+            query['page'] = str(page)
 
-        if res['success'] == True:
-            return res["result"]
-        else:
-            return res
+        return self.call('ledger_entries', params=query)
 
     def get_deposit_addresses(self, currency=""):
         """ Retrieves deposit addresses
@@ -505,20 +520,12 @@ class Cobinhood_API:
                 Optional:
                     currency: string containing desired currency; e.g. BTC
         """
-        method = self.wallet_endpoints['deposit_addresses']['method']
-        url    = self.base_url + self.wallet_endpoints['deposit_addresses']['url']
+        query = {}
 
         if not currency == "":
-            req = requests.request(method, url, headers=self.get_auth_headers(), params={"currency": str(currency)})
-        else:
-            req = requests.request(method, url, headers=self.get_auth_headers())
-
-        res = req.json()
+            query['currency'] = str(currency)
 
-        if res['success'] == True:
-            return res["result"]
-        else:
-            return res
+        return self.call('deposit_addresses', params=query)
 
     def get_withdrawal_addresses(self, currency=""):
         """ Retrieves withdrawal addresses
@@ -527,20 +534,12 @@ class Cobinhood_API:
                 Optional:
                     currency: string containing desired currency; e.g. BTC
         """
-        method = self.wallet_endpoints['withdrawal_addresses']['method']
-        url    = self.base_url + self.wallet_endpoints['withdrawal_addresses']['url']
+        query = {}
 
         if not currency == "":
-            req = requests.request(method, url, headers=self.get_auth_headers(), params={"currency": str(currency)})
-        else:
-            req = requests.request(method, url, headers=self.get_auth_headers())
-
-        res = req.json()
+            query['currency'] = str(currency)
 
-        if res['success'] == True:
-            return res["result"]
-        else:
-            return res
+        return self.call('withdrawal_addresses', params=query)
 
     def get_withdrawal(self, withdrawal):
         """ Retrieves withdrawal info for given withdrawal
@@ -548,17 +547,9 @@ class Cobinhood_API:
             Args:
                 withdrawal: string containing withdrawalId; e.g. 62056df2d4cf8fb9b15c7238b89a1438
         """
-        method = self.wallet_endpoints['get_withdrawal']['method']
-        url    = self.base_url + self.wallet_endpoints['get_withdrawal']['url'].format(withdrawalId=withdrawal)
-        req    = requests.request(method, url, headers=self.get_auth_headers())
-        res    = req.json()
+        return self.call('get_withdrawal', {"withdrawalId": withdrawal})
 
-        if res['success'] == True:
-            return res["result"]
-        else:
-            return res
-
-    def get_all_withdrawals(self, currency="", status="", limit=20):
+    def get_all_withdrawals(self, currency="", status="", limit=20, page=""):
         """ Retrieves all withdrawals
 
             Args:
@@ -566,11 +557,12 @@ class Cobinhood_API:
                     currency: string containing desired currency; e.g. BTC
                     status: string indicating status of desired withdrawals; must be in ['tx_pending_two_factor_auth', 'tx_pending_email_auth', 'tx_pending_approval', 'tx_approved', 'tx_processing', 'tx_sent', 'tx_pending', 'tx_confirmed', 'tx_timeout', 'tx_invalid', 'tx_cancelled', 'tx_rejected']
                     limit: the amount of results you want, defaults to 20, max 50
+                    page: the page of results you want, starting at 1
         """
         possible_status = ['tx_pending_two_factor_auth', 'tx_pending_email_auth', 'tx_pending_approval', 'tx_approved', 'tx_processing', 'tx_sent', 'tx_pending', 'tx_confirmed', 'tx_timeout', 'tx_invalid', 'tx_cancelled', 'tx_rejected']
         status = status.lower()
 
-        if not status in possible_status:
+        if not status == "" and not status in possible_status:
             raise ValueError("Status is invalid")
 
         query = {'limit':str(limit)}
@@ -581,15 +573,10 @@ class Cobinhood_API:
         if not status == "":
             query['status'] = status
 
-        method = self.wallet_endpoints['all_withdrawals']['method']
-        url    = self.base_url + self.wallet_endpoints['all_withdrawals']['url']
-        req    = requests.request(method, url, headers=self.get_auth_headers(), params=query)
-        res    = req.json()
+        if not page == "":
+            query['page'] = str(page)
 
-        if res['success'] == True:
-            return res["result"]
-        else:
-            return res
+        return self.call('all_withdrawals', params=query)
 
     def get_deposit(self, deposit):
         """ Retrieves deposit info for given deposit
@@ -597,24 +584,398 @@ class Cobinhood_API:
             Args:
                 deposit: string containing depositId; e.g. 62056df2d4cf8fb9b15c7238b89a1438
         """
-        method = self.wallet_endpoints['get_deposit']['method']
-        url    = self.base_url + self.wallet_endpoints['get_deposit']['url'].format(depositId=deposit)
-        req    = requests.request(method, url, headers=self.get_auth_headers())
-        res    = req.json()
+        return self.call('get_deposit', {"depositId": deposit})
 
-        if res['success'] == True:
-            return res["result"]
+    def get_all_deposit(self, limit="", page=""):
+        """ Retrieves all deposits
+
+            Args:
+                Optional:
+                    limit: the amount of results you want, defaults to 20, max 50
+                    page: the page of results you want, starting at 1
+        """
+        query = {}
+
+        if not limit == "":
+            query['limit'] = str(limit)
+
+        if not page == "":
+            query['page'] = str(page)
+
+        return self.call('all_deposits', params=query)
+
+class Cobinhood_API(_Endpoints):
+    """ Cobinhood_API:
+
+        This class wraps around the Cobinhood API, for communicating with them.
+
+        Attributes:
+            api_key: string for storing API key
+            self.base_url: base url for the api
+            self.public_endpoints: dict where all public API calls are stored
+            self.private_endpoints: dict where all private API calls are stored
+            self.wallet_endpoints: dict where all wallet API calls are stored
+    """
+
+    def __init__(self, api_key, session=None, base_url=None, pool_connections=10, pool_maxsize=10, max_retries=0, timeout=10, rate_limiter=None, cache=None, middleware=None, decoder=None, metrics=None, nonce=None, retry=None, circuit_breaker=None):
+        """ Inits Cobinhood_API with api_key
+
+            Args:
+                Required:
+                    api_key: string containing your API key
+                Optional:
+                    session: object with a requests-compatible request() method, used instead of the pooled session; e.g. to test against a local stub server
+                    base_url: string overriding the default base url; e.g. http://127.0.0.1:8080
+                    pool_connections: amount of connection pools to cache, defaults to 10
+                    pool_maxsize: maximum amount of keep-alive connections per pool, defaults to 10
+                    max_retries: amount of retries on failed connections, defaults to 0
+                    timeout: seconds to wait for the server as a float or a (connect, read) tuple, defaults to 10
+                    rate_limiter: RateLimiter shared by all calls; order traffic gets priority. Defaults to no limiting
+                    cache: ResponseCache for the slow-changing public endpoints. Defaults to no caching
+                    middleware: list of middleware wrapped around every request, outermost first; see middleware.py
+                    decoder: Decoder for the response bodies, e.g. Decoder(numbers='decimal'). Defaults to Decoder(), which uses orjson if installed
+                    metrics: Metrics recording latency per phase, bytes and results of every call. Defaults to no instrumentation
+                    nonce: NonceGenerator for the nonce header of order calls, e.g. FileNonceGenerator(path) to share it between processes. Defaults to NonceGenerator()
+                    retry: Retry for requests that failed with a connection error, timeout or 5xx response. Defaults to no retries
+                    circuit_breaker: CircuitBreaker failing requests fast while their endpoint group keeps failing. Defaults to none
+        """
+        self.timeout = timeout
+
+        # requests is only imported once the first request is sent, which keeps imports and short-lived jobs fast
+        self._session      = session
+        self._pool_options = (pool_connections, pool_maxsize, max_retries)
+        self._session_lock = threading.Lock()
+        self._validator    = None
+
+        self._setup(api_key, base_url, rate_limiter, cache, middleware, decoder, metrics, nonce, retry, circuit_breaker)
+
+    @staticmethod
+    def create_session(pool_connections=10, pool_maxsize=10, max_retries=0):
+        """ Creates a keep-alive requests.Session with a connection pool for http and https
+
+            Args:
+                pool_connections: amount of connection pools to cache
+                pool_maxsize: maximum amount of keep-alive connections per pool
+                max_retries: amount of retries on failed connections
+        """
+        import requests
+        import requests.adapters
+
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=max_retries)
+        adapter.poolmanager.pool_classes_by_scheme = _timed_pool_classes()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"Connection": "keep-alive"})
+
+        # Lets metrics tell new connections from reused ones
+        session.timed_connections = True
+
+        return session
+
+    @property
+    def session(self):
+        """ The session all requests are sent over; the pooled session is created on first use """
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self.create_session(*self._pool_options)
+
+        return self._session
+
+    @session.setter
+    def session(self, session):
+        self._session = session
+
+    def close(self):
+        """ Closes all pooled connections """
+        if hasattr(self._session, "close"):
+            self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def call(self, name, path=None, params=None, json=None, success_value=None):
+        """ Performs the request for an endpoint through the middleware and returns its result
+
+            Args:
+                Required:
+                    name: string with the key of the endpoint in one of the endpoint dicts; e.g. order_book
+                Optional:
+                    path: dict used to fill in the url of the endpoint; e.g. {"pairId": "PAY-ETH"}
+                    params: dict with the query parameters
+                    json: dict with the body
+                    success_value: returned instead of the result if the call succeeds
+        """
+        request = self._build_request(name, path, params, json)
+
+        if self.metrics is None:
+            res = self._dispatch(request, 0) if self.middleware else self.send(request)
         else:
-            return res
+            start = time.perf_counter()
 
-    def get_all_deposit(self):
-        """ Retrieves all deposits """
-        method = self.wallet_endpoints['all_deposits']['method']
-        url    = self.base_url + self.wallet_endpoints['all_deposits']['url']
-        req    = requests.request(method, url, headers=self.get_auth_headers())
-        res    = req.json()
+            try:
+                res = self._dispatch(request, 0) if self.middleware else self.send(request)
+            except Exception:
+                self.metrics.record_result(name, time.perf_counter() - start, 'exception')
+                raise
 
-        if res['success'] == True:
-            return res["result"]
+            self.metrics.record_result(name, time.perf_counter() - start, 'success' if res['success'] == True else 'error')
+
+        return self._unwrap(res, success_value)
+
+    def _dispatch(self, request, index):
+        if index == len(self.middleware):
+            return self.send(request)
+
+        return self.middleware[index](request, lambda request: self._dispatch(request, index + 1))
+
+    def send(self, request):
+        """ Sends request over the session and returns the decoded response """
+        kwargs = {"timeout": self.timeout}
+
+        if not request.headers is None:
+            kwargs['headers'] = request.headers
+
+        if request.params:
+            kwargs['params'] = request.params
+
+        if not request.json is None:
+            kwargs['json'] = request.json
+
+        if self.metrics is None:
+            response = self.session.request(request.method, request.url, **kwargs)
+            self._check_status(response)
+            return self._decode(response, getattr(response, "content", None))
+
+        session  = self.session
+        timed    = getattr(session, "timed_connections", False)
+        _connecting.seconds = None
+
+        start    = time.perf_counter()
+        response = session.request(request.method, request.url, **kwargs)
+        received = time.perf_counter()
+        connect  = _connecting.seconds
+        self._check_status(response)
+        content  = getattr(response, "content", None)
+        read     = time.perf_counter()
+        res      = self._decode(response, content)
+        decoded  = time.perf_counter()
+
+        # elapsed ends when the headers are parsed; requests reads the body afterwards unless streaming
+        elapsed = getattr(response, "elapsed", None)
+        headers = elapsed.total_seconds() if not elapsed is None else received - start
+        body    = max(read - start - headers, 0.0)
+        server  = max(headers - (connect or 0.0), 0.0)
+        sent    = getattr(getattr(response, "request", None), "body", None)
+
+        self.metrics.record_transfer(request.name, server, body, decoded - read, len(sent) if sent else 0, len(content) if content else 0,
+                                     reused=connect is None if timed else None, connect=connect)
+
+        return res
+
+    @staticmethod
+    def _check_status(response):
+        # A 5xx is an outage even with a JSON error body; raising lets retries and the circuit breaker see it
+        status = getattr(response, "status_code", 200)
+
+        if status >= 500:
+            if hasattr(response, "raise_for_status"):
+                response.raise_for_status()
+
+            import requests
+            raise requests.exceptions.HTTPError("%d Server Error for url: %s" % (status, getattr(response, "url", "")), response=response)
+
+    def _decode(self, response, content):
+        # Custom transports may only offer json()
+        if content is None:
+            return response.json()
+
+        return self.decoder(content)
+
+    def get_all_pair_ids(self):
+        """ Retrieves the ids of all trading pairs supported by Cobinhood; e.g. ['PAY-ETH', 'COB-BTC'] """
+        pairs = self.get_all_trading_pairs()
+
+        if 'trading_pairs' in pairs:
+            return [pair['id'] for pair in pairs['trading_pairs']]
         else:
-            return res
+            raise ValueError("Could not retrieve trading pairs: " + str(pairs))
+
+    def batch(self, func, pairs=None, max_workers=10):
+        """ Calls func for every pair concurrently on a pool of worker threads
+
+            Args:
+                Required:
+                    func: callable taking a pair as its only argument; e.g. api.get_order_book
+                Optional:
+                    pairs: list of trading pairs; e.g. ['PAY-ETH', 'COB-BTC']; if none given then all pairs will be used
+                    max_workers: maximum amount of requests in flight at once, defaults to 10
+
+            Returns:
+                dict with 'result' mapping every successful pair to its result and 'errors'
+                mapping every failed pair to the error response or the raised exception
+        """
+        if pairs is None:
+            pairs = self.get_all_pair_ids()
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        batch = {"result": {}, "errors": {}}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {pair: executor.submit(func, pair) for pair in pairs}
+
+        for pair, future in futures.items():
+            try:
+                res = future.result()
+            except Exception as e:
+                batch['errors'][pair] = e
+                continue
+
+            if isinstance(res, dict) and res.get('success') == False:
+                batch['errors'][pair] = res
+            else:
+                batch['result'][pair] = res
+
+        return batch
+
+    def batch_get_order_book(self, pairs=None, max_workers=10):
+        """ Retrieves the order books for multiple pairs concurrently. See batch() for the arguments and response """
+        return self.batch(self.get_order_book, pairs, max_workers)
+
+    def batch_get_ticker(self, pairs=None, max_workers=10):
+        """ Retrieves the tickers for multiple pairs concurrently. See batch() for the arguments and response """
+        return self.batch(self.get_ticker, pairs, max_workers)
+
+    def batch_get_recent_trades(self, pairs=None, max_workers=10):
+        """ Retrieves the recent trades for multiple pairs concurrently. See batch() for the arguments and response """
+        return self.batch(self.get_recent_trades, pairs, max_workers)
+
+    def batch_get_candle_chart(self, pairs=None, max_workers=10):
+        """ Retrieves the candle chart data for multiple pairs concurrently. See batch() for the arguments and response """
+        return self.batch(self.get_candle_chart, pairs, max_workers)
+
+    def get_order_validator(self, refresh=False):
+        """ Returns an OrderValidator built from get_all_trading_pairs; built once and reused unless refresh is True """
+        if self._validator is None or refresh:
+            self._validator = OrderValidator.from_api(self)
+
+        return self._validator
+
+    def place_orders(self, orders, validate=True, max_workers=10):
+        """ Places multiple orders concurrently, e.g. a ladder of limit orders
+
+            Args:
+                Required:
+                    orders: list of dicts with the arguments of place_order: pair, side, ttype, size and optionally price
+                Optional:
+                    validate: whether to check tick size, lot size and min/max size of every order against its
+                              trading pair before sending anything, defaults to True
+                    max_workers: maximum amount of orders in flight at once, defaults to 10
+
+            Returns:
+                dict with 'result' mapping the index of every placed order to its result and 'errors'
+                mapping the index of every failed order to the error response or the raised exception;
+                orders that fail validation are not sent
+        """
+        batch   = {"result": {}, "errors": {}}
+        pending = []
+
+        validator = self.get_order_validator() if validate else None
+
+        for index, order in enumerate(orders):
+            if not validator is None:
+                errors = validator.check(order['pair'], order['side'], order['ttype'], order['size'], order.get('price', 0))
+
+                if errors:
+                    batch['errors'][index] = ValueError("; ".join(errors))
+                    continue
+
+            pending.append(index)
+
+        if not pending:
+            return batch
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+            futures = {index: executor.submit(self.place_order, **orders[index]) for index in pending}
+
+        for index, future in futures.items():
+            try:
+                res = future.result()
+            except Exception as e:
+                batch['errors'][index] = e
+                continue
+
+            if isinstance(res, dict) and res.get('success') == False:
+                batch['errors'][index] = res
+            else:
+                batch['result'][index] = res
+
+        return batch
+
+    def iter_order_history(self, pair="", limit=50, start_page=1, since=None):
+        """ Iterates over the complete order history, newest first. Returns a pagination.PageIterator
+
+            Args:
+                Optional:
+                    pair: string containing the trading pair on Cobinhood; e.g. PAY-ETH; if none given then all will be retrieved
+                    limit: the amount of results per request, defaults to 50, max 50
+                    start_page: page to resume from, defaults to 1
+                    since: epoch millis; only orders after this time are returned
+        """
+        return PageIterator(lambda page, limit: self.get_order_history(pair, limit, page), 'order_history', limit, start_page, since)
+
+    def iter_trade_history(self, pair, limit=50, start_page=1, since=None):
+        """ Iterates over the complete trade history for pair, newest first. Returns a pagination.PageIterator
+
+            Args:
+                Required:
+                    pair: string containing the trading pair on Cobinhood; e.g. PAY-ETH
+                Optional:
+                    limit: the amount of results per request, defaults to 50, max 50
+                    start_page: page to resume from, defaults to 1
+                    since: epoch millis; only trades after this time are returned
+        """
+        return PageIterator(lambda page, limit: self.get_trade_history(pair, limit, page), 'trades', limit, start_page, since)
+
+    def iter_ledger_entries(self, currency="", limit=50, start_page=1, since=None):
+        """ Iterates over all ledger entries, newest first. Returns a pagination.PageIterator
+
+            Args:
+                Optional:
+                    currency: string of the currency; e.g. BTC; if none given then all will be retrieved
+                    limit: the amount of results per request, defaults to 50, max 50
+                    start_page: page to resume from, defaults to 1
+                    since: epoch millis; only entries after this time are returned
+        """
+        return PageIterator(lambda page, limit: self.get_ledger_entries(currency, limit, page), 'ledger', limit, start_page, since)
+
+    def iter_withdrawals(self, currency="", status="", limit=50, start_page=1, since=None):
+        """ Iterates over all withdrawals, newest first. Returns a pagination.PageIterator
+
+            Args:
+                Optional:
+                    currency: string containing desired currency; e.g. BTC
+                    status: string indicating status of desired withdrawals; see get_all_withdrawals
+                    limit: the amount of results per request, defaults to 50, max 50
+                    start_page: page to resume from, defaults to 1
+                    since: epoch millis; only withdrawals created after this time are returned
+        """
+        return PageIterator(lambda page, limit: self.get_all_withdrawals(currency, status, limit, page), 'withdrawals', limit, start_page, since, 'created_at')
+
+    def iter_deposits(self, limit=50, start_page=1, since=None):
+        """ Iterates over all deposits, newest first. Returns a pagination.PageIterator
+
+            Args:
+                Optional:
+                    limit: the amount of results per request, defaults to 50, max 50
+                    start_page: page to resume from, defaults to 1
+                    since: epoch millis; only deposits created after this time are returned
+        """
+        return PageIterator(lambda page, limit: self.get_all_deposit(limit, page), 'deposits', limit, start_page, since, 'created_at')
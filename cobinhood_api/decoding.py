@@ -0,0 +1,152 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import importlib.util
+import json
+from decimal import Decimal
+
+orjson = None
+
+def _import_orjson():
+    # Imported on first use; False once known to be missing
+    global orjson
+
+    if orjson is None:
+        try:
+            import orjson as module
+            orjson = module
+        except ImportError:
+            orjson = False
+
+    return orjson
+
+# Fields the API returns as strings which hold a number
+numeric_fields = frozenset([
+    'price', 'size', 'filled', 'eq_price', 'total', 'on_order', 'amount', 'balance', 'fee',
+    'open', 'high', 'low', 'close', 'volume',
+    'last_price', 'lowest_ask', 'highest_bid', 'base_volume', 'quote_volume', 'high_24hr', 'low_24hr', 'percent_changed_24hr',
+    '24h_high', '24h_low', '24h_open', '24h_volume', 'last_trade_price',
+    'base_min_size', 'base_max_size', 'quote_increment', 'min_unit', 'deposit_fee', 'withdrawal_fee'
+])
+
+# Keys of order book levels: lists of [price, count, size]
+level_fields = frozenset(['bids', 'asks'])
+
+possible_backends = ['auto', 'orjson', 'json']
+possible_numbers  = ['string', 'decimal', 'float', 'scaled']
+
+def require_unscaled(api, consumer):
+    """ Raises ValueError if api decodes numbers as scaled ints, which consumer would read as prices and sizes """
+    if getattr(getattr(api, 'decoder', None), 'numbers', None) == 'scaled':
+        raise ValueError(consumer + " can't read numbers decoded with numbers='scaled'; use 'string', 'decimal' or 'float'")
+
+class Decoder:
+    """ Decoder:
+
+        Decodes response bodies and optionally converts the numeric string fields of the
+        result into numbers. Uses orjson when it is installed, else the json module.
+
+        Scaled ints are meant for code doing its own fixed-point math. OrderBook,
+        candles_to_arrays, TradeAggregator, SharedMarketData, OrderValidator and
+        BalanceTracker read prices and sizes as floats or Decimals, so they raise ValueError
+        when given an API with a scaled decoder and misread results decoded that way.
+
+        Attributes:
+            backend: string with the JSON library in use: 'orjson' or 'json', resolved on first access
+            numbers: string with the type numeric fields are converted to
+            scale: amount of decimals kept when numbers is 'scaled'
+    """
+
+    def __init__(self, backend="auto", numbers="string", scale=8):
+        """ Inits Decoder
+
+            Args:
+                backend: string with possible values: ['auto', 'orjson', 'json']. Raises ValueError if the value is different.
+                numbers: string with possible values: ['string', 'decimal', 'float', 'scaled']. Raises ValueError if the value is different.
+                         'string' leaves the fields as the API returns them, 'scaled' converts them to ints of value * 10 ** scale
+                scale: amount of decimals kept when numbers is 'scaled', defaults to 8
+        """
+        if not backend in possible_backends:
+            raise ValueError("Backend value invalid")
+
+        if not numbers in possible_numbers:
+            raise ValueError("Numbers value invalid")
+
+        # orjson is only looked up here; importing it waits for the first response
+        if backend == "orjson" and orjson is None and importlib.util.find_spec("orjson") is None:
+            raise ValueError("orjson is not installed")
+
+        self.numbers  = numbers
+        self.scale    = scale
+        self._backend = backend
+        self._loads   = None
+
+        if numbers == "decimal":
+            self._number = Decimal
+        elif numbers == "float":
+            self._number = float
+        elif numbers == "scaled":
+            self._number = lambda value: int(Decimal(value).scaleb(scale).to_integral_value())
+        else:
+            self._number = None
+
+    @property
+    def backend(self):
+        if self._backend == "auto":
+            self._backend = "orjson" if _import_orjson() else "json"
+
+        return self._backend
+
+    def __call__(self, content):
+        """ Decodes content, a bytes or string response body """
+        loads = self._loads
+
+        if loads is None:
+            loads = self._loads = orjson.loads if self.backend == "orjson" and _import_orjson() else json.loads
+
+        res = loads(content)
+
+        if not self._number is None and res.get('success') == True:
+            res['result'] = self.convert(res['result'])
+
+        return res
+
+    def convert(self, value):
+        """ Converts the numeric fields in value, a decoded result, in place and returns it """
+        number = self._number
+
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key in numeric_fields and isinstance(item, str):
+                    try:
+                        value[key] = number(item)
+                    except (ValueError, ArithmeticError):
+                        pass
+                elif key in level_fields and isinstance(item, list):
+                    value[key] = [[number(price), int(count), number(size)] for price, count, size in item]
+                elif isinstance(item, (dict, list)):
+                    self.convert(item)
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, (dict, list)):
+                    self.convert(item)
+
+        return value
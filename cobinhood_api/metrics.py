@@ -0,0 +1,235 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import threading
+from bisect import bisect_left
+
+# Upper bounds in seconds, roughly doubling from 0.5 ms to 30 s
+default_buckets = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Phases of a call:
+#   total:   from call() until the result is unwrapped, including middleware such as the rate limiter
+#   dns:     resolving the host for a new connection; only AsyncCobinhood_API times it separately,
+#            Cobinhood_API counts it in connect
+#   connect: opening a new connection: TCP connect and TLS handshake
+#   server:  from sending the request until the response headers arrive, without dns and connect
+#   body:    reading the response body after the headers
+#   decode:  decoding the response body
+# dns and connect are only observed for requests that opened a connection; the others reused one
+phases = ('total', 'dns', 'connect', 'server', 'body', 'decode')
+
+class Histogram:
+    """ Histogram:
+
+        Fixed-bucket histogram; observing a value is a bisect and two additions.
+
+        Attributes:
+            buckets: tuple of upper bounds, ascending
+            counts: list with the amount of values per bucket; the last one counts values above all bounds
+            sum: total of all observed values
+            count: amount of observed values
+    """
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets=default_buckets):
+        self.buckets = buckets
+        self.counts  = [0] * (len(buckets) + 1)
+        self.sum     = 0.0
+        self.count   = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum   += value
+        self.count += 1
+
+    def quantile(self, q):
+        """ Returns the upper bound of the bucket holding quantile q (0 to 1), or None if nothing was observed """
+        if self.count == 0:
+            return None
+
+        rank  = q * self.count
+        total = 0
+
+        for index, count in enumerate(self.counts):
+            total += count
+
+            if total >= rank and count:
+                return self.buckets[index] if index < len(self.buckets) else float('inf')
+
+        return float('inf')
+
+class _EndpointMetrics:
+    __slots__ = ('histograms', 'success', 'errors', 'exceptions', 'retries', 'bytes_in', 'bytes_out', 'new_connections', 'reused_connections')
+
+    def __init__(self, buckets):
+        self.histograms = {phase: Histogram(buckets) for phase in phases}
+        self.success    = 0
+        self.errors     = 0
+        self.exceptions = 0
+        self.retries    = 0
+        self.bytes_in   = 0
+        self.bytes_out  = 0
+        self.new_connections    = 0
+        self.reused_connections = 0
+
+class Metrics:
+    """ Metrics:
+
+        Latency histograms per endpoint and phase, plus counters for results, retries and
+        bytes. Give an instance to Cobinhood_API(metrics=...) to record every call.
+    """
+
+    def __init__(self, buckets=default_buckets):
+        self.buckets    = tuple(buckets)
+        self._endpoints = {}
+        self._lock      = threading.Lock()
+
+    def _get(self, name):
+        endpoint = self._endpoints.get(name)
+
+        if endpoint is None:
+            endpoint = self._endpoints.setdefault(name, _EndpointMetrics(self.buckets))
+
+        return endpoint
+
+    def observe(self, name, phase, seconds):
+        """ Records seconds spent in phase for the endpoint name """
+        endpoint = self._get(name)
+
+        with self._lock:
+            endpoint.histograms[phase].observe(seconds)
+
+    def record_transfer(self, name, server, body, decode, bytes_out, bytes_in, reused=None, connect=None, dns=None):
+        """ Records the phases of one HTTP exchange and its size in bytes
+
+            reused tells whether the exchange went over a pooled connection, or is None if the
+            session can't tell; connect and dns are the seconds spent opening a new one
+        """
+        endpoint = self._get(name)
+
+        with self._lock:
+            if reused == True:
+                endpoint.reused_connections += 1
+            elif reused == False:
+                endpoint.new_connections += 1
+
+            if not connect is None:
+                endpoint.histograms['connect'].observe(connect)
+
+            if not dns is None:
+                endpoint.histograms['dns'].observe(dns)
+
+            endpoint.histograms['server'].observe(server)
+            endpoint.histograms['body'].observe(body)
+            endpoint.histograms['decode'].observe(decode)
+            endpoint.bytes_out += bytes_out
+            endpoint.bytes_in  += bytes_in
+
+    def record_result(self, name, seconds, result):
+        """ Records the total duration of a call and its result: 'success', 'error' or 'exception' """
+        endpoint = self._get(name)
+
+        with self._lock:
+            endpoint.histograms['total'].observe(seconds)
+
+            if result == 'success':
+                endpoint.success += 1
+            elif result == 'error':
+                endpoint.errors += 1
+            else:
+                endpoint.exceptions += 1
+
+    def record_retry(self, name):
+        """ Counts a retry of a call to the endpoint name """
+        endpoint = self._get(name)
+
+        with self._lock:
+            endpoint.retries += 1
+
+    def stats(self):
+        """ Returns a dict per endpoint with its counters and count, mean, p50 and p99 in seconds per phase """
+        with self._lock:
+            stats = {}
+
+            for name, endpoint in self._endpoints.items():
+                stats[name] = {
+                    "success": endpoint.success,
+                    "errors": endpoint.errors,
+                    "exceptions": endpoint.exceptions,
+                    "retries": endpoint.retries,
+                    "bytes_in": endpoint.bytes_in,
+                    "bytes_out": endpoint.bytes_out,
+                    "new_connections": endpoint.new_connections,
+                    "reused_connections": endpoint.reused_connections
+                }
+
+                for phase, histogram in endpoint.histograms.items():
+                    stats[name][phase] = {
+                        "count": histogram.count,
+                        "mean": histogram.sum / histogram.count if histogram.count else None,
+                        "p50": histogram.quantile(0.5),
+                        "p99": histogram.quantile(0.99)
+                    }
+
+            return stats
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+    def to_prometheus(self, prefix="cobinhood"):
+        """ Returns all metrics in the Prometheus / OpenMetrics text format """
+        lines = [
+            "# TYPE %s_request_duration_seconds histogram" % prefix,
+        ]
+
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+
+            for name, endpoint in endpoints:
+                for phase, histogram in endpoint.histograms.items():
+                    labels = 'endpoint="%s",phase="%s"' % (name, phase)
+                    total  = 0
+
+                    for bound, count in zip(self.buckets, histogram.counts):
+                        total += count
+                        lines.append('%s_request_duration_seconds_bucket{%s,le="%s"} %d' % (prefix, labels, repr(bound), total))
+
+                    lines.append('%s_request_duration_seconds_bucket{%s,le="+Inf"} %d' % (prefix, labels, histogram.count))
+                    lines.append('%s_request_duration_seconds_sum{%s} %r' % (prefix, labels, histogram.sum))
+                    lines.append('%s_request_duration_seconds_count{%s} %d' % (prefix, labels, histogram.count))
+
+            lines.append("# TYPE %s_requests counter" % prefix)
+
+            for name, endpoint in endpoints:
+                for result in ('success', 'errors', 'exceptions'):
+                    lines.append('%s_requests_total{endpoint="%s",result="%s"} %d' % (prefix, name, result, getattr(endpoint, result)))
+
+            for metric, attribute in (('retries', 'retries'), ('response_bytes', 'bytes_in'), ('request_bytes', 'bytes_out'),
+                                      ('new_connections', 'new_connections'), ('reused_connections', 'reused_connections')):
+                lines.append("# TYPE %s_%s counter" % (prefix, metric))
+
+                for name, endpoint in endpoints:
+                    lines.append('%s_%s_total{endpoint="%s"} %d' % (prefix, metric, name, getattr(endpoint, attribute)))
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,249 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+""" Middleware for the request pipeline of Cobinhood_API.
+
+    A middleware is a callable taking (request, call_next). It may inspect or change the
+    Request, must call call_next(request) to continue the pipeline (or skip it, e.g. to
+    answer from a cache) and returns the decoded response, i.e. the dict with 'success'.
+
+    AsyncCobinhood_API runs the same pipeline with coroutines: it calls the call_async method
+    of a middleware if it has one, otherwise the middleware itself, which must then be async.
+    There call_next(request) returns an awaitable. The middleware below support both clients.
+"""
+
+import time
+
+class Request:
+    """ Request:
+
+        A single call going through the pipeline of Cobinhood_API.
+
+        Attributes:
+            name: string with the key of the endpoint; e.g. order_book
+            group: string with possible values: ['public', 'private', 'wallet']
+            method: string with the HTTP method
+            url: string with the complete url
+            headers: dict with the headers, or None
+            params: dict with the query parameters, or None
+            json: dict with the body, or None
+    """
+
+    __slots__ = ('name', 'group', 'method', 'url', 'headers', 'params', 'json')
+
+    def __init__(self, name, group, method, url, headers=None, params=None, json=None):
+        self.name    = name
+        self.group   = group
+        self.method  = method
+        self.url     = url
+        self.headers = headers
+        self.params  = params
+        self.json    = json
+
+    @property
+    def is_order(self):
+        """ True for place_order, modify_order and cancel_order """
+        return self.group == 'private' and self.method != 'GET'
+
+class RateLimitMiddleware:
+    """ Passes every request through a RateLimiter; order requests get priority """
+
+    def __init__(self, rate_limiter):
+        self.rate_limiter = rate_limiter
+
+    def __call__(self, request, call_next):
+        self.rate_limiter.acquire(request.group, priority=request.is_order)
+        return call_next(request)
+
+    async def call_async(self, request, call_next):
+        await self.rate_limiter.acquire_async(request.group, priority=request.is_order)
+        return await call_next(request)
+
+class CacheMiddleware:
+    """ Serves the endpoints known to a ResponseCache from it """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def _key(self, request):
+        if request.method != 'GET' or not request.name in self.cache.ttls:
+            return None
+
+        return (request.url, tuple(sorted((request.params or {}).items())))
+
+    def __call__(self, request, call_next):
+        key = self._key(request)
+
+        if key is None:
+            return call_next(request)
+
+        return self.cache.get(request.name, lambda: call_next(request), key)
+
+    async def call_async(self, request, call_next):
+        key = self._key(request)
+
+        if key is None:
+            return await call_next(request)
+
+        return await self.cache.get_async(request.name, lambda: call_next(request), key)
+
+class RetryMiddleware:
+    """ Sends requests again after transient failures according to a Retry, and fails fast
+        with CircuitOpenError while the CircuitBreaker of their group is open. Either may be None.
+        Retried order requests get a fresh nonce from nonce, a NonceGenerator.
+    """
+
+    def __init__(self, retry=None, circuit_breaker=None, nonce=None, metrics=None, sleep=time.sleep):
+        # requests is only loaded when this middleware is used
+        from .retry import CircuitOpenError, is_request_error, is_transient
+
+        self.retry           = retry
+        self.circuit_breaker = circuit_breaker
+        self.nonce           = nonce
+        self.metrics         = metrics
+        self.sleep           = sleep
+
+        self._circuit_open_error = CircuitOpenError
+        self._is_request_error   = is_request_error
+        self._is_transient       = is_transient
+
+    def _allow(self, request):
+        if not self.circuit_breaker is None and not self.circuit_breaker.allow(request.group):
+            raise self._circuit_open_error("Circuit for %s endpoints is open; not sending %s" % (request.group, request.name))
+
+    def _succeeded(self, request):
+        if not self.circuit_breaker is None:
+            self.circuit_breaker.record_success(request.group)
+
+    def _abandoned(self, request):
+        # Cancelled or interrupted: neither a success nor a failure of the exchange
+        if not self.circuit_breaker is None:
+            self.circuit_breaker.release(request.group)
+
+    def _failed(self, request, exc, attempt):
+        """ Records that attempt (0 based) raised exc. Returns the seconds to wait before trying again, or None to give up """
+        breaker = self.circuit_breaker
+
+        if not self._is_request_error(exc):
+            # The exchange answered, e.g. with a body that could not be decoded
+            self._succeeded(request)
+            return None
+
+        if not breaker is None:
+            if self._is_transient(exc):
+                breaker.record_failure(request.group)
+            else:
+                breaker.record_success(request.group)
+
+        if self.retry is None or attempt >= self.retry.total or not self.retry.is_retryable(request, exc):
+            return None
+
+        if not self.metrics is None:
+            self.metrics.record_retry(request.name)
+
+        return self.retry.delay(attempt + 1)
+
+    def _renew_nonce(self, request):
+        # The exchange rejects a nonce it has seen before
+        if not self.nonce is None and request.headers and 'nonce' in request.headers:
+            request.headers = dict(request.headers, nonce=str(self.nonce.next()))
+
+    def __call__(self, request, call_next):
+        attempt = 0
+
+        while True:
+            self._allow(request)
+
+            try:
+                res = call_next(request)
+            except Exception as e:
+                delay = self._failed(request, e, attempt)
+
+                if delay is None:
+                    raise
+            except BaseException:
+                # asyncio.CancelledError and KeyboardInterrupt; a half open circuit would otherwise wait for this trial forever
+                self._abandoned(request)
+                raise
+            else:
+                self._succeeded(request)
+                return res
+
+            attempt += 1
+            self.sleep(delay)
+            self._renew_nonce(request)
+
+    async def call_async(self, request, call_next):
+        import asyncio
+
+        attempt = 0
+
+        while True:
+            self._allow(request)
+
+            try:
+                res = await call_next(request)
+            except Exception as e:
+                delay = self._failed(request, e, attempt)
+
+                if delay is None:
+                    raise
+            except BaseException:
+                # asyncio.CancelledError and KeyboardInterrupt; a half open circuit would otherwise wait for this trial forever
+                self._abandoned(request)
+                raise
+            else:
+                self._succeeded(request)
+                return res
+
+            attempt += 1
+            await asyncio.sleep(delay)
+            self._renew_nonce(request)
+
+class TracingMiddleware:
+    """ Calls callback(request, response, seconds) after every request, or (request, exception, seconds) if it raised """
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def __call__(self, request, call_next):
+        start = time.perf_counter()
+
+        try:
+            res = call_next(request)
+        except Exception as e:
+            self.callback(request, e, time.perf_counter() - start)
+            raise
+
+        self.callback(request, res, time.perf_counter() - start)
+        return res
+
+    async def call_async(self, request, call_next):
+        start = time.perf_counter()
+
+        try:
+            res = await call_next(request)
+        except Exception as e:
+            self.callback(request, e, time.perf_counter() - start)
+            raise
+
+        self.callback(request, res, time.perf_counter() - start)
+        return res
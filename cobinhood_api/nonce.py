@@ -0,0 +1,124 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+class NonceGenerator:
+    """ NonceGenerator:
+
+        Strictly increasing nonces in epoch millis, safe to share between threads. When
+        several nonces are needed within one millisecond, the later ones run ahead of the
+        clock by a millisecond each instead of repeating.
+
+        Attributes:
+            offset: milliseconds added to the local clock to match the server clock; see sync()
+    """
+
+    def __init__(self, offset=0):
+        self.offset = offset
+        self._last  = 0
+        self._lock  = threading.Lock()
+
+    def _now(self):
+        return int(time.time() * 1000.0) + self.offset
+
+    def next(self):
+        """ Returns the next nonce as an int """
+        with self._lock:
+            self._last = max(self._now(), self._last + 1)
+            return self._last
+
+    __call__ = next
+
+    def sync(self, api):
+        """ Sets offset to the difference between the server clock, from api.get_system_time(), and the local clock
+
+            The server time is compared to the middle of the request, so half the round trip is
+            accounted for. Nonces stay increasing if the offset moves them back. Returns the offset.
+        """
+        start = time.time()
+        res   = api.get_system_time()
+
+        return self._set_offset(res, start, time.time())
+
+    async def sync_async(self, api):
+        """ sync() for AsyncCobinhood_API """
+        start = time.time()
+        res   = await api.get_system_time()
+
+        return self._set_offset(res, start, time.time())
+
+    def _set_offset(self, res, start, end):
+        if not isinstance(res, dict) or not 'time' in res:
+            raise ValueError("Could not retrieve system time: " + str(res))
+
+        self.offset = int(res['time']) - int((start + end) / 2 * 1000.0)
+        return self.offset
+
+class FileNonceGenerator(NonceGenerator):
+    """ FileNonceGenerator:
+
+        NonceGenerator shared by every process using the same file: the last nonce is kept
+        in path and read and updated under an exclusive lock. Requires fcntl, i.e. not on Windows.
+
+        Attributes:
+            path: file holding the last nonce; created if it does not exist
+            offset: milliseconds added to the local clock to match the server clock; see sync()
+    """
+
+    def __init__(self, path, offset=0):
+        if fcntl is None:
+            raise ValueError("FileNonceGenerator requires fcntl, which is not available on this platform")
+
+        super().__init__(offset)
+        self.path = path
+
+    def next(self):
+        """ Returns the next nonce as an int """
+        # The thread lock keeps threads of this process from contending for the file lock
+        with self._lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+
+                data = os.read(fd, 32)
+                last = int(data) if data.strip() else 0
+
+                self._last = max(self._now(), last + 1)
+
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.ftruncate(fd, 0)
+                os.write(fd, str(self._last).encode())
+            finally:
+                # Closing the descriptor releases the lock
+                os.close(fd)
+
+            return self._last
+
+    __call__ = next
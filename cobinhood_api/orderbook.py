@@ -0,0 +1,274 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+from bisect import bisect_left
+
+# Sizes below this are treated as zero when applying deltas to a level
+EPSILON = 1e-12
+
+class PriceLevel:
+    """ A single price level: price, amount of orders and total size """
+
+    __slots__ = ('price', 'count', 'size')
+
+    def __init__(self, price, count, size):
+        self.price = price
+        self.count = count
+        self.size  = size
+
+    def __repr__(self):
+        return "PriceLevel(%r, %r, %r)" % (self.price, self.count, self.size)
+
+class BookSide:
+    """ BookSide:
+
+        One side of an order book. Levels are kept in a dict by price, next to a list
+        of sort keys ordered from the best to the worst price, so the best level is
+        always at index 0 and finding a level takes O(log n).
+
+        Attributes:
+            side: string with possible values: ['bid', 'ask']
+    """
+
+    __slots__ = ('side', '_sign', '_keys', '_levels')
+
+    def __init__(self, side):
+        self.side    = side
+        # Bids are sorted descending by storing the negated price as key
+        self._sign   = -1.0 if side == 'bid' else 1.0
+        self._keys   = []
+        self._levels = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        """ Iterates over the levels from the best to the worst price """
+        levels = self._levels
+        sign   = self._sign
+
+        for key in self._keys:
+            yield levels[key * sign]
+
+    def load(self, levels):
+        """ Replaces all levels with levels, a list of [price, count, size] as returned by get_order_book """
+        self._levels = {}
+
+        for price, count, size in levels:
+            price = float(price)
+            self._levels[price] = PriceLevel(price, int(count), float(size))
+
+        self._keys = sorted(price * self._sign for price in self._levels)
+
+    def set(self, price, count, size):
+        """ Sets the level at price to count and size, removing it if either is zero """
+        price = float(price)
+        count = int(count)
+        size  = float(size)
+        level = self._levels.get(price)
+
+        if count <= 0 or size <= EPSILON:
+            if not level is None:
+                self._remove(price)
+        elif level is None:
+            self._insert(PriceLevel(price, count, size))
+        else:
+            level.count = count
+            level.size  = size
+
+    def add(self, price, count, size):
+        """ Adds count and size to the level at price; used for incremental updates """
+        price = float(price)
+        level = self._levels.get(price)
+
+        if level is None:
+            self.set(price, count, size)
+        else:
+            self.set(price, level.count + int(count), level.size + float(size))
+
+    def _insert(self, level):
+        key = level.price * self._sign
+        self._keys.insert(bisect_left(self._keys, key), key)
+        self._levels[level.price] = level
+
+    def _remove(self, price):
+        key = price * self._sign
+        del self._keys[bisect_left(self._keys, key)]
+        del self._levels[price]
+
+    def get(self, price):
+        """ Returns the PriceLevel at price, or None """
+        return self._levels.get(float(price))
+
+    def best(self):
+        """ Returns the best PriceLevel, or None if this side is empty """
+        if not self._keys:
+            return None
+
+        return self._levels[self._keys[0] * self._sign]
+
+    def size_to_price(self, price):
+        """ Returns the total size of all levels at price or better """
+        limit = float(price) * self._sign
+        total = 0.0
+
+        for level in self:
+            if level.price * self._sign > limit:
+                break
+
+            total += level.size
+
+        return total
+
+    def price_for_size(self, size):
+        """ Returns the worst price needed to fill size, or None if this side is too thin """
+        remaining = float(size)
+
+        for level in self:
+            remaining -= level.size
+
+            if remaining <= EPSILON:
+                return level.price
+
+        return None
+
+    def vwap(self, size):
+        """ Returns the volume weighted average price for filling size, or None if this side is too thin """
+        remaining = float(size)
+        cost      = 0.0
+
+        if remaining <= 0:
+            return None
+
+        for level in self:
+            taken      = min(remaining, level.size)
+            cost      += taken * level.price
+            remaining -= taken
+
+            if remaining <= EPSILON:
+                return cost / float(size)
+
+        return None
+
+class OrderBook:
+    """ OrderBook:
+
+        Sorted, compact order book built from the response of get_order_book.
+
+        Attributes:
+            pair: string containing the trading pair on Cobinhood; e.g. PAY-ETH
+            bids: BookSide with the bids, highest price first
+            asks: BookSide with the asks, lowest price first
+            sequence: sequence number of the order book, or the version of the last update
+    """
+
+    __slots__ = ('pair', 'bids', 'asks', 'sequence')
+
+    def __init__(self, pair=None):
+        self.pair     = pair
+        self.bids     = BookSide('bid')
+        self.asks     = BookSide('ask')
+        self.sequence = None
+
+    @classmethod
+    def from_response(cls, res, pair=None):
+        """ Builds an OrderBook from the result of get_order_book
+
+            Args:
+                Required:
+                    res: dict returned by get_order_book
+                Optional:
+                    pair: string containing the trading pair on Cobinhood; e.g. PAY-ETH
+        """
+        if 'success' in res and res['success'] == False:
+            raise ValueError("Order book response is an error: " + str(res))
+
+        book = cls(pair)
+        book.apply_snapshot(res.get('orderbook', res), res.get('orderbook', res).get('sequence'))
+
+        return book
+
+    def side(self, side):
+        """ Returns the BookSide for side: 'bid' or 'ask' """
+        if side == 'bid':
+            return self.bids
+        elif side == 'ask':
+            return self.asks
+        else:
+            raise ValueError("Side value invalid")
+
+    def apply_snapshot(self, data, sequence=None):
+        """ Replaces both sides with the bids and asks in data """
+        self.bids.load(data.get('bids', []))
+        self.asks.load(data.get('asks', []))
+        self.sequence = sequence
+
+    def apply_update(self, data, sequence=None):
+        """ Adds the counts and sizes of the bids and asks in data to the existing levels """
+        for side, levels in ((self.bids, data.get('bids', [])), (self.asks, data.get('asks', []))):
+            for price, count, size in levels:
+                side.add(price, count, size)
+
+        self.sequence = sequence
+
+    def update(self, side, price, count, size):
+        """ Sets the level at price on side to count and size; a count or size of 0 removes it """
+        self.side(side).set(price, count, size)
+
+    def best_bid(self):
+        """ Returns the highest bid price, or None if there are no bids """
+        level = self.bids.best()
+        return None if level is None else level.price
+
+    def best_ask(self):
+        """ Returns the lowest ask price, or None if there are no asks """
+        level = self.asks.best()
+        return None if level is None else level.price
+
+    def spread(self):
+        """ Returns the lowest ask minus the highest bid, or None if either side is empty """
+        bid, ask = self.best_bid(), self.best_ask()
+
+        if bid is None or ask is None:
+            return None
+
+        return ask - bid
+
+    def mid_price(self):
+        """ Returns the price halfway between the best bid and ask, or None if either side is empty """
+        bid, ask = self.best_bid(), self.best_ask()
+
+        if bid is None or ask is None:
+            return None
+
+        return (bid + ask) / 2
+
+    def vwap(self, side, size):
+        """ Returns the average price when taking size from side ('bid' to sell, 'ask' to buy), or None if it is too thin """
+        return self.side(side).vwap(size)
+
+    def depth(self, side, price):
+        """ Returns the total size on side available at price or better """
+        return self.side(side).size_to_price(price)
+
+    def price_for_size(self, side, size):
+        """ Returns the worst price reached when taking size from side, or None if it is too thin """
+        return self.side(side).price_for_size(size)
@@ -0,0 +1,249 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+def _is_error(res):
+    return isinstance(res, dict) and res.get('success') == False
+
+class OrderManager:
+    """ OrderManager:
+
+        Tracks the open orders of an account locally from the responses of place_order,
+        modify_order and cancel_order, so they don't have to be fetched after every change.
+        reconcile() replaces the local state with get_all_orders, e.g. to pick up fills;
+        orders placed, modified or canceled while it waits for the exchange are applied again
+        afterwards, since the response may not include them yet.
+
+        Attributes:
+            api: Cobinhood_API used for all calls
+    """
+
+    open_states = ('open', 'queued', 'partially_filled', 'new')
+
+    def __init__(self, api, reconcile=True):
+        """ Inits OrderManager
+
+            Args:
+                Required:
+                    api: Cobinhood_API used for all calls
+                Optional:
+                    reconcile: whether to load the open orders right away, defaults to True
+        """
+        self.api = api
+
+        self._orders   = {}
+        self._index    = {}
+        self._journals = []
+        self._lock     = threading.Lock()
+        self._stop    = threading.Event()
+        self._thread  = None
+
+        if reconcile:
+            self.reconcile()
+
+    def _add(self, order):
+        key = (order.get('trading_pair', order.get('trading_pair_id')), order.get('side'))
+        self._remove(order['id'])
+        self._orders[order['id']] = order
+        self._index.setdefault(key, set()).add(order['id'])
+
+    def _remove(self, order_id):
+        order = self._orders.pop(order_id, None)
+
+        if not order is None:
+            key = (order.get('trading_pair', order.get('trading_pair_id')), order.get('side'))
+            ids = self._index.get(key)
+
+            if ids:
+                ids.discard(order_id)
+
+                if not ids:
+                    del self._index[key]
+
+        return order
+
+    def _apply(self, event):
+        # Called with the lock held; reconcile() replays the events it waited for
+        for journal in self._journals:
+            journal.append(event)
+
+        kind = event[0]
+
+        if kind == 'add':
+            self._add(event[1])
+        elif kind == 'remove':
+            self._remove(event[1])
+        else:
+            order = self._orders.get(event[1])
+
+            if not order is None:
+                order['price'] = event[2]
+                order['size']  = event[3]
+
+    def place(self, pair, side, ttype, size, price=0):
+        """ Places an order with place_order and tracks it. Returns the response of place_order """
+        res = self.api.place_order(pair, side, ttype, size, price)
+
+        if not _is_error(res) and 'order' in res:
+            order = dict(res['order'])
+            order.setdefault('trading_pair', pair)
+
+            with self._lock:
+                if order.get('state', 'open') in self.open_states:
+                    self._apply(('add', order))
+
+        return res
+
+    def modify(self, order_id, price, size):
+        """ Modifies an order with modify_order and updates it locally. Returns the response of modify_order """
+        res = self.api.modify_order(order_id, price, size)
+
+        if res == True:
+            with self._lock:
+                self._apply(('modify', order_id, str(price), str(size)))
+
+        return res
+
+    def cancel(self, order_id):
+        """ Cancels an order with cancel_order and stops tracking it. Returns the response of cancel_order """
+        res = self.api.cancel_order(order_id)
+
+        if res == True:
+            with self._lock:
+                self._apply(('remove', order_id))
+
+        return res
+
+    def cancel_all(self, pair=None, side=None, max_workers=10):
+        """ Cancels all tracked orders, optionally only for pair and side, concurrently
+
+            Args:
+                Optional:
+                    pair: string containing the trading pair on Cobinhood; e.g. PAY-ETH
+                    side: string with possible values: ['bid', 'ask']
+                    max_workers: maximum amount of cancels in flight at once, defaults to 10
+
+            Returns:
+                dict with 'result', the list of canceled order ids, and 'errors', mapping the
+                order ids that could not be canceled to the error response or raised exception
+        """
+        order_ids = [order['id'] for order in self.orders(pair, side)]
+        batch     = {"result": [], "errors": {}}
+
+        if not order_ids:
+            return batch
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(order_ids))) as executor:
+            futures = {order_id: executor.submit(self.cancel, order_id) for order_id in order_ids}
+
+        for order_id, future in futures.items():
+            try:
+                res = future.result()
+            except Exception as e:
+                batch['errors'][order_id] = e
+                continue
+
+            if res == True:
+                batch['result'].append(order_id)
+            else:
+                batch['errors'][order_id] = res
+
+        return batch
+
+    def reconcile(self):
+        """ Replaces the tracked orders with the open orders from get_all_orders. Returns the amount of open orders """
+        journal = []
+
+        with self._lock:
+            self._journals.append(journal)
+
+        try:
+            res = self.api.get_all_orders()
+        except Exception:
+            with self._lock:
+                self._journals.remove(journal)
+
+            raise
+
+        with self._lock:
+            self._journals.remove(journal)
+
+            if _is_error(res) or not 'orders' in res:
+                raise ValueError("Could not retrieve orders: " + str(res))
+
+            self._orders = {}
+            self._index  = {}
+
+            for order in res['orders']:
+                if order.get('state', 'open') in self.open_states:
+                    self._add(dict(order))
+
+            # The response may predate the changes made while waiting for it
+            for event in journal:
+                self._apply(event)
+
+            return len(self._orders)
+
+    def start_reconciling(self, interval=30):
+        """ Calls reconcile() every interval seconds on a background thread until stop() """
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.reconcile()
+                except Exception:
+                    # Keep the last known state; the next round tries again
+                    pass
+
+        self._thread = threading.Thread(target=run, name="OrderManager-reconcile", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """ Stops the background reconciliation """
+        self._stop.set()
+
+        if not self._thread is None:
+            self._thread.join()
+            self._thread = None
+
+    def get(self, order_id):
+        """ Returns the tracked order with order_id, or None """
+        with self._lock:
+            return self._orders.get(order_id)
+
+    def orders(self, pair=None, side=None):
+        """ Returns the tracked open orders, optionally only for pair and side """
+        with self._lock:
+            if pair is None and side is None:
+                return list(self._orders.values())
+
+            if not pair is None and not side is None:
+                return [self._orders[order_id] for order_id in self._index.get((pair, side), ())]
+
+            return [self._orders[order_id] for (key_pair, key_side), ids in self._index.items()
+                    if (pair is None or key_pair == pair) and (side is None or key_side == side)
+                    for order_id in ids]
+
+    def __len__(self):
+        return len(self._orders)
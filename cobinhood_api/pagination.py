@@ -0,0 +1,101 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+class PageIterator:
+    """ PageIterator:
+
+        Lazily iterates over the records of a paginated endpoint, newest first. Only the
+        current and the next page are held in memory; the next page is fetched in the
+        background while the current one is consumed.
+
+        Attributes:
+            page: the page the next records come from; pass it as start_page to resume
+            newest_timestamp: timestamp of the newest record returned; pass it as since to only get newer records later
+    """
+
+    def __init__(self, fetch, key, limit, start_page=1, since=None, timestamp_key='timestamp', prefetch=True):
+        """ Inits PageIterator
+
+            Args:
+                Required:
+                    fetch: callable taking (page, limit) and returning the result of the endpoint
+                    key: string with the key of the list of records in the result; e.g. ledger
+                    limit: amount of records per page
+                Optional:
+                    start_page: page to start at, defaults to 1
+                    since: epoch millis; iteration stops at the first record at or before this time
+                    timestamp_key: string with the key of the timestamp of a record, defaults to timestamp
+                    prefetch: whether to fetch the next page in the background, defaults to True
+        """
+        self.fetch          = fetch
+        self.key            = key
+        self.limit          = int(limit)
+        self.page           = start_page
+        self.since          = since
+        self.timestamp_key  = timestamp_key
+        self.prefetch       = prefetch
+        self.newest_timestamp = None
+
+    def _fetch(self, page):
+        res = self.fetch(page, self.limit)
+
+        if not isinstance(res, dict) or res.get('success') == False or not self.key in res:
+            raise ValueError("Could not retrieve page " + str(page) + ": " + str(res))
+
+        return res[self.key]
+
+    def __iter__(self):
+        if self.prefetch:
+            from concurrent.futures import ThreadPoolExecutor
+
+            executor = ThreadPoolExecutor(max_workers=1)
+        else:
+            executor = None
+
+        try:
+            records = self._fetch(self.page)
+
+            while True:
+                upcoming = None
+
+                if executor and len(records) >= self.limit:
+                    upcoming = executor.submit(self._fetch, self.page + 1)
+
+                for record in records:
+                    timestamp = record.get(self.timestamp_key)
+
+                    if not self.since is None and not timestamp is None and timestamp <= self.since:
+                        return
+
+                    if not timestamp is None and (self.newest_timestamp is None or timestamp > self.newest_timestamp):
+                        self.newest_timestamp = timestamp
+
+                    yield record
+
+                self.page += 1
+
+                if len(records) < self.limit:
+                    return
+
+                records = upcoming.result() if upcoming else self._fetch(self.page)
+        finally:
+            if executor:
+                executor.shutdown(wait=False)
@@ -0,0 +1,174 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import threading
+import time
+
+class TokenBucket:
+    """ TokenBucket:
+
+        Thread-safe token bucket with a priority lane. Priority callers are served
+        before any normal caller as soon as a token is available.
+
+        Attributes:
+            rate: amount of tokens added per second
+            capacity: maximum amount of tokens, i.e. the allowed burst
+    """
+
+    def __init__(self, rate, capacity=None):
+        """ Inits TokenBucket with rate tokens per second and a burst of capacity (defaults to rate) """
+        self.rate     = float(rate)
+        self.capacity = float(capacity if not capacity is None else rate)
+
+        self._tokens   = self.capacity
+        self._updated  = time.monotonic()
+        self._priority = 0
+        self._cond     = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens  = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _take(self, priority):
+        # Returns 0 if a token was taken, otherwise the seconds until the next one is due
+        self._refill()
+
+        if self._tokens >= 1 and (priority or self._priority == 0):
+            self._tokens -= 1
+            return 0
+
+        return max(1 - self._tokens, 0) / self.rate or 0.001
+
+    def acquire(self, priority=False):
+        """ Blocks until a token is available and takes it. Returns the seconds spent waiting """
+        start = time.monotonic()
+
+        with self._cond:
+            if priority:
+                self._priority += 1
+
+            try:
+                while True:
+                    wait = self._take(priority)
+
+                    if not wait:
+                        break
+
+                    # Sleep until the next token is due; priority callers wake everyone when done
+                    self._cond.wait(wait)
+            finally:
+                if priority:
+                    self._priority -= 1
+                    self._cond.notify_all()
+
+        return time.monotonic() - start
+
+    async def acquire_async(self, priority=False):
+        """ Like acquire(), but waits without blocking the event loop """
+        import asyncio
+
+        start = time.monotonic()
+
+        if priority:
+            with self._cond:
+                self._priority += 1
+
+        try:
+            while True:
+                with self._cond:
+                    wait = self._take(priority)
+
+                if not wait:
+                    break
+
+                await asyncio.sleep(wait)
+        finally:
+            if priority:
+                with self._cond:
+                    self._priority -= 1
+                    self._cond.notify_all()
+
+        return time.monotonic() - start
+
+class RateLimiter:
+    """ RateLimiter:
+
+        Keeps a separate TokenBucket for the public, private and wallet endpoints of
+        Cobinhood_API and counts how long callers waited for them.
+
+        Attributes:
+            buckets: dict mapping the endpoint group to its TokenBucket
+    """
+
+    groups = ['public', 'private', 'wallet']
+
+    def __init__(self, public=10, private=10, wallet=5, burst=None):
+        """ Inits RateLimiter
+
+            Args:
+                public: requests per second for the public endpoints, defaults to 10
+                private: requests per second for the private (trading) endpoints, defaults to 10
+                wallet: requests per second for the wallet endpoints, defaults to 5
+                burst: dict mapping a group to its burst size; defaults to one second of requests
+        """
+        burst = burst or {}
+        rates = {'public': public, 'private': private, 'wallet': wallet}
+
+        self.buckets = {group: TokenBucket(rate, burst.get(group)) for group, rate in rates.items()}
+        self._lock   = threading.Lock()
+        self._stats  = {group: {"calls": 0, "priority_calls": 0, "waits": 0, "wait_time": 0.0} for group in self.groups}
+
+    def acquire(self, group, priority=False):
+        """ Blocks until a request in group is allowed. Returns the seconds spent waiting
+
+            Args:
+                group: string with possible values: ['public', 'private', 'wallet']
+                priority: True for order traffic which should not queue behind other requests
+        """
+        waited = self.buckets[group].acquire(priority)
+        self._record(group, priority, waited)
+
+        return waited
+
+    async def acquire_async(self, group, priority=False):
+        """ Like acquire(), for AsyncCobinhood_API; waits without blocking the event loop """
+        waited = await self.buckets[group].acquire_async(priority)
+        self._record(group, priority, waited)
+
+        return waited
+
+    def _record(self, group, priority, waited):
+        with self._lock:
+            stats = self._stats[group]
+            stats['calls'] += 1
+            stats['wait_time'] += waited
+
+            if priority:
+                stats['priority_calls'] += 1
+
+            if waited > 0.001:
+                stats['waits'] += 1
+
+    def stats(self):
+        """ Returns a copy of the counters per group: calls, priority_calls, waits and wait_time in seconds """
+        with self._lock:
+            return {group: dict(stats) for group, stats in self._stats.items()}
@@ -0,0 +1,173 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+""" Record and replay the HTTP traffic of Cobinhood_API.
+
+    A recording is a JSON Lines file, gzipped if its name ends with .gz, with one exchange
+    per line: method, path, params, json, status, body, duration and t, the seconds since the
+    recording started. Headers are not recorded, so API keys don't end up in the file.
+"""
+
+import gzip
+import json
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+import requests
+
+from .cobinhood import Cobinhood_API
+
+def _open(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+
+    return open(path, mode, encoding="utf-8")
+
+def _key(method, url, params):
+    split = urlsplit(url)
+    query = split.query
+
+    if params:
+        query = "&".join("%s=%s" % item for item in sorted((params or {}).items()))
+
+    return (method.upper(), split.path, query)
+
+class RecordingSession:
+    """ RecordingSession:
+
+        Sends every request through session and appends the exchange to the recording at
+        path. Give it to Cobinhood_API(session=...); closing the API closes the file.
+
+        Attributes:
+            session: the session doing the actual requests
+            path: file the exchanges are written to
+    """
+
+    def __init__(self, path, session=None):
+        self.path    = path
+        self.session = session if not session is None else Cobinhood_API.create_session()
+
+        self._file  = _open(path, "w")
+        self._lock  = threading.Lock()
+        self._start = time.perf_counter()
+
+    def request(self, method, url, **kwargs):
+        start    = time.perf_counter()
+        response = self.session.request(method, url, **kwargs)
+        content  = response.content
+        duration = time.perf_counter() - start
+
+        entry = {
+            "t": round(start - self._start, 6),
+            "method": method,
+            "path": urlsplit(url).path,
+            "params": kwargs.get("params"),
+            "json": kwargs.get("json"),
+            "status": response.status_code,
+            "duration": round(duration, 6),
+            "body": content.decode("utf-8", "replace")
+        }
+
+        line = json.dumps(entry, separators=(",", ":"), default=str)
+
+        with self._lock:
+            self._file.write(line + "\n")
+
+        return response
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+        if hasattr(self.session, "close"):
+            self.session.close()
+
+class ReplayResponse:
+    """ The parts of a requests.Response that Cobinhood_API uses """
+
+    __slots__ = ('status_code', 'content', 'elapsed', 'url')
+
+    def __init__(self, status_code, content, elapsed, url):
+        self.status_code = status_code
+        self.content     = content
+        self.elapsed     = elapsed
+        self.url         = url
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError("%d replayed for url: %s" % (self.status_code, self.url), response=self)
+
+class ReplaySession:
+    """ ReplaySession:
+
+        Answers requests from a recording instead of the network. Requests are matched on
+        method, path and parameters, so the base url doesn't matter; repeated requests get
+        the recorded responses in order and start over when they run out.
+
+        Attributes:
+            speed: recorded durations are divided by speed, e.g. 10 to replay ten times faster;
+                   None to answer right away
+            calls: amount of requests answered
+    """
+
+    def __init__(self, path, speed=1.0):
+        self.speed = speed
+        self.calls = 0
+
+        self._entries = {}
+        self._lock    = threading.Lock()
+
+        with _open(path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+
+                entry = json.loads(line)
+                key   = _key(entry['method'], entry['path'], entry.get('params'))
+                self._entries.setdefault(key, deque()).append((entry['status'], entry['body'].encode("utf-8"), entry['duration']))
+
+    def request(self, method, url, **kwargs):
+        key = _key(method, url, kwargs.get("params"))
+
+        with self._lock:
+            entries = self._entries.get(key)
+
+            if not entries:
+                raise ValueError("No recorded response for %s %s" % (method, url))
+
+            status, content, duration = entries[0]
+            entries.rotate(-1)
+            self.calls += 1
+
+        if self.speed:
+            time.sleep(duration / self.speed)
+
+        return ReplayResponse(status, content, timedelta(seconds=duration), url)
+
+    def close(self):
+        pass
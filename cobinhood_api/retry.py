@@ -0,0 +1,202 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import random
+import sys
+import threading
+import time
+
+import requests
+
+# Sending these twice has the same effect as sending them once. Order calls are not among
+# them: a repeated cancel_order answers with an error although the first one went through,
+# and a repeated modify_order may set a size that a fill in between made stale
+idempotent_methods = frozenset(['GET', 'HEAD'])
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """ Raised instead of sending a request while the circuit of its endpoint group is open """
+
+def _aiohttp():
+    # Only AsyncCobinhood_API loads aiohttp; until then none of its errors can occur
+    return sys.modules.get("aiohttp")
+
+def is_request_error(exc):
+    """ True for errors of the transport, as opposed to e.g. a response body that could not be decoded """
+    if isinstance(exc, (requests.exceptions.RequestException, TimeoutError)):
+        return True
+
+    aiohttp = _aiohttp()
+    return not aiohttp is None and isinstance(exc, aiohttp.ClientError)
+
+def is_transient(exc):
+    """ True for connection errors, timeouts and 5xx responses """
+    if isinstance(exc, CircuitOpenError):
+        return False
+
+    if isinstance(exc, requests.exceptions.HTTPError):
+        status = getattr(exc.response, "status_code", None)
+        return not status is None and status >= 500
+
+    if isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout, TimeoutError)):
+        return True
+
+    aiohttp = _aiohttp()
+
+    if aiohttp is None:
+        return False
+
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status >= 500
+
+    return isinstance(exc, aiohttp.ClientConnectionError)
+
+def is_unsent(exc):
+    """ True if exc means the request never reached the exchange """
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+
+    aiohttp = _aiohttp()
+
+    if aiohttp is None:
+        return False
+
+    # aiohttp 3.10+ raises ConnectionTimeoutError when connecting takes too long
+    return isinstance(exc, (aiohttp.ClientConnectorError, getattr(aiohttp, "ConnectionTimeoutError", aiohttp.ClientConnectorError)))
+
+class Retry:
+    """ Retry:
+
+        When and how long to wait before sending a failed request again. GET requests are
+        retried after any transient failure; place_order, modify_order and cancel_order only if
+        the connection could not be made, because otherwise the exchange may have applied them.
+
+        Attributes:
+            total: maximum amount of retries per call
+            backoff: seconds to wait at most before the first retry; doubles every retry
+            max_backoff: upper bound of the wait in seconds
+    """
+
+    def __init__(self, total=3, backoff=0.1, max_backoff=5.0):
+        self.total       = total
+        self.backoff     = backoff
+        self.max_backoff = max_backoff
+
+    def is_retryable(self, request, exc):
+        """ True if request may be sent again after it failed with exc """
+        if not is_transient(exc):
+            return False
+
+        if request.method in idempotent_methods:
+            return True
+
+        return is_unsent(exc)
+
+    def delay(self, attempt):
+        """ Returns the seconds to wait before retry number attempt (1 based); full jitter, so clients don't retry in lockstep """
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+
+class _Circuit:
+    __slots__ = ('state', 'failures', 'opened_at', 'trial', 'opened')
+
+    def __init__(self):
+        self.state     = 'closed'
+        self.failures  = 0
+        self.opened_at = 0.0
+        self.trial     = False
+        self.opened    = 0
+
+class CircuitBreaker:
+    """ CircuitBreaker:
+
+        One circuit per endpoint group ('public', 'private' and 'wallet'). After
+        failure_threshold transient failures in a row the circuit opens and requests fail
+        right away with CircuitOpenError. After reset_timeout seconds one request is let
+        through; if it succeeds the circuit closes, otherwise it stays open.
+
+        Attributes:
+            failure_threshold: amount of failures in a row that opens the circuit
+            reset_timeout: seconds before a request is tried again
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout     = reset_timeout
+
+        self._circuits = {}
+        self._lock     = threading.Lock()
+
+    def _get(self, group):
+        circuit = self._circuits.get(group)
+
+        if circuit is None:
+            circuit = self._circuits.setdefault(group, _Circuit())
+
+        return circuit
+
+    def allow(self, group):
+        """ True if a request of group may be sent now """
+        with self._lock:
+            circuit = self._get(group)
+
+            if circuit.state == 'closed':
+                return True
+
+            if circuit.trial or time.monotonic() - circuit.opened_at < self.reset_timeout:
+                return False
+
+            circuit.state = 'half_open'
+            circuit.trial = True
+            return True
+
+    def record_success(self, group):
+        with self._lock:
+            circuit = self._get(group)
+            circuit.state    = 'closed'
+            circuit.failures = 0
+            circuit.trial    = False
+
+    def release(self, group):
+        """ Ends the trial of a half open circuit without a result, e.g. when its request was cancelled, so another request may try """
+        with self._lock:
+            self._get(group).trial = False
+
+    def record_failure(self, group):
+        with self._lock:
+            circuit = self._get(group)
+            circuit.failures += 1
+
+            if circuit.state == 'half_open' or circuit.failures >= self.failure_threshold:
+                if circuit.state != 'open':
+                    circuit.opened += 1
+
+                circuit.state     = 'open'
+                circuit.opened_at = time.monotonic()
+                circuit.trial     = False
+
+    def state(self, group):
+        """ Returns 'closed', 'open' or 'half_open' """
+        with self._lock:
+            return self._get(group).state
+
+    def stats(self):
+        """ Returns a dict per group with its state, failures in a row and how often it opened """
+        with self._lock:
+            return {group: {"state": c.state, "failures": c.failures, "opened": c.opened} for group, c in self._circuits.items()}
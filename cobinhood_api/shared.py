@@ -0,0 +1,361 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+""" Order books and tickers in shared memory, written by one process and read by many.
+
+    The region is a sequence of 8 byte words: a header (magic, layout version, amount of
+    pairs, depth), the pair names (32 bytes each) and one fixed-size record per pair:
+
+        sequence, timestamp, 6 ticker fields, bid count, ask count,
+        depth x (price, size) bids, depth x (price, size) asks
+
+    The sequence of a record is odd while it is written. Readers copy a record and retry if
+    its sequence was odd or changed in the meantime, so they never see a half-written record
+    and never block the writer.
+"""
+
+import multiprocessing
+import signal
+import threading
+import time
+from multiprocessing import shared_memory
+
+from .decoding import require_unscaled
+from .orderbook import OrderBook
+
+MAGIC          = 0x434f42484f4f44
+LAYOUT_VERSION = 1
+HEADER_WORDS   = 4
+NAME_WORDS     = 4
+
+# Ticker fields of get_ticker stored per pair, in this order
+ticker_fields = ('last_trade_price', 'highest_bid', 'lowest_ask', '24h_high', '24h_low', '24h_volume')
+
+def _attach(name):
+    try:
+        # Python 3.13+: only the creator should unlink the region when it exits
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        from multiprocessing import resource_tracker
+
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+class SharedMarketData:
+    """ SharedMarketData:
+
+        Fixed-layout region of shared memory holding the ticker and the top depth levels of
+        the order book of every pair. Create it once with create() in the writing process and
+        attach() to it by name from any other process.
+
+        Attributes:
+            name: string with the name of the shared memory region
+            pairs: tuple with the trading pairs, in record order
+            depth: amount of levels kept per side
+    """
+
+    def __init__(self, shm, owner=False):
+        self._shm   = shm
+        self._owner = owner
+        self._q     = shm.buf.cast('Q')
+        self._d     = shm.buf.cast('d')
+
+        if self._q[0] != MAGIC or self._q[1] != LAYOUT_VERSION:
+            raise ValueError("Shared memory %s does not hold market data" % shm.name)
+
+        count      = self._q[2]
+        self.depth = self._q[3]
+        self.name  = shm.name
+
+        raw = bytes(shm.buf[HEADER_WORDS * 8:(HEADER_WORDS + count * NAME_WORDS) * 8])
+        self.pairs = tuple(raw[i * NAME_WORDS * 8:(i + 1) * NAME_WORDS * 8].rstrip(b"\0").decode() for i in range(count))
+
+        self._record_words = 10 + 4 * self.depth
+        self._offsets = {pair: HEADER_WORDS + count * NAME_WORDS + index * self._record_words for index, pair in enumerate(self.pairs)}
+
+    @classmethod
+    def create(cls, pairs, depth=20, name=None):
+        """ Creates the region for pairs with depth levels per side """
+        pairs   = tuple(pairs)
+        encoded = [pair.encode() for pair in pairs]
+
+        # Checked first: a region created before raising would stay in /dev/shm
+        for pair, name_bytes in zip(pairs, encoded):
+            if len(name_bytes) > NAME_WORDS * 8:
+                raise ValueError("Pair name too long: " + pair)
+
+        words = HEADER_WORDS + len(pairs) * NAME_WORDS + len(pairs) * (10 + 4 * depth)
+        shm   = shared_memory.SharedMemory(name=name, create=True, size=words * 8)
+
+        try:
+            header = shm.buf.cast('Q')
+            header[0], header[1], header[2], header[3] = MAGIC, LAYOUT_VERSION, len(pairs), depth
+            header.release()
+
+            for index, name_bytes in enumerate(encoded):
+                start = (HEADER_WORDS + index * NAME_WORDS) * 8
+                shm.buf[start:start + len(name_bytes)] = name_bytes
+
+            return cls(shm, owner=True)
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+
+    @classmethod
+    def attach(cls, name):
+        """ Attaches to the region created under name """
+        return cls(_attach(name))
+
+    def write(self, pair, ticker=None, book=None, timestamp=None):
+        """ Writes the ticker and/or order book of pair. Only one process may write
+
+            Args:
+                Required:
+                    pair: string containing the trading pair on Cobinhood; e.g. PAY-ETH
+                Optional:
+                    ticker: dict returned by get_ticker, or its ticker
+                    book: OrderBook, or the dict returned by get_order_book
+                    timestamp: epoch millis of the data, defaults to now
+        """
+        offset = self._offsets[pair]
+        q, d   = self._q, self._d
+        depth  = self.depth
+
+        if not ticker is None:
+            ticker = ticker.get('ticker', ticker)
+            values = [float(ticker.get(field) or 0) for field in ticker_fields]
+
+        if not book is None:
+            if isinstance(book, OrderBook):
+                bids = [(level.price, level.size) for _, level in zip(range(depth), book.bids)]
+                asks = [(level.price, level.size) for _, level in zip(range(depth), book.asks)]
+            else:
+                book = book.get('orderbook', book)
+                bids = [(float(level[0]), float(level[-1])) for level in book.get('bids', [])[:depth]]
+                asks = [(float(level[0]), float(level[-1])) for level in book.get('asks', [])[:depth]]
+
+        q[offset] += 1
+
+        try:
+            d[offset + 1] = timestamp if not timestamp is None else time.time() * 1000.0
+
+            if not ticker is None:
+                for index, value in enumerate(values):
+                    d[offset + 2 + index] = value
+
+            if not book is None:
+                q[offset + 8] = len(bids)
+                q[offset + 9] = len(asks)
+
+                for index, (price, size) in enumerate(bids):
+                    d[offset + 10 + 2 * index]     = price
+                    d[offset + 10 + 2 * index + 1] = size
+
+                start = offset + 10 + 2 * depth
+
+                for index, (price, size) in enumerate(asks):
+                    d[start + 2 * index]     = price
+                    d[start + 2 * index + 1] = size
+        finally:
+            q[offset] += 1
+
+    def read(self, pair, levels=None, timeout=1.0):
+        """ Returns a consistent copy of the record of pair
+
+            Args:
+                Required:
+                    pair: string containing the trading pair on Cobinhood; e.g. PAY-ETH
+                Optional:
+                    levels: amount of levels per side to copy, defaults to depth
+                    timeout: seconds to wait for a write in progress, defaults to 1. Raises TimeoutError
+                             after that, e.g. when the writer was killed in the middle of a write
+
+            Returns:
+                dict with 'version' (0 if never written), 'timestamp', 'ticker' with the fields in
+                ticker_fields as floats, and 'bids' and 'asks' as lists of (price, size), best first
+        """
+        offset = self._offsets[pair]
+        q, d   = self._q, self._d
+        levels = self.depth if levels is None else min(levels, self.depth)
+        start  = offset + 10 + 2 * self.depth
+
+        deadline = None
+
+        while True:
+            sequence = q[offset]
+
+            if not sequence & 1:
+                timestamp = d[offset + 1]
+                ticker    = d[offset + 2:offset + 8].tolist()
+                bid_count = min(q[offset + 8], levels)
+                ask_count = min(q[offset + 9], levels)
+                bids      = d[offset + 10:offset + 10 + 2 * bid_count].tolist()
+                asks      = d[start:start + 2 * ask_count].tolist()
+
+                if q[offset] == sequence:
+                    break
+
+            # A write is in progress; a writer that died during it never finishes it
+            if deadline is None:
+                deadline = time.monotonic() + timeout
+            elif time.monotonic() > deadline:
+                raise TimeoutError("Record of %s is still being written after %s seconds; did the writer stop?" % (pair, timeout))
+            else:
+                time.sleep(0)
+
+        return {
+            "version": sequence // 2,
+            "timestamp": timestamp,
+            "ticker": dict(zip(ticker_fields, ticker)),
+            "bids": list(zip(bids[0::2], bids[1::2])),
+            "asks": list(zip(asks[0::2], asks[1::2]))
+        }
+
+    def version(self, pair):
+        """ Returns the amount of writes to pair; cheap to poll for changes """
+        return self._q[self._offsets[pair]] // 2
+
+    def close(self):
+        """ Detaches from the region; the creator also removes it """
+        self._q.release()
+        self._d.release()
+        self._shm.close()
+
+        if self._owner:
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class MarketDataPublisher:
+    """ MarketDataPublisher:
+
+        Fetches the order books and tickers of pairs with one Cobinhood_API and writes them
+        into a SharedMarketData every interval seconds, so any amount of local processes can
+        read them without making API calls of their own.
+
+        Attributes:
+            api: Cobinhood_API used for all calls
+            data: the SharedMarketData written to
+            interval: seconds between refreshes
+            errors: dict mapping the pair to the error of its last failed refresh
+    """
+
+    def __init__(self, api, pairs, depth=20, interval=1.0, name=None, max_workers=10):
+        require_unscaled(api, "MarketDataPublisher")
+
+        self.api         = api
+        self.data        = SharedMarketData.create(pairs, depth, name)
+        self.interval    = interval
+        self.max_workers = max_workers
+        self.errors      = {}
+
+        self._stop   = threading.Event()
+        self._thread = None
+
+    @property
+    def name(self):
+        return self.data.name
+
+    def refresh(self):
+        """ Fetches and publishes all books and tickers once """
+        pairs   = list(self.data.pairs)
+        books   = self.api.batch(self.api.get_order_book, pairs, self.max_workers)
+        tickers = self.api.batch(self.api.get_ticker, pairs, self.max_workers)
+
+        for pair in pairs:
+            book   = books['result'].get(pair)
+            ticker = tickers['result'].get(pair)
+
+            if not book is None or not ticker is None:
+                self.data.write(pair, ticker, book)
+
+            error = books['errors'].get(pair, tickers['errors'].get(pair))
+
+            if error is None:
+                self.errors.pop(pair, None)
+            else:
+                self.errors[pair] = error
+
+    def run(self):
+        """ Refreshes every interval seconds until stop() """
+        while not self._stop.is_set():
+            start = time.monotonic()
+
+            try:
+                self.refresh()
+            except Exception as e:
+                # Readers keep the last published data; the next round tries again
+                self.errors[None] = e
+
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - start)))
+
+    def start(self):
+        """ Runs run() on a daemon thread """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="MarketDataPublisher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+        if not self._thread is None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """ Stops publishing and removes the shared memory """
+        self.stop()
+        self.data.close()
+
+def _publish(pairs, depth, interval, name, api_options, ready):
+    from .cobinhood import Cobinhood_API
+
+    api       = Cobinhood_API(api_options.pop('api_key', ''), **api_options)
+    publisher = MarketDataPublisher(api, pairs, depth, interval, name)
+
+    # terminate() sends SIGTERM; finish the current round so the region gets removed
+    signal.signal(signal.SIGTERM, lambda *args: publisher._stop.set())
+    ready.put(publisher.name)
+
+    try:
+        publisher.run()
+    finally:
+        publisher.close()
+
+def start_publisher_process(pairs, depth=20, interval=1.0, name=None, **api_options):
+    """ Starts a MarketDataPublisher in a separate process with its own Cobinhood_API(**api_options)
+
+        Returns:
+            (process, name): terminate the process to stop publishing; attach consumers with
+            SharedMarketData.attach(name)
+    """
+    ready   = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_publish, args=(list(pairs), depth, interval, name, api_options, ready), daemon=True)
+    process.start()
+
+    return process, ready.get(timeout=30)
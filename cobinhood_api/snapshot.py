@@ -0,0 +1,219 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import threading
+import time
+
+from .decoding import require_unscaled
+from .orderbook import OrderBook
+
+kinds = ('pairs', 'stats', 'tickers', 'books')
+
+# Seconds between refreshes per kind of data
+default_intervals = {'pairs': 300, 'stats': 10, 'tickers': 5, 'books': 2}
+
+class Snapshot:
+    """ Snapshot:
+
+        An immutable view of the exchange. The engine never changes a published snapshot;
+        every refresh publishes a new one with a higher version, sharing the unchanged parts.
+
+        Attributes:
+            version: int, increased by every refresh
+            pairs: tuple with the ids of all trading pairs
+            stats: dict mapping the pair to its entry of get_trading_stats
+            tickers: dict mapping the pair to its ticker
+            books: dict mapping the pair to its OrderBook
+            updated: dict mapping the kind of data to the time.time() of its last refresh
+    """
+
+    __slots__ = ('version', 'pairs', 'stats', 'tickers', 'books', 'updated')
+
+    def __init__(self, version=0, pairs=(), stats=None, tickers=None, books=None, updated=None):
+        self.version = version
+        self.pairs   = pairs
+        self.stats   = stats if not stats is None else {}
+        self.tickers = tickers if not tickers is None else {}
+        self.books   = books if not books is None else {}
+        self.updated = updated if not updated is None else {}
+
+    def replace(self, kind, value):
+        """ Returns a copy with kind set to value and the next version """
+        fields = {'pairs': self.pairs, 'stats': self.stats, 'tickers': self.tickers, 'books': self.books}
+        fields[kind] = value
+
+        updated = dict(self.updated)
+        updated[kind] = time.time()
+
+        return Snapshot(self.version + 1, updated=updated, **fields)
+
+class SnapshotEngine:
+    """ SnapshotEngine:
+
+        Keeps a Snapshot of all trading pairs, trading stats, tickers and order books up to date
+        on background threads, one per kind of data. Readers take engine.snapshot, a plain
+        attribute, and never wait for a lock or the network; the parts of a snapshot are
+        consistent with its version.
+
+        Attributes:
+            api: Cobinhood_API used for all calls; its connection pool is shared
+            pairs: list of trading pairs to follow, or None for all pairs
+            intervals: dict with the seconds between refreshes per kind; see default_intervals
+            max_workers: maximum amount of requests in flight per refresh of tickers or books
+            snapshot: the latest Snapshot
+            errors: dict mapping the kind of data to the exception of its last failed refresh
+    """
+
+    def __init__(self, api, pairs=None, intervals=None, max_workers=10):
+        """ Inits SnapshotEngine
+
+            Args:
+                Required:
+                    api: Cobinhood_API used for all calls
+                Optional:
+                    pairs: list of trading pairs to follow; e.g. ['PAY-ETH', 'COB-BTC']; if none given then all pairs will be used
+                    intervals: dict with the seconds between refreshes per kind: 'pairs', 'stats', 'tickers' and 'books'.
+                               A kind set to None is not refreshed. Defaults to default_intervals
+                    max_workers: maximum amount of requests in flight per refresh, defaults to 10
+        """
+        require_unscaled(api, "SnapshotEngine")
+
+        self.api         = api
+        self.pairs       = pairs
+        self.intervals   = dict(default_intervals, **(intervals or {}))
+        self.max_workers = max_workers
+        self.snapshot    = Snapshot(pairs=tuple(pairs or ()))
+        self.errors      = {}
+
+        self._lock    = threading.Lock()
+        self._stop    = threading.Event()
+        self._threads = []
+
+    def _publish(self, kind, value):
+        # Writers of different kinds must not lose each other's changes; readers don't take the lock
+        with self._lock:
+            self.snapshot = self.snapshot.replace(kind, value)
+            return self.snapshot
+
+    def _pairs(self):
+        return list(self.pairs) if not self.pairs is None else list(self.snapshot.pairs)
+
+    def refresh_pairs(self):
+        if not self.pairs is None:
+            return self._publish('pairs', tuple(self.pairs))
+
+        return self._publish('pairs', tuple(self.api.get_all_pair_ids()))
+
+    def refresh_stats(self):
+        res = self.api.get_trading_stats()
+
+        if isinstance(res, dict) and res.get('success') == False:
+            raise ValueError("Could not retrieve trading stats: " + str(res))
+
+        pairs = self._pairs()
+
+        if not self.pairs is None:
+            res = {pair: res[pair] for pair in pairs if pair in res}
+
+        return self._publish('stats', res)
+
+    def refresh_tickers(self):
+        batch   = self.api.batch(self.api.get_ticker, self._pairs(), self.max_workers)
+        tickers = dict(self.snapshot.tickers)
+
+        for pair, res in batch['result'].items():
+            tickers[pair] = res.get('ticker', res)
+
+        self._record_errors('tickers', batch)
+        return self._publish('tickers', tickers)
+
+    def refresh_books(self):
+        batch = self.api.batch(self.api.get_order_book, self._pairs(), self.max_workers)
+        books = dict(self.snapshot.books)
+
+        for pair, res in batch['result'].items():
+            books[pair] = OrderBook.from_response(res, pair)
+
+        self._record_errors('books', batch)
+        return self._publish('books', books)
+
+    def _record_errors(self, kind, batch):
+        # Pairs that failed keep their previous data
+        if batch['errors']:
+            self.errors[kind] = ValueError("Refresh failed for %d pairs: %s" % (len(batch['errors']), batch['errors']))
+        else:
+            self.errors.pop(kind, None)
+
+    def refresh(self, kind):
+        """ Refreshes one kind of data: 'pairs', 'stats', 'tickers' or 'books'. Returns the new Snapshot """
+        if not kind in kinds:
+            raise ValueError("Kind value invalid")
+
+        return getattr(self, "refresh_" + kind)()
+
+    def start(self):
+        """ Loads everything once, then keeps refreshing on one daemon thread per kind until stop() """
+        self._stop.clear()
+
+        for kind in kinds:
+            if not self.intervals.get(kind) is None:
+                self._refresh_safely(kind)
+
+        for kind in kinds:
+            interval = self.intervals.get(kind)
+
+            if interval is None:
+                continue
+
+            thread = threading.Thread(target=self._run, args=(kind, interval), name="SnapshotEngine-" + kind, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        return self
+
+    def _refresh_safely(self, kind):
+        try:
+            self.refresh(kind)
+
+            if not kind in ('tickers', 'books'):
+                self.errors.pop(kind, None)
+        except Exception as e:
+            # Readers keep the last snapshot; the next round tries again
+            self.errors[kind] = e
+
+    def _run(self, kind, interval):
+        while not self._stop.wait(interval):
+            self._refresh_safely(kind)
+
+    def stop(self):
+        """ Stops all refresh threads """
+        self._stop.set()
+
+        for thread in self._threads:
+            thread.join()
+
+        self._threads = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
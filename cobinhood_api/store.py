@@ -0,0 +1,216 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import json
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id TEXT PRIMARY KEY,
+    trading_pair TEXT,
+    timestamp INTEGER,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS orders_pair_time ON orders (trading_pair, timestamp);
+CREATE INDEX IF NOT EXISTS orders_time ON orders (timestamp);
+
+CREATE TABLE IF NOT EXISTS trades (
+    id TEXT PRIMARY KEY,
+    trading_pair TEXT,
+    timestamp INTEGER,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS trades_pair_time ON trades (trading_pair, timestamp);
+CREATE INDEX IF NOT EXISTS trades_time ON trades (timestamp);
+
+CREATE TABLE IF NOT EXISTS ledger (
+    id TEXT PRIMARY KEY,
+    currency TEXT,
+    timestamp INTEGER,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS ledger_currency_time ON ledger (currency, timestamp);
+CREATE INDEX IF NOT EXISTS ledger_time ON ledger (timestamp);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT,
+    scope TEXT,
+    newest INTEGER,
+    PRIMARY KEY (name, scope)
+);
+"""
+
+class HistoryStore:
+    """ HistoryStore:
+
+        Keeps order history, trade history and ledger entries in a local SQLite database.
+        sync() only downloads records newer than the newest one seen by the previous sync
+        with the same filter; queries are answered from the database without calling the API.
+
+        Attributes:
+            api: Cobinhood_API used to sync
+            path: path of the SQLite database, or :memory:
+    """
+
+    def __init__(self, api, path="cobinhood_history.db"):
+        """ Inits HistoryStore and creates the tables if needed
+
+            Args:
+                Required:
+                    api: Cobinhood_API used to sync
+                Optional:
+                    path: path of the SQLite database, defaults to cobinhood_history.db
+        """
+        self.api  = api
+        self.path = path
+
+        self._db   = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        with self._lock, self._db:
+            self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def _newest(self, table, scope):
+        # Tracked per filter: rows stored by a sync of one pair say nothing about the other pairs
+        with self._lock:
+            row = self._db.execute("SELECT newest FROM sync_state WHERE name = ? AND scope = ?", (table, scope)).fetchone()
+
+        return None if row is None else row[0]
+
+    def _insert(self, table, rows):
+        with self._lock, self._db:
+            cursor = self._db.executemany("INSERT OR IGNORE INTO " + table + " VALUES (?, ?, ?, ?)", rows)
+            return cursor.rowcount
+
+    def _sync(self, table, scope, newest, records, row, batch_size=500):
+        added = 0
+        rows  = []
+
+        for record in records:
+            rows.append(row(record))
+
+            if not rows[-1][2] is None and (newest is None or rows[-1][2] > newest):
+                newest = rows[-1][2]
+
+            if len(rows) >= batch_size:
+                added += self._insert(table, rows)
+                rows = []
+
+        if rows:
+            added += self._insert(table, rows)
+
+        # Only after every record was stored, so an interrupted sync starts over next time
+        if not newest is None:
+            with self._lock, self._db:
+                self._db.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)", (table, scope, newest))
+
+        return added
+
+    @staticmethod
+    def _since(newest):
+        # Records sharing the newest timestamp may not all have been stored; duplicates are ignored
+        return None if newest is None else newest - 1
+
+    def sync_orders(self, pair=""):
+        """ Downloads the orders newer than the previous sync of pair, or of all pairs. Returns the amount of new orders """
+        newest  = self._newest("orders", pair)
+        records = self.api.iter_order_history(pair, since=self._since(newest))
+
+        return self._sync("orders", pair, newest, records, lambda order: (
+            order['id'], order.get('trading_pair', order.get('trading_pair_id', pair)), order.get('timestamp'), json.dumps(order, default=str)
+        ))
+
+    def sync_trades(self, pair):
+        """ Downloads the trades for pair newer than its previous sync. Returns the amount of new trades """
+        newest  = self._newest("trades", pair)
+        records = self.api.iter_trade_history(pair, since=self._since(newest))
+
+        return self._sync("trades", pair, newest, records, lambda trade: (
+            trade['id'], trade.get('trading_pair_id', pair), trade.get('timestamp'), json.dumps(trade, default=str)
+        ))
+
+    def sync_ledger(self, currency=""):
+        """ Downloads the ledger entries newer than the previous sync of currency, or of all currencies. Returns the amount of new entries """
+        newest  = self._newest("ledger", currency)
+        records = self.api.iter_ledger_entries(currency, since=self._since(newest))
+
+        return self._sync("ledger", currency, newest, records, lambda entry: (
+            self._ledger_id(entry), entry.get('currency', currency), entry.get('timestamp'), json.dumps(entry, default=str)
+        ))
+
+    @staticmethod
+    def _ledger_id(entry):
+        # Ledger entries have no id of their own
+        reference = entry.get('trade_id') or entry.get('deposit_id') or entry.get('withdrawal_id') or ""
+        return "|".join(str(part) for part in (entry.get('timestamp'), entry.get('currency'), entry.get('action'), reference, entry.get('amount'), entry.get('balance')))
+
+    def sync(self, pairs=()):
+        """ Syncs the orders, the ledger and the trades of every pair in pairs. Returns the amount of new records per table """
+        return {
+            "orders": self.sync_orders(),
+            "ledger": self.sync_ledger(),
+            "trades": sum(self.sync_trades(pair) for pair in pairs)
+        }
+
+    def _query(self, table, column, value, start_time, end_time, limit):
+        query = "SELECT data FROM " + table
+        where = []
+        args  = []
+
+        if not value is None:
+            where.append(column + " = ?")
+            args.append(value)
+
+        if not start_time is None:
+            where.append("timestamp >= ?")
+            args.append(start_time)
+
+        if not end_time is None:
+            where.append("timestamp <= ?")
+            args.append(end_time)
+
+        if where:
+            query += " WHERE " + " AND ".join(where)
+
+        query += " ORDER BY timestamp DESC"
+
+        if not limit is None:
+            query += " LIMIT ?"
+            args.append(int(limit))
+
+        with self._lock:
+            return [json.loads(row[0]) for row in self._db.execute(query, args)]
+
+    def orders(self, pair=None, start_time=None, end_time=None, limit=None):
+        """ Returns the stored orders, newest first, optionally filtered by pair and time range in epoch millis """
+        return self._query("orders", "trading_pair", pair, start_time, end_time, limit)
+
+    def trades(self, pair=None, start_time=None, end_time=None, limit=None):
+        """ Returns the stored trades, newest first, optionally filtered by pair and time range in epoch millis """
+        return self._query("trades", "trading_pair", pair, start_time, end_time, limit)
+
+    def ledger(self, currency=None, start_time=None, end_time=None, limit=None):
+        """ Returns the stored ledger entries, newest first, optionally filtered by currency and time range in epoch millis """
+        return self._query("ledger", "currency", currency, start_time, end_time, limit)
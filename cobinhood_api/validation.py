@@ -0,0 +1,132 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+from decimal import Decimal, InvalidOperation
+
+from .decoding import require_unscaled
+
+possible_sides = frozenset(['bid', 'ask'])
+possible_types = frozenset(['market', 'limit', 'stop', 'stop_limit'])
+
+def _decimal(value):
+    if value is None or value == "":
+        return None
+
+    return Decimal(str(value))
+
+class PairRules:
+    """ Order limits of one trading pair, as Decimals; None if the pair has no such limit """
+
+    __slots__ = ('pair', 'tick_size', 'lot_size', 'min_size', 'max_size')
+
+    def __init__(self, pair, tick_size=None, lot_size=None, min_size=None, max_size=None):
+        self.pair      = pair
+        self.tick_size = _decimal(tick_size)
+        self.lot_size  = _decimal(lot_size)
+        self.min_size  = _decimal(min_size)
+        self.max_size  = _decimal(max_size)
+
+    @classmethod
+    def from_trading_pair(cls, pair):
+        """ Builds PairRules from one entry of get_all_trading_pairs """
+        return cls(pair['id'], pair.get('quote_increment'), pair.get('base_increment'), pair.get('base_min_size'), pair.get('base_max_size'))
+
+class OrderValidator:
+    """ OrderValidator:
+
+        Checks orders against the limits of their trading pair before they are sent, so
+        invalid prices and sizes don't cost a round trip.
+
+        Attributes:
+            rules: dict mapping the pair to its PairRules
+    """
+
+    def __init__(self, trading_pairs):
+        """ Inits OrderValidator
+
+            Args:
+                trading_pairs: the result of get_all_trading_pairs, or its list of pairs
+        """
+        if isinstance(trading_pairs, dict):
+            if trading_pairs.get('success') == False or not 'trading_pairs' in trading_pairs:
+                raise ValueError("Could not retrieve trading pairs: " + str(trading_pairs))
+
+            trading_pairs = trading_pairs['trading_pairs']
+
+        self.rules = {pair['id']: PairRules.from_trading_pair(pair) for pair in trading_pairs}
+
+    @classmethod
+    def from_api(cls, api):
+        """ Builds an OrderValidator from api.get_all_trading_pairs() """
+        require_unscaled(api, "OrderValidator")
+        return cls(api.get_all_trading_pairs())
+
+    def check(self, pair, side, ttype, size, price=0):
+        """ Returns a list with a message for every problem with the order; empty if it is valid """
+        errors = []
+
+        if not str(side).lower() in possible_sides:
+            errors.append("Side value invalid")
+
+        if not str(ttype).lower() in possible_types:
+            errors.append("Type value invalid")
+
+        rules = self.rules.get(pair)
+
+        if rules is None:
+            errors.append("Unknown trading pair " + str(pair))
+            return errors
+
+        try:
+            size  = Decimal(str(size))
+            price = Decimal(str(price))
+        except InvalidOperation:
+            errors.append("Size or price is not a number")
+            return errors
+
+        amount = format(size, 'f')
+
+        if size <= 0:
+            errors.append("Size must be positive")
+
+        if not rules.min_size is None and size < rules.min_size:
+            errors.append("Size %s is below the minimum of %s" % (amount, format(rules.min_size, 'f')))
+
+        if not rules.max_size is None and size > rules.max_size:
+            errors.append("Size %s is above the maximum of %s" % (amount, format(rules.max_size, 'f')))
+
+        if not rules.lot_size is None and rules.lot_size > 0 and size % rules.lot_size != 0:
+            errors.append("Size %s is not a multiple of %s" % (amount, format(rules.lot_size, 'f')))
+
+        if str(ttype).lower() != 'market':
+            if price <= 0:
+                errors.append("Price must be positive")
+            elif not rules.tick_size is None and rules.tick_size > 0 and price % rules.tick_size != 0:
+                errors.append("Price %s is not a multiple of %s" % (format(price, 'f'), format(rules.tick_size, 'f')))
+
+        return errors
+
+    def validate(self, pair, side, ttype, size, price=0):
+        """ Raises ValueError if the order is invalid """
+        errors = self.check(pair, side, ttype, size, price)
+
+        if errors:
+            raise ValueError("; ".join(errors))
@@ -0,0 +1,291 @@
+# Copyright (c) 2018 Thomas Beukema, https://thomasbeukema.me/
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import aiohttp
+import asyncio
+import json
+import logging
+
+from .orderbook import OrderBook
+
+logger = logging.getLogger(__name__)
+
+def _version(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+class CobinhoodWebSocket:
+    """ CobinhoodWebSocket:
+
+        Streams market data from the Cobinhood WebSocket API. Subscriptions survive
+        reconnects: after reconnecting every channel is subscribed again and the order
+        books are rebuilt from the new snapshots.
+
+        Updates are delivered to the callback of the subscription and to the async
+        iterator of this class as (channel, type, data) tuples, where type is 's' for a
+        snapshot and 'u' for an update. For order-book channels data is the OrderBook.
+        An update whose version doesn't follow the previous one means messages were missed;
+        the channel is then subscribed again and its updates are skipped until the new
+        snapshot arrives. Exceptions raised by callbacks are logged and don't stop the client;
+        neither do messages that can't be handled, whose channel is subscribed again.
+
+        Attributes:
+            url: url of the WebSocket API
+            order_books: dict mapping the pair to its OrderBook
+    """
+
+    url = "wss://ws.cobinhood.com/v2/ws"
+
+    def __init__(self, url=None, session=None, reconnect_delay=1, max_reconnect_delay=30, ping_interval=20, queue_size=10000):
+        """ Inits CobinhoodWebSocket
+
+            Args:
+                url: string overriding the default url; e.g. ws://127.0.0.1:8080
+                session: aiohttp.ClientSession to connect with
+                reconnect_delay: seconds to wait before the first reconnect, doubled up to max_reconnect_delay
+                max_reconnect_delay: maximum seconds to wait before a reconnect, defaults to 30
+                ping_interval: seconds between pings keeping the connection alive, defaults to 20
+                queue_size: amount of updates buffered for the async iterator, the oldest are dropped when full
+        """
+        if not url is None:
+            self.url = url
+
+        self.session             = session
+        self.reconnect_delay     = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.ping_interval       = ping_interval
+        self.order_books         = {}
+
+        self._subscriptions = {}
+        self._resyncing     = set()
+        self._queue         = asyncio.Queue(queue_size)
+        self._ws            = None
+        self._closed        = False
+        self.connected      = asyncio.Event()
+
+    def _subscribe(self, message, callback):
+        channel = self._channel_id(message)
+        self._subscriptions[channel] = (message, callback)
+
+        if not self._ws is None and not self._ws.closed:
+            return asyncio.ensure_future(self._ws.send_json(message))
+
+    @staticmethod
+    def _channel_id(message):
+        parts = [message['type'], message['trading_pair_id']]
+
+        if 'precision' in message:
+            parts.append(message['precision'])
+
+        if 'timeframe' in message:
+            parts.append(message['timeframe'])
+
+        return ".".join(parts)
+
+    def subscribe_order_book(self, pair, precision="1E-7", callback=None):
+        """ Subscribes to the order book of pair, kept in order_books[pair]
+
+            Args:
+                Required:
+                    pair: string containing the trading pair on Cobinhood; e.g. PAY-ETH
+                Optional:
+                    precision: string containing the price precision of the levels; e.g. 1E-7
+                    callback: callable taking (channel, type, order_book), called after every message
+        """
+        self.order_books[pair] = OrderBook(pair)
+        return self._subscribe({"action": "subscribe", "type": "order-book", "trading_pair_id": pair, "precision": precision}, callback)
+
+    def subscribe_ticker(self, pair, callback=None):
+        """ Subscribes to the ticker of pair. callback takes (channel, type, data) """
+        return self._subscribe({"action": "subscribe", "type": "ticker", "trading_pair_id": pair}, callback)
+
+    def subscribe_trades(self, pair, callback=None):
+        """ Subscribes to the trades of pair. callback takes (channel, type, data) """
+        return self._subscribe({"action": "subscribe", "type": "trade", "trading_pair_id": pair}, callback)
+
+    def subscribe_candles(self, pair, timeframe="1m", callback=None):
+        """ Subscribes to the candles of pair. callback takes (channel, type, data)
+
+            Args:
+                timeframe: string with possible values: ['1m', '5m', '15m', '30m', '1h', '3h', '6h', '12h', '1D', '7D', '14D', '1M']
+        """
+        return self._subscribe({"action": "subscribe", "type": "candle", "trading_pair_id": pair, "timeframe": timeframe}, callback)
+
+    def _resubscribe(self, channel):
+        # Subscribing again results in a fresh snapshot
+        if channel in self._subscriptions and not self._ws is None and not self._ws.closed:
+            asyncio.ensure_future(self._ws.send_json(self._subscriptions[channel][0]))
+
+    def _receive(self, text):
+        # A bad message must not end run(); a channel it may have left out of sync is subscribed again
+        try:
+            message = json.loads(text)
+        except ValueError:
+            logger.warning("Skipping message that is not JSON: %.200r", text)
+            return
+
+        try:
+            self._handle(message)
+        except Exception:
+            header  = message.get('h') if isinstance(message, dict) else None
+            channel = header[0] if isinstance(header, list) and header and isinstance(header[0], str) else None
+
+            logger.exception("Could not handle message of %s", channel)
+
+            if channel in self._subscriptions:
+                if channel.startswith("order-book."):
+                    self._resyncing.add(channel)
+
+                self._resubscribe(channel)
+
+    def _handle(self, message):
+        header  = message.get('h', [])
+        data    = message.get('d')
+
+        if len(header) < 3:
+            return
+
+        channel, version, mtype = header[0], header[1], header[2]
+
+        if mtype == 'error':
+            # The channel is out of sync
+            self._resubscribe(channel)
+            return
+
+        if not mtype in ('s', 'u'):
+            return
+
+        subscription = self._subscriptions.get(channel)
+
+        if channel.startswith("order-book."):
+            book = self.order_books.get(channel.split(".")[1])
+
+            if book is None:
+                return
+
+            version = _version(version)
+
+            if mtype == 's':
+                self._resyncing.discard(channel)
+                book.apply_snapshot(data, version)
+            elif channel in self._resyncing:
+                return
+            elif not version is None and not book.sequence is None and version != book.sequence + 1:
+                # Updates were missed, so the book is wrong until the next snapshot
+                self._resyncing.add(channel)
+                self._resubscribe(channel)
+                return
+            else:
+                book.apply_update(data, version)
+
+            data = book
+
+        if not subscription is None and not subscription[1] is None:
+            try:
+                subscription[1](channel, mtype, data)
+            except Exception:
+                logger.exception("Callback of %s raised", channel)
+
+        if self._queue.full():
+            self._queue.get_nowait()
+
+        self._queue.put_nowait((channel, mtype, data))
+
+    async def _ping(self, ws):
+        while not ws.closed:
+            await asyncio.sleep(self.ping_interval)
+            await ws.send_json({"action": "ping"})
+
+    async def run(self):
+        """ Connects and handles messages until close() is called, reconnecting when the connection drops """
+        own_session = self.session is None
+
+        if own_session:
+            self.session = aiohttp.ClientSession()
+
+        delay = self.reconnect_delay
+
+        try:
+            while not self._closed:
+                try:
+                    async with self.session.ws_connect(self.url) as ws:
+                        self._ws = ws
+                        delay = self.reconnect_delay
+
+                        for message, callback in list(self._subscriptions.values()):
+                            await ws.send_json(message)
+
+                        self.connected.set()
+                        pinger = asyncio.ensure_future(self._ping(ws))
+
+                        try:
+                            async for msg in ws:
+                                if msg.type == aiohttp.WSMsgType.TEXT:
+                                    self._receive(msg.data)
+                                elif msg.type in (aiohttp.WSMsgType.ERROR, aiohttp.WSMsgType.CLOSED):
+                                    break
+                        finally:
+                            pinger.cancel()
+                            self.connected.clear()
+                except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+                    pass
+
+                if not self._closed:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.max_reconnect_delay)
+        finally:
+            self._ws = None
+
+            if own_session:
+                await self.session.close()
+                self.session = None
+
+            # Also when run() ends with an exception, so the async iterator doesn't wait forever
+            self._end_queue()
+
+    async def close(self):
+        """ Closes the connection and stops run() """
+        self._closed = True
+
+        if not self._ws is None:
+            await self._ws.close()
+
+        self._end_queue()
+
+    def _end_queue(self):
+        # Wakes up the async iterator
+        if self._queue.full():
+            self._queue.get_nowait()
+
+        self._queue.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        item = await self._queue.get()
+
+        if item is None:
+            raise StopAsyncIteration
+
+        return item
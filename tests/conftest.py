@@ -0,0 +1,80 @@
+import json
+import threading
+import time
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+import pytest
+
+from cobinhood_api.recording import ReplayResponse, ReplaySession
+
+def ok(result):
+    return {"success": True, "result": result}
+
+def error(code):
+    return {"success": False, "error": {"error_code": code}}
+
+class StubSession:
+    """ StubSession:
+
+        Answers the requests of Cobinhood_API from routes instead of the network, and keeps
+        every request it got. A route maps (method, path) to a body, a (status, body) tuple,
+        an exception to raise, or a callable taking the request kwargs and returning one of those.
+
+        Attributes:
+            routes: dict mapping (method, path) to the answer
+            delay: seconds every request takes
+            requests: list of (method, path, kwargs) of the requests made
+    """
+
+    def __init__(self, routes=None, delay=0):
+        self.routes   = dict(routes or {})
+        self.delay    = delay
+        self.requests = []
+
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        path = urlsplit(url).path
+
+        with self._lock:
+            self.requests.append((method, path, kwargs))
+
+        if self.delay:
+            time.sleep(self.delay)
+
+        answer = self.routes[(method, path)]
+
+        if callable(answer):
+            answer = answer(**kwargs)
+
+        if isinstance(answer, BaseException):
+            raise answer
+
+        status, body = answer if isinstance(answer, tuple) else (200, answer)
+        content      = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+
+        return ReplayResponse(status, content, timedelta(0), url)
+
+    def count(self, method, path):
+        with self._lock:
+            return sum(1 for request in self.requests if request[:2] == (method, path))
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def replay(tmp_path):
+    """ Writes exchanges to a recording and returns a ReplaySession answering from it right away """
+    def create(entries):
+        path = tmp_path / "session.jsonl"
+
+        with open(str(path), "w") as f:
+            for entry in entries:
+                entry = dict({"t": 0, "params": None, "json": None, "status": 200, "duration": 0.01}, **entry)
+                entry['body'] = json.dumps(entry['body'])
+                f.write(json.dumps(entry) + "\n")
+
+        return ReplaySession(str(path), speed=None)
+
+    return create
@@ -0,0 +1,68 @@
+import pytest
+import requests
+
+from cobinhood_api.accounts import ClientPool
+
+from conftest import StubSession, error, ok
+
+KEYS = {"main": "key-main", "sub": "key-sub", "broken": "key-broken"}
+
+def balances(headers, **kwargs):
+    key = headers['authorization']
+
+    if key == "key-broken":
+        raise requests.exceptions.ConnectionError()
+
+    if key == "key-sub":
+        return (401, error("authorization_failed"))
+
+    return ok({"balances": [{"currency": "ETH", "total": "1", "on_order": "0"}]})
+
+@pytest.fixture
+def session():
+    return StubSession({
+        ("GET", "/v1/wallet/balances"): balances,
+        ("GET", "/v1/market/tickers/COB-ETH"): ok({"ticker": {}}),
+        ("POST", "/v1/trading/orders"): ok({"order": {"id": "o1"}})
+    })
+
+def test_fan_out_reports_results_and_errors_per_account(session):
+    with ClientPool(KEYS, session=session) as pool:
+        batch = pool.get_wallet_balances()
+
+        assert list(batch['result']) == ["main"]
+        assert batch['errors']['sub'] == error("authorization_failed")
+        assert isinstance(batch['errors']['broken'], requests.exceptions.ConnectionError)
+
+        assert list(pool.get_wallet_balances(names=["main"])['result']) == ["main"]
+
+def test_accounts_share_the_session_and_the_public_limit(session):
+    pool = ClientPool(["key-main", "key-sub"], session=session, rate_limits={'public': 50, 'private': 20, 'wallet': 5})
+    main, sub = pool["key-main"], pool["key-sub"]
+
+    assert main.session is sub.session is pool.public.session is session
+    assert main.rate_limiter.buckets['public'] is sub.rate_limiter.buckets['public'] is pool.public.rate_limiter.buckets['public']
+    assert not main.rate_limiter.buckets['private'] is sub.rate_limiter.buckets['private']
+    assert not main.nonce is sub.nonce
+
+    main.place_order("COB-ETH", "bid", "limit", 1, "0.001")
+    sub.get_ticker("COB-ETH")
+
+    stats = pool.rate_limit_stats()
+    assert stats["key-main"]['private']['priority_calls'] == 1
+    assert stats["key-sub"]['public']['calls'] == 1
+
+    pool.close()
+
+def test_accounts_can_be_added_and_removed(session):
+    pool = ClientPool({}, session=session)
+
+    client = pool.add("new", "key-main")
+    assert "new" in pool and pool["new"] is client and len(pool) == 1
+    assert pool.get_wallet_balances()['result'] == {"new": {"balances": [{"currency": "ETH", "total": "1", "on_order": "0"}]}}
+
+    assert pool.remove("new") is client
+    assert list(pool) == []
+    assert pool.remove("new") is None
+
+    pool.close()
@@ -0,0 +1,77 @@
+import pytest
+
+from cobinhood_api.aggregator import CandleRing, TradeAggregator
+from cobinhood_api.cobinhood import Cobinhood_API
+from cobinhood_api.decoding import Decoder
+
+from conftest import StubSession, ok
+
+MINUTE = 60000
+
+def trade(trade_id, timestamp, price, size="1"):
+    return {"id": trade_id, "timestamp": timestamp, "maker_side": "bid", "price": price, "size": size}
+
+def test_trades_build_candles():
+    aggregator = TradeAggregator("COB-ETH", timeframes=('1m', '5m'))
+
+    aggregator.add_trades([
+        trade("t1", 10, "2"), trade("t2", 20, "3", "2"), trade("t3", 30, "1"),
+        trade("t4", MINUTE + 5, "4")
+    ])
+
+    assert aggregator.candles('1m') == [
+        {"timestamp": 0, "open": 2.0, "high": 3.0, "low": 1.0, "close": 1.0, "volume": 4.0, "trades": 3},
+        {"timestamp": MINUTE, "open": 4.0, "high": 4.0, "low": 4.0, "close": 4.0, "volume": 1.0, "trades": 1}
+    ]
+    assert aggregator.latest('5m')['volume'] == 5.0
+    assert aggregator.candles('1m', limit=1)[0]['timestamp'] == MINUTE
+
+def test_late_trades_set_open_and_close_by_time():
+    aggregator = TradeAggregator("COB-ETH", timeframes=('1m',))
+
+    aggregator.add_trades([trade("t2", 20, "3"), trade("t3", 30, "4"), trade("t1", 10, "2")])
+
+    candle = aggregator.latest('1m')
+    assert (candle['open'], candle['close']) == (2.0, 4.0)
+
+def test_overlapping_polls_are_counted_once():
+    trades  = [ok({"trades": [trade("t1", 10, "2"), trade("t2", 20, "3")]}), ok({"trades": [trade("t2", 20, "3"), trade("t3", 30, "4")]})]
+    session = StubSession({("GET", "/v1/market/trades/COB-ETH"): lambda **kwargs: trades.pop(0)})
+    api     = Cobinhood_API("key", session=session)
+
+    aggregator = TradeAggregator("COB-ETH", timeframes=('1m',))
+
+    assert aggregator.poll(api) == 2
+    assert aggregator.poll(api) == 1
+    assert aggregator.latest('1m')['trades'] == 3
+
+def test_websocket_trades_are_added():
+    aggregator = TradeAggregator("COB-ETH", timeframes=('1m',), dedupe_size=1)
+
+    aggregator.on_message("trade.COB-ETH", "u", [["t1", "10", "bid", "2", "1"], ["t2", "20", "ask", "3", "1"]])
+    aggregator.on_message("trade.COB-ETH", "u", None)
+
+    assert aggregator.latest('1m')['trades'] == 2
+
+    # Only the newest id is remembered
+    assert aggregator.add_trade(["t1", "30", "bid", "2", "1"]) == True
+    assert aggregator.add_trade(["t1", "30", "bid", "2", "1"]) == False
+
+def test_ring_keeps_the_newest_candles():
+    ring = CandleRing('1m', capacity=2)
+
+    for minute in range(3):
+        assert ring.add(minute * MINUTE, 1.0, 1.0)
+
+    assert [candle['timestamp'] for candle in ring.candles()] == [MINUTE, 2 * MINUTE]
+    assert ring.add(0, 1.0, 1.0) == False
+
+def test_errors_and_scaled_decoders_are_rejected():
+    with pytest.raises(ValueError):
+        TradeAggregator("COB-ETH").add_trades({"success": False, "error": {"error_code": "internal_error"}})
+
+    with pytest.raises(ValueError):
+        TradeAggregator("COB-ETH", timeframes=('2m',))
+
+    with pytest.raises(ValueError):
+        TradeAggregator("COB-ETH").poll(Cobinhood_API("key", session=StubSession(), decoder=Decoder(numbers="scaled")))
@@ -0,0 +1,146 @@
+import asyncio
+import json
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from cobinhood_api.async_cobinhood import AsyncCobinhood_API
+from cobinhood_api.cache import ResponseCache
+from cobinhood_api.decoding import Decoder
+from cobinhood_api.ratelimit import RateLimiter
+from cobinhood_api.retry import Retry
+
+from conftest import error, ok
+
+class FakeAPI:
+    """ Local HTTP server answering AsyncCobinhood_API from routes like StubSession """
+
+    def __init__(self, routes, delay=0):
+        self.routes   = routes
+        self.delay    = delay
+        self.requests = []
+
+    async def handle(self, request):
+        self.requests.append((request.method, request.path, request.headers.copy()))
+
+        if self.delay:
+            await asyncio.sleep(self.delay)
+
+        answer = self.routes[(request.method, request.path)]
+
+        if callable(answer):
+            answer = answer()
+
+        status, body = answer if isinstance(answer, tuple) else (200, answer)
+        return web.Response(status=status, body=body if isinstance(body, bytes) else json.dumps(body).encode("utf-8"), content_type="application/json")
+
+    def count(self, method, path):
+        return sum(1 for request in self.requests if request[:2] == (method, path))
+
+def run(fake, test, **options):
+    """ Serves fake and runs test(api) against it """
+    async def main():
+        app = web.Application()
+        app.router.add_route("*", "/{path:.*}", fake.handle)
+
+        runner = web.AppRunner(app)
+        await runner.setup()
+
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+
+        host, port = runner.addresses[0][:2]
+
+        try:
+            async with AsyncCobinhood_API("key", base_url="http://%s:%d" % (host, port), **options) as api:
+                await test(api)
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(main())
+
+def answers(*items):
+    items = list(items)
+    return lambda: items.pop(0) if len(items) > 1 else items[0]
+
+def test_results_and_error_responses():
+    fake = FakeAPI({
+        ("GET", "/v1/market/orderbooks/COB-ETH"): ok({"orderbook": {"bids": [["0.001", "1", "5"]], "asks": []}}),
+        ("GET", "/v1/trading/orders/o1"): (404, error("order_not_found")),
+        ("GET", "/v1/system/time"): (502, b"<html>Bad Gateway</html>")
+    })
+
+    async def test(api):
+        assert (await api.get_order_book("COB-ETH"))['orderbook']['bids'] == [[0.001, 1, 5.0]]
+        assert await api.get_order("o1") == error("order_not_found")
+
+        with pytest.raises(aiohttp.ClientResponseError):
+            await api.get_system_time()
+
+    run(fake, test, decoder=Decoder(numbers="float"))
+
+def test_concurrent_misses_are_collapsed():
+    fake  = FakeAPI({("GET", "/v1/market/trading_pairs"): ok({"trading_pairs": [{"id": "COB-ETH"}]})}, delay=0.05)
+    cache = ResponseCache()
+
+    async def test(api):
+        results = await asyncio.gather(*[api.get_all_trading_pairs() for _ in range(10)])
+
+        assert all(result == {"trading_pairs": [{"id": "COB-ETH"}]} for result in results)
+        assert fake.count("GET", "/v1/market/trading_pairs") == 1
+
+    run(fake, test, cache=cache)
+
+    assert cache.stats()['misses'] == 1
+
+def test_orders_carry_increasing_nonces():
+    fake = FakeAPI({
+        ("GET", "/v1/trading/orders"): ok({"orders": []}),
+        ("POST", "/v1/trading/orders"): ok({"order": {"id": "o1"}}),
+        ("DELETE", "/v1/trading/orders/o1"): ok({})
+    })
+
+    async def test(api):
+        await api.get_all_orders()
+        await asyncio.gather(api.place_order("COB-ETH", "bid", "limit", 1, "0.001"), api.place_order("COB-ETH", "ask", "limit", 1, "0.002"))
+        assert await api.cancel_order("o1") == True
+
+    run(fake, test)
+
+    private = fake.requests[0][2]
+    assert private['authorization'] == "key" and not 'nonce' in private
+
+    nonces = [int(headers['nonce']) for method, path, headers in fake.requests[1:]]
+    assert len(set(nonces)) == 3 and nonces[2] == max(nonces)
+
+def test_server_errors_are_retried_only_for_reads():
+    fake = FakeAPI({
+        ("GET", "/v1/system/time"): answers((503, b"unavailable"), ok({"time": 1})),
+        ("POST", "/v1/trading/orders"): answers((503, b"unavailable"), ok({"order": {"id": "o1"}}))
+    })
+
+    async def test(api):
+        assert await api.get_system_time() == {"time": 1}
+
+        with pytest.raises(aiohttp.ClientResponseError):
+            await api.place_order("COB-ETH", "bid", "limit", 1, "0.001")
+
+    run(fake, test, retry=Retry(total=3, backoff=0))
+
+    assert fake.count("GET", "/v1/system/time") == 2
+    assert fake.count("POST", "/v1/trading/orders") == 1
+
+def test_orders_take_the_priority_lane():
+    fake    = FakeAPI({("GET", "/v1/system/time"): ok({"time": 1}), ("POST", "/v1/trading/orders"): ok({"order": {"id": "o1"}})})
+    limiter = RateLimiter(public=100, private=100)
+
+    async def test(api):
+        await api.get_system_time()
+        await api.place_order("COB-ETH", "bid", "limit", 1, "0.001")
+
+    run(fake, test, rate_limiter=limiter)
+
+    stats = limiter.stats()
+    assert (stats['public']['calls'], stats['public']['priority_calls']) == (1, 0)
+    assert (stats['private']['calls'], stats['private']['priority_calls']) == (1, 1)
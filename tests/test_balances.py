@@ -0,0 +1,138 @@
+from decimal import Decimal
+
+import pytest
+
+from cobinhood_api.balances import BalanceTracker
+from cobinhood_api.cobinhood import Cobinhood_API
+from cobinhood_api.decoding import Decoder
+
+from conftest import StubSession, ok
+
+class Exchange:
+    """ Wallet balances, open orders and trades per order served to a Cobinhood_API """
+
+    def __init__(self):
+        self.balances = {"ETH": ("10", "0"), "BTC": ("1", "0")}
+        self.orders   = []
+        self.trades   = {}
+        self.placed   = 0
+        self.waiting  = None
+
+        self.session = StubSession({
+            ("GET", "/v1/wallet/balances"): self.get_balances,
+            ("GET", "/v1/trading/orders"): lambda **kwargs: ok({"orders": list(self.orders)}),
+            ("POST", "/v1/trading/orders"): self.place,
+            ("DELETE", "/v1/trading/orders/o1"): ok({}),
+            ("GET", "/v1/trading/orders/o1/trades"): lambda **kwargs: ok({"trades": self.trades.get("o1", [])})
+        })
+
+    def get_balances(self, **kwargs):
+        res = ok({"balances": [{"currency": c, "total": t, "on_order": o} for c, (t, o) in self.balances.items()]})
+
+        # Runs while reconcile() waits for the exchange
+        if not self.waiting is None:
+            waiting, self.waiting = self.waiting, None
+            waiting()
+
+        return res
+
+    def place(self, json, **kwargs):
+        self.placed += 1
+        state = "filled" if json['type'] == "market" else "open"
+
+        return ok({"order": {"id": "o%d" % self.placed, "trading_pair": json['trading_pair_id'], "side": json['side'],
+                             "price": json.get('price', "0"), "size": json['size'], "filled": "0", "state": state}})
+
+@pytest.fixture
+def exchange():
+    return Exchange()
+
+@pytest.fixture
+def tracker(exchange):
+    return BalanceTracker(Cobinhood_API("key", session=exchange.session))
+
+def trade(trade_id, price, size, timestamp=1):
+    return {"id": trade_id, "price": price, "size": size, "maker_side": "bid", "timestamp": timestamp}
+
+def test_orders_hold_and_release_funds(tracker):
+    tracker.place_order("ETH-BTC", "ask", "limit", 4, "0.05")
+
+    assert tracker.available("ETH") == Decimal("6")
+    assert tracker.can_afford("ETH-BTC", "ask", 6) and not tracker.can_afford("ETH-BTC", "ask", 7)
+
+    tracker.cancel_order("o1")
+    assert tracker.available("ETH") == Decimal("10")
+
+def test_fills_move_totals_once(exchange, tracker):
+    tracker.place_order("ETH-BTC", "ask", "limit", 4, "0.05")
+    exchange.trades["o1"] = [trade("t1", "0.05", "1"), trade("t2", "0.05", "3", 2)]
+
+    assert tracker.sync_fills("o1") == 2
+    assert tracker.sync_fills("o1") == 0
+    assert tracker.total("ETH") == Decimal("6")
+    assert tracker.total("BTC") == Decimal("1.2")
+    assert tracker.on_order("ETH") == 0
+
+def test_fills_are_not_counted_again_after_reconcile(exchange, tracker):
+    tracker.place_order("ETH-BTC", "ask", "limit", 4, "0.05")
+    exchange.trades["o1"] = [trade("t1", "0.05", "4")]
+    tracker.sync_fills("o1")
+
+    exchange.balances = {"ETH": ("6", "0"), "BTC": ("1.2", "0")}
+    tracker.reconcile()
+
+    assert tracker.sync_fills("o1") == 0
+    assert tracker.total("ETH") == Decimal("6")
+
+def test_filled_size_of_open_orders_is_not_counted_again(exchange, tracker):
+    exchange.orders   = [{"id": "o1", "trading_pair": "ETH-BTC", "side": "ask", "price": "0.05", "size": "4", "filled": "1", "state": "partially_filled"}]
+    exchange.balances = {"ETH": ("9", "3"), "BTC": ("1.05", "0")}
+    tracker.reconcile()
+
+    exchange.trades["o1"] = [trade("t1", "0.05", "1"), trade("t2", "0.05", "3", 2)]
+    tracker.sync_fills("o1")
+
+    assert tracker.total("ETH") == Decimal("6")
+    assert tracker.total("BTC") == Decimal("1.2")
+    assert tracker.on_order("ETH") == 0
+
+def test_market_orders_and_fills_after_cancel_move_totals(exchange, tracker):
+    tracker.place_order("ETH-BTC", "bid", "market", 1)
+    exchange.trades["o1"] = [trade("t1", "0.05", "1")]
+    tracker.sync_fills("o1")
+
+    assert tracker.total("ETH") == Decimal("11")
+    assert tracker.total("BTC") == Decimal("0.95")
+
+    tracker.record_order({"id": "o2", "trading_pair": "ETH-BTC", "side": "ask", "price": "0.06", "size": "1", "filled": "0", "state": "open"})
+    tracker.record_cancel("o2")
+    tracker.record_fills("o2", [trade("t2", "0.06", "0.5")])
+
+    assert tracker.total("ETH") == Decimal("10.5")
+    assert tracker.on_order("ETH") == 0
+
+def test_reconcile_forgets_closed_orders(exchange):
+    tracker = BalanceTracker(Cobinhood_API("key", session=exchange.session), settled_size=2)
+
+    for _ in range(3):
+        tracker.place_order("ETH-BTC", "ask", "limit", 1, "0.05")
+
+    exchange.orders = [{"id": "o3", "trading_pair": "ETH-BTC", "side": "ask", "price": "0.05", "size": "1", "filled": "0", "state": "open"}]
+    exchange.trades["o1"] = [trade("t1", "0.05", "1")]
+    tracker.reconcile()
+
+    assert sorted(tracker._fills) == ["o3"]
+    assert tracker.sync_fills("o1") == 0
+    assert tracker.record_fills("o1", [trade("t1", "0.05", "1")], "ETH-BTC", "ask") == 0
+    assert tracker.total("ETH") == Decimal("10")
+    assert len(tracker._settled) == 2
+
+def test_orders_placed_during_reconcile_are_kept(exchange, tracker):
+    exchange.waiting = lambda: tracker.place_order("ETH-BTC", "ask", "limit", 2, "0.07")
+    tracker.reconcile()
+
+    assert tracker.on_order("ETH") == Decimal("2")
+
+def test_scaled_decoder_is_rejected():
+    with pytest.raises(ValueError):
+        BalanceTracker(Cobinhood_API("key", session=StubSession(), decoder=Decoder(numbers="scaled")), reconcile=False)
@@ -0,0 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cobinhood_api.cache import ResponseCache
+from cobinhood_api.cobinhood import Cobinhood_API
+
+from conftest import StubSession, ok
+
+PAIRS = ok({"trading_pairs": [{"id": "COB-ETH"}]})
+
+def test_concurrent_misses_are_collapsed():
+    session = StubSession({("GET", "/v1/market/trading_pairs"): PAIRS}, delay=0.05)
+    cache   = ResponseCache()
+    api     = Cobinhood_API("key", session=session, cache=cache)
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        results = list(executor.map(lambda _: api.get_all_trading_pairs(), range(10)))
+
+    assert all(result == PAIRS['result'] for result in results)
+    assert session.count("GET", "/v1/market/trading_pairs") == 1
+    assert cache.stats()['misses'] == 1
+
+def test_hits_until_invalidated():
+    session = StubSession({("GET", "/v1/market/trading_pairs"): PAIRS})
+    cache   = ResponseCache()
+    api     = Cobinhood_API("key", session=session, cache=cache)
+
+    api.get_all_trading_pairs()
+    api.get_all_trading_pairs()
+    assert session.count("GET", "/v1/market/trading_pairs") == 1
+
+    cache.invalidate("all_trading_pairs")
+    api.get_all_trading_pairs()
+    assert session.count("GET", "/v1/market/trading_pairs") == 2
+
+def test_endpoints_without_ttl_are_not_cached():
+    session = StubSession({("GET", "/v1/trading/orders"): ok({"orders": []})})
+    api     = Cobinhood_API("key", session=session, cache=ResponseCache())
+
+    api.get_all_orders()
+    api.get_all_orders()
+
+    assert session.count("GET", "/v1/trading/orders") == 2
+
+def test_errors_are_not_cached():
+    answers = [{"success": False, "error": {"error_code": "internal_error"}}, PAIRS]
+    session = StubSession({("GET", "/v1/market/trading_pairs"): lambda **kwargs: answers.pop(0)})
+    api     = Cobinhood_API("key", session=session, cache=ResponseCache())
+
+    assert api.get_all_trading_pairs()['success'] == False
+    assert api.get_all_trading_pairs() == PAIRS['result']
+
+def test_interrupted_fetch_is_not_cached():
+    cache = ResponseCache()
+
+    def interrupted():
+        raise KeyboardInterrupt()
+
+    with pytest.raises(KeyboardInterrupt):
+        cache.get("currency_info", interrupted)
+
+    assert cache.get("currency_info", lambda: {"currencies": []}) == {"currencies": []}
+    assert cache.stats()['hits'] == 0
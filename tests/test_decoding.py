@@ -0,0 +1,53 @@
+from decimal import Decimal
+
+import pytest
+
+from cobinhood_api.cobinhood import Cobinhood_API
+from cobinhood_api.decoding import Decoder
+
+from conftest import error, ok
+
+BOOK = ok({"orderbook": {"sequence": 1, "bids": [["0.0011", "2", "150.5"]], "asks": []}})
+TICKER = ok({"ticker": {"trading_pair_id": "COB-ETH", "last_trade_price": "0.00105", "timestamp": 1}})
+
+@pytest.fixture
+def session(replay):
+    return replay([
+        {"method": "GET", "path": "/v1/market/orderbooks/COB-ETH", "body": BOOK},
+        {"method": "GET", "path": "/v1/market/tickers/COB-ETH", "body": TICKER},
+        {"method": "GET", "path": "/v1/trading/orders/o1", "body": error("order_not_found"), "status": 404}
+    ])
+
+@pytest.mark.parametrize("numbers, level", [
+    ("string", ["0.0011", "2", "150.5"]),
+    ("decimal", [Decimal("0.0011"), 2, Decimal("150.5")]),
+    ("float", [0.0011, 2, 150.5]),
+    ("scaled", [110000, 2, 15050000000])
+])
+def test_number_modes(session, numbers, level):
+    api = Cobinhood_API("key", session=session, decoder=Decoder(numbers=numbers))
+
+    assert api.get_order_book("COB-ETH")['orderbook']['bids'] == [level]
+
+    ticker = api.get_ticker("COB-ETH")['ticker']
+    assert type(ticker['last_trade_price']) is type(level[0])
+    assert ticker['trading_pair_id'] == "COB-ETH"
+
+def test_error_responses_are_left_alone(session):
+    api = Cobinhood_API("key", session=session, decoder=Decoder(numbers="decimal"))
+
+    assert api.get_order("o1") == error("order_not_found")
+
+def test_json_backend_decodes_bytes_and_strings():
+    decoder = Decoder(backend="json", numbers="float")
+
+    assert decoder.backend == "json"
+    assert decoder(b'{"success": true, "result": {"price": "1.5", "id": "7"}}') == ok({"price": 1.5, "id": "7"})
+    assert decoder('{"success": true, "result": [{"size": "x"}]}') == ok([{"size": "x"}])
+
+def test_invalid_options_are_rejected():
+    with pytest.raises(ValueError):
+        Decoder(backend="simplejson")
+
+    with pytest.raises(ValueError):
+        Decoder(numbers="int")
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from benchmarks import mock_server
+from cobinhood_api.async_cobinhood import AsyncCobinhood_API
+from cobinhood_api.cobinhood import Cobinhood_API
+from cobinhood_api.metrics import Metrics
+
+from conftest import StubSession, ok
+
+@pytest.fixture
+def base_url():
+    server, url = mock_server.start_in_thread(depth=5, items=5)
+    yield url
+    server.shutdown()
+    server.server_close()
+
+def test_sync_client_tells_new_from_reused_connections(base_url):
+    metrics = Metrics()
+    api     = Cobinhood_API("key", base_url=base_url, metrics=metrics)
+
+    for _ in range(3):
+        api.get_system_time()
+
+    api.close()
+    stats = metrics.stats()['system_time']
+
+    assert (stats['new_connections'], stats['reused_connections']) == (1, 2)
+    assert stats['connect']['count'] == 1
+    assert stats['server']['count'] == 3
+
+def test_async_client_times_dns_and_connect(base_url):
+    metrics = Metrics()
+
+    async def main():
+        async with AsyncCobinhood_API("key", base_url=base_url.replace("127.0.0.1", "localhost"), metrics=metrics) as api:
+            for _ in range(3):
+                await api.get_system_time()
+
+    asyncio.run(main())
+    stats = metrics.stats()['system_time']
+
+    assert (stats['new_connections'], stats['reused_connections']) == (1, 2)
+    assert stats['dns']['count'] == 1
+    assert stats['connect']['count'] == 1
+
+def test_other_sessions_are_not_counted():
+    metrics = Metrics()
+    api     = Cobinhood_API("key", session=StubSession({("GET", "/v1/system/time"): ok({"time": 1})}), metrics=metrics)
+
+    api.get_system_time()
+    stats = metrics.stats()['system_time']
+
+    assert (stats['new_connections'], stats['reused_connections']) == (0, 0)
+    assert stats['server']['count'] == 1
+    assert "cobinhood_new_connections_total" in metrics.to_prometheus()
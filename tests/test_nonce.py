@@ -0,0 +1,64 @@
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cobinhood_api.cobinhood import Cobinhood_API
+from cobinhood_api.nonce import FileNonceGenerator, NonceGenerator, fcntl
+
+from conftest import StubSession, ok
+
+def test_nonces_are_unique_across_threads():
+    nonce = NonceGenerator()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        nonces = list(executor.map(lambda _: nonce.next(), range(2000)))
+
+    assert len(set(nonces)) == len(nonces)
+
+def test_nonces_increase_when_the_offset_moves_back():
+    nonce = NonceGenerator()
+    first = nonce.next()
+
+    nonce.offset = -60000
+    assert nonce.next() > first
+
+def test_sync_sets_the_offset_from_the_server_clock():
+    session = StubSession({("GET", "/v1/system/time"): lambda **kwargs: ok({"time": int(time.time() * 1000) + 5000})})
+    nonce   = NonceGenerator()
+
+    assert 4000 < nonce.sync(Cobinhood_API("key", session=session)) <= 5000
+
+    with pytest.raises(ValueError):
+        NonceGenerator().sync(Cobinhood_API("key", session=StubSession({("GET", "/v1/system/time"): ok({})})))
+
+def _take(path, amount, results):
+    nonce = FileNonceGenerator(path)
+    results.put([nonce.next() for _ in range(amount)])
+
+@pytest.mark.skipif(fcntl is None, reason="requires fcntl")
+def test_file_nonces_are_unique_across_processes_and_threads(tmp_path):
+    path    = str(tmp_path / "nonce")
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+
+    processes = [context.Process(target=_take, args=(path, 200, results)) for _ in range(3)]
+
+    for process in processes:
+        process.start()
+
+    local = FileNonceGenerator(path)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        nonces = list(executor.map(lambda _: local.next(), range(200)))
+
+    for _ in processes:
+        nonces.extend(results.get(timeout=30))
+
+    for process in processes:
+        process.join()
+
+    assert len(nonces) == 800
+    assert len(set(nonces)) == len(nonces)
+    assert int(open(path).read()) == max(nonces)
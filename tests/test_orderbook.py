@@ -0,0 +1,82 @@
+import asyncio
+import logging
+
+from cobinhood_api.orderbook import OrderBook
+from cobinhood_api.websocket import CobinhoodWebSocket
+
+CHANNEL = "order-book.COB-ETH.1E-7"
+
+def levels(side):
+    return [(level.price, level.count, level.size) for level in side]
+
+def test_from_response_sorts_both_sides():
+    book = OrderBook.from_response({"orderbook": {"sequence": 5, "bids": [["0.9", "1", "2"], ["1.0", "1", "1"]], "asks": [["1.2", "1", "4"], ["1.1", "2", "3"]]}})
+
+    assert book.best_bid() == 1.0
+    assert book.best_ask() == 1.1
+    assert round(book.spread(), 8) == 0.1
+    assert book.sequence == 5
+
+def test_updates_add_to_levels_and_remove_empty_ones():
+    book = OrderBook.from_response({"bids": [["1.0", "1", "1"]], "asks": [["1.1", "1", "1"]]})
+
+    book.apply_update({"bids": [["1.0", "-1", "-1"], ["0.9", "1", "2"]], "asks": [["1.1", "1", "2"]]}, 6)
+
+    assert levels(book.bids) == [(0.9, 1, 2.0)]
+    assert levels(book.asks) == [(1.1, 2, 3.0)]
+    assert book.sequence == 6
+
+class FakeConnection:
+    closed = False
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_json(self, message):
+        self.sent.append(message)
+
+def test_websocket_resubscribes_after_a_version_gap():
+    async def main():
+        ws = CobinhoodWebSocket()
+        ws._ws = FakeConnection()
+        seen = []
+
+        ws.subscribe_order_book("COB-ETH", callback=lambda channel, mtype, book: seen.append(mtype))
+        await asyncio.sleep(0)
+        ws._ws.sent.clear()
+
+        ws._handle({"h": [CHANNEL, "1", "s"], "d": {"bids": [["10", "1", "1"]], "asks": []}})
+        ws._handle({"h": [CHANNEL, "2", "u"], "d": {"bids": [["9", "1", "1"]], "asks": []}})
+        ws._handle({"h": [CHANNEL, "5", "u"], "d": {"bids": [["8", "1", "1"]], "asks": []}})
+        ws._handle({"h": [CHANNEL, "6", "u"], "d": {"bids": [["7", "1", "1"]], "asks": []}})
+        await asyncio.sleep(0)
+
+        book = ws.order_books["COB-ETH"]
+        assert [level.price for level in book.bids] == [10.0, 9.0]
+        assert ws._ws.sent[0]['trading_pair_id'] == "COB-ETH"
+
+        ws._handle({"h": [CHANNEL, "7", "s"], "d": {"bids": [["8", "1", "1"]], "asks": []}})
+        ws._handle({"h": [CHANNEL, "8", "u"], "d": {"bids": [["7", "1", "1"]], "asks": []}})
+
+        assert [level.price for level in book.bids] == [8.0, 7.0]
+        assert seen == ['s', 'u', 's', 'u']
+
+    asyncio.run(main())
+
+def test_websocket_callback_errors_are_logged(caplog):
+    async def main():
+        ws = CobinhoodWebSocket()
+
+        def callback(channel, mtype, data):
+            raise RuntimeError("strategy bug")
+
+        ws.subscribe_ticker("COB-ETH", callback=callback)
+
+        with caplog.at_level(logging.ERROR, logger="cobinhood_api.websocket"):
+            ws._handle({"h": ["ticker.COB-ETH", "1", "u"], "d": ["1"]})
+
+        assert ws._queue.get_nowait() == ("ticker.COB-ETH", "u", ["1"])
+
+    asyncio.run(main())
+
+    assert "ticker.COB-ETH" in caplog.text
@@ -0,0 +1,61 @@
+import pytest
+
+from cobinhood_api.cobinhood import Cobinhood_API
+from cobinhood_api.orders import OrderManager
+
+from conftest import StubSession, ok, error
+
+def order(order_id, pair="COB-ETH", side="bid", state="open"):
+    return {"id": order_id, "trading_pair": pair, "side": side, "price": "0.001", "size": "100", "filled": "0", "state": state}
+
+@pytest.fixture
+def session():
+    return StubSession({
+        ("GET", "/v1/trading/orders"): ok({"orders": [order("o1"), order("o2", side="ask"), order("o3", state="filled")]}),
+        ("POST", "/v1/trading/orders"): ok({"order": order("o4", pair="ETH-BTC")}),
+        ("PUT", "/v1/trading/orders/o1"): ok({}),
+        ("DELETE", "/v1/trading/orders/o1"): ok({}),
+        ("DELETE", "/v1/trading/orders/o2"): (400, error("invalid_order_state"))
+    })
+
+@pytest.fixture
+def manager(session):
+    return OrderManager(Cobinhood_API("key", session=session))
+
+def ids(orders):
+    return sorted(order['id'] for order in orders)
+
+def test_reconcile_tracks_open_orders(manager):
+    assert ids(manager.orders()) == ["o1", "o2"]
+    assert ids(manager.orders("COB-ETH", "ask")) == ["o2"]
+
+def test_place_modify_cancel(manager):
+    manager.place("ETH-BTC", "bid", "limit", 100, "0.001")
+    assert ids(manager.orders("ETH-BTC")) == ["o4"]
+
+    assert manager.modify("o1", "0.002", "50") == True
+    assert manager.get("o1")['price'] == "0.002"
+
+    assert manager.cancel("o1") == True
+    assert ids(manager.orders()) == ["o2", "o4"]
+
+def test_cancel_all_reports_errors(manager):
+    batch = manager.cancel_all("COB-ETH")
+
+    assert batch['result'] == ["o1"]
+    assert batch['errors']['o2']['success'] == False
+    assert ids(manager.orders()) == ["o2"]
+
+def test_changes_during_reconcile_are_kept(session, manager):
+    listed = session.routes[("GET", "/v1/trading/orders")]
+
+    def list_orders(**kwargs):
+        # The exchange lists its orders before these calls reach it
+        manager.place("ETH-BTC", "bid", "limit", 100, "0.001")
+        manager.cancel("o1")
+        return listed
+
+    session.routes[("GET", "/v1/trading/orders")] = list_orders
+    manager.reconcile()
+
+    assert ids(manager.orders()) == ["o2", "o4"]
@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+from cobinhood_api.cobinhood import Cobinhood_API
+from cobinhood_api.pagination import PageIterator
+
+from conftest import StubSession, ok
+
+class Ledger:
+    """ Ledger entries served newest first, in pages """
+
+    def __init__(self, count):
+        self.entries = [{"id": "e%d" % i, "timestamp": 1000 + i} for i in reversed(range(count))]
+        self.session = StubSession({("GET", "/v1/wallet/ledger"): self.page})
+
+    def page(self, params, **kwargs):
+        limit = int(params['limit'])
+        start = (int(params['page']) - 1) * limit
+
+        return ok({"ledger": self.entries[start:start + limit]})
+
+    def pages(self):
+        return [int(request[2]['params']['page']) for request in self.session.requests]
+
+def test_iterates_over_all_pages():
+    ledger = Ledger(25)
+    api    = Cobinhood_API("key", session=ledger.session)
+
+    assert [entry['id'] for entry in api.iter_ledger_entries(limit=10)] == ["e%d" % i for i in reversed(range(25))]
+    assert ledger.pages() == [1, 2, 3]
+
+def test_next_page_is_fetched_while_the_current_one_is_consumed():
+    fetched = threading.Event()
+
+    def fetch(page, limit):
+        if page == 2:
+            fetched.set()
+
+        return {"records": [{"timestamp": 100 - page}] if page < 3 else []}
+
+    records = iter(PageIterator(fetch, "records", 1))
+    next(records)
+
+    assert fetched.wait(5)
+
+def test_no_prefetch_fetches_on_demand():
+    pages = []
+
+    def fetch(page, limit):
+        pages.append(page)
+        return {"records": [{"timestamp": 100 - page}]}
+
+    records = iter(PageIterator(fetch, "records", 1, prefetch=False))
+    next(records)
+
+    assert pages == [1]
+
+def test_since_stops_at_known_records():
+    ledger = Ledger(25)
+    api    = Cobinhood_API("key", session=ledger.session)
+    pages  = api.iter_ledger_entries(limit=10, since=1017)
+
+    assert [entry['timestamp'] for entry in pages] == list(reversed(range(1018, 1025)))
+    assert pages.newest_timestamp == 1024
+
+def test_resumes_at_the_page_it_stopped():
+    ledger = Ledger(25)
+    api    = Cobinhood_API("key", session=ledger.session)
+    pages  = api.iter_ledger_entries(limit=10)
+
+    for index, entry in enumerate(pages):
+        if index == 14:
+            break
+
+    assert pages.page == 2
+
+    rest = api.iter_ledger_entries(limit=10, start_page=pages.page)
+    assert [entry['id'] for entry in rest][0] == "e14"
+
+def test_error_pages_raise():
+    session = StubSession({("GET", "/v1/wallet/ledger"): {"success": False, "error": {"error_code": "internal_error"}}})
+    api     = Cobinhood_API("key", session=session)
+
+    with pytest.raises(ValueError):
+        list(api.iter_ledger_entries())
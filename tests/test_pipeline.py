@@ -0,0 +1,83 @@
+import pytest
+import requests
+
+from cobinhood_api.cobinhood import Cobinhood_API
+from cobinhood_api.middleware import TracingMiddleware
+
+from conftest import StubSession, ok, error
+
+def test_replayed_calls_return_results(replay):
+    session = replay([
+        {"method": "GET", "path": "/v1/market/tickers/COB-ETH", "body": ok({"ticker": {"trading_pair_id": "COB-ETH", "last_trade_price": "0.0011"}})},
+        {"method": "GET", "path": "/v1/trading/orders", "body": ok({"orders": []})}
+    ])
+    api = Cobinhood_API("key", session=session)
+
+    assert api.get_ticker("COB-ETH")['ticker']['last_trade_price'] == "0.0011"
+    assert api.get_all_orders() == {"orders": []}
+    assert session.calls == 2
+
+def test_error_responses_are_returned():
+    session = StubSession({("GET", "/v1/trading/orders/o1"): (404, error("order_not_found"))})
+    api = Cobinhood_API("key", session=session)
+
+    assert api.get_order("o1") == error("order_not_found")
+
+def test_server_errors_raise_before_decoding():
+    session = StubSession({("GET", "/v1/system/time"): (502, b"<html>Bad Gateway</html>")})
+    api = Cobinhood_API("key", session=session)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        api.get_system_time()
+
+def test_headers_per_group():
+    session = StubSession({
+        ("GET", "/v1/system/time"): ok({"time": 1}),
+        ("GET", "/v1/trading/orders"): ok({"orders": []}),
+        ("DELETE", "/v1/trading/orders/o1"): ok({})
+    })
+    api = Cobinhood_API("key", session=session)
+
+    api.get_system_time()
+    api.get_all_orders()
+    assert api.cancel_order("o1") == True
+
+    public, private, order = [request[2].get('headers') for request in session.requests]
+
+    assert public is None
+    assert private == {"authorization": "key"}
+    assert order['authorization'] == "key" and 'nonce' in order
+
+def test_middleware_runs_outermost_first():
+    session = StubSession({("GET", "/v1/system/time"): ok({"time": 1})})
+    calls   = []
+
+    def outer(request, call_next):
+        calls.append("outer")
+        return call_next(request)
+
+    def inner(request, call_next):
+        calls.append("inner")
+        request.params = {"added": "1"}
+        return call_next(request)
+
+    api = Cobinhood_API("key", session=session, middleware=[outer])
+    api.add_middleware(inner)
+
+    assert api.get_system_time() == {"time": 1}
+    assert calls == ["outer", "inner"]
+    assert session.requests[0][2]['params'] == {"added": "1"}
+
+def test_tracing_sees_responses_and_exceptions():
+    failure = requests.exceptions.ConnectionError("refused")
+    session = StubSession({("GET", "/v1/system/time"): ok({"time": 1}), ("GET", "/v1/system/info"): failure})
+    traces  = []
+
+    api = Cobinhood_API("key", session=session, middleware=[TracingMiddleware(lambda request, res, seconds: traces.append((request.name, res)))])
+
+    api.get_system_time()
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        api.get_system_info()
+
+    assert traces == [("system_time", ok({"time": 1})), ("system_info", failure)]
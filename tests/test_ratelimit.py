@@ -0,0 +1,53 @@
+import threading
+import time
+
+from cobinhood_api.cobinhood import Cobinhood_API
+from cobinhood_api.ratelimit import RateLimiter, TokenBucket
+
+from conftest import StubSession, ok
+
+def test_burst_then_rate():
+    bucket = TokenBucket(rate=20, capacity=2)
+
+    assert bucket.acquire() < 0.01 and bucket.acquire() < 0.01
+    assert bucket.acquire() >= 0.03
+
+def test_priority_callers_go_first():
+    bucket = TokenBucket(rate=10, capacity=1)
+    bucket.acquire()
+    served = []
+
+    def take(name, priority):
+        bucket.acquire(priority)
+        served.append(name)
+
+    normal = threading.Thread(target=take, args=("normal", False))
+    normal.start()
+    time.sleep(0.02)
+
+    # Both wait for the same token; the order gets it although the other caller came first
+    urgent = threading.Thread(target=take, args=("order", True))
+    urgent.start()
+
+    normal.join()
+    urgent.join()
+
+    assert served == ["order", "normal"]
+
+def test_orders_take_the_priority_lane():
+    session = StubSession({
+        ("GET", "/v1/market/tickers/COB-ETH"): ok({"ticker": {}}),
+        ("POST", "/v1/trading/orders"): ok({"order": {"id": "o1"}}),
+        ("GET", "/v1/trading/orders"): ok({"orders": []})
+    })
+    limiter = RateLimiter(public=100, private=100)
+    api     = Cobinhood_API("key", session=session, rate_limiter=limiter)
+
+    api.get_ticker("COB-ETH")
+    api.get_all_orders()
+    api.place_order("COB-ETH", "bid", "limit", 1, "0.001")
+
+    stats = limiter.stats()
+    assert (stats['public']['calls'], stats['public']['priority_calls']) == (1, 0)
+    assert (stats['private']['calls'], stats['private']['priority_calls']) == (2, 1)
+    assert stats['wallet']['calls'] == 0
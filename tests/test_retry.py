@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+import requests
+
+from cobinhood_api.cobinhood import Cobinhood_API
+from cobinhood_api.middleware import Request, RetryMiddleware
+from cobinhood_api.retry import CircuitBreaker, CircuitOpenError, Retry
+
+from conftest import StubSession, ok
+
+def flaky(failures, result):
+    """ Answers with failures in order, then with result """
+    failures = list(failures)
+
+    def answer(**kwargs):
+        return failures.pop(0) if failures else result
+
+    return answer
+
+def test_retries_transient_failures():
+    session = StubSession({("GET", "/v1/system/time"): flaky([requests.exceptions.ConnectionError(), (503, b"unavailable")], ok({"time": 1}))})
+    api = Cobinhood_API("key", session=session, retry=Retry(total=3, backoff=0))
+
+    assert api.get_system_time() == {"time": 1}
+    assert session.count("GET", "/v1/system/time") == 3
+
+def test_gives_up_after_total():
+    session = StubSession({("GET", "/v1/system/time"): (500, {"success": False, "error": {"error_code": "internal_error"}})})
+    api = Cobinhood_API("key", session=session, retry=Retry(total=2, backoff=0))
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        api.get_system_time()
+
+    assert session.count("GET", "/v1/system/time") == 3
+
+def test_order_is_not_sent_twice():
+    session = StubSession({("POST", "/v1/trading/orders"): flaky([requests.exceptions.ReadTimeout()], ok({"order": {"id": "o1"}}))})
+    api = Cobinhood_API("key", session=session, retry=Retry(total=3, backoff=0))
+
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        api.place_order("COB-ETH", "bid", "limit", 1, "0.001")
+
+    assert session.count("POST", "/v1/trading/orders") == 1
+
+@pytest.mark.parametrize("method, path, call", [
+    ("PUT", "/v1/trading/orders/o1", lambda api: api.modify_order("o1", "0.001", 1)),
+    ("DELETE", "/v1/trading/orders/o1", lambda api: api.cancel_order("o1"))
+])
+def test_modify_and_cancel_are_not_sent_twice(method, path, call):
+    # The first attempt may have gone through; a repeated cancel would answer order not found
+    session = StubSession({(method, path): flaky([requests.exceptions.ReadTimeout()], (400, {"success": False, "error": {"error_code": "order_not_found"}}))})
+    api = Cobinhood_API("key", session=session, retry=Retry(total=3, backoff=0))
+
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        call(api)
+
+    assert session.count(method, path) == 1
+
+@pytest.mark.parametrize("method, path, call", [
+    ("PUT", "/v1/trading/orders/o1", lambda api: api.modify_order("o1", "0.001", 1)),
+    ("DELETE", "/v1/trading/orders/o1", lambda api: api.cancel_order("o1"))
+])
+def test_unsent_modify_and_cancel_are_retried(method, path, call):
+    session = StubSession({(method, path): flaky([requests.exceptions.ConnectTimeout()], ok({}))})
+    api = Cobinhood_API("key", session=session, retry=Retry(total=3, backoff=0))
+
+    assert call(api) == True
+    assert session.count(method, path) == 2
+
+def test_unsent_order_is_retried_with_a_new_nonce():
+    session = StubSession({("POST", "/v1/trading/orders"): flaky([requests.exceptions.ConnectTimeout()], ok({"order": {"id": "o1"}}))})
+    api = Cobinhood_API("key", session=session, retry=Retry(total=3, backoff=0))
+
+    assert api.place_order("COB-ETH", "bid", "limit", 1, "0.001") == {"order": {"id": "o1"}}
+
+    first, second = [request[2]['headers']['nonce'] for request in session.requests]
+    assert int(second) > int(first)
+
+def test_breaker_opens_per_group():
+    session = StubSession({
+        ("GET", "/v1/system/time"): requests.exceptions.ConnectionError(),
+        ("GET", "/v1/trading/orders"): ok({"orders": []})
+    })
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    api = Cobinhood_API("key", session=session, circuit_breaker=breaker)
+
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            api.get_system_time()
+
+    with pytest.raises(CircuitOpenError):
+        api.get_system_time()
+
+    assert session.count("GET", "/v1/system/time") == 2
+    assert breaker.state("public") == 'open'
+    assert api.get_all_orders() == {"orders": []}
+    assert breaker.state("private") == 'closed'
+
+def test_breaker_closes_after_successful_trial():
+    session = StubSession({("GET", "/v1/system/time"): flaky([requests.exceptions.ConnectionError()], ok({"time": 1}))})
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    api = Cobinhood_API("key", session=session, circuit_breaker=breaker)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        api.get_system_time()
+
+    assert breaker.state("public") == 'open'
+    assert api.get_system_time() == {"time": 1}
+    assert breaker.state("public") == 'closed'
+
+def test_cancelled_trial_does_not_keep_the_circuit_open():
+    breaker    = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    middleware = RetryMiddleware(circuit_breaker=breaker)
+    request    = Request("system_time", "public", "GET", "http://127.0.0.1/v1/system/time")
+
+    breaker.record_failure("public")
+
+    async def hang(request):
+        await asyncio.sleep(10)
+
+    async def answer(request):
+        return ok({"time": 1})
+
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(middleware.call_async(request, hang), 0.01)
+
+        assert breaker.state("public") == 'half_open'
+        assert await middleware.call_async(request, answer) == ok({"time": 1})
+
+    asyncio.run(main())
+
+    assert breaker.state("public") == 'closed'
+
+def test_interrupted_trial_does_not_keep_the_circuit_open():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    answers = [KeyboardInterrupt(), ok({"time": 1})]
+    session = StubSession({("GET", "/v1/system/time"): lambda **kwargs: answers.pop(0)})
+    api     = Cobinhood_API("key", session=session, circuit_breaker=breaker)
+
+    breaker.record_failure("public")
+
+    with pytest.raises(KeyboardInterrupt):
+        api.get_system_time()
+
+    assert api.get_system_time() == {"time": 1}
+    assert breaker.state("public") == 'closed'
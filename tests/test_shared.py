@@ -0,0 +1,87 @@
+import os
+import sys
+import threading
+
+import pytest
+
+from cobinhood_api.shared import SharedMarketData
+
+BOOK = {"bids": [["10", "1", "2"], ["9", "1", "3"]], "asks": [["11", "1", "1"]]}
+
+@pytest.fixture
+def data():
+    data = SharedMarketData.create(["COB-ETH", "ETH-BTC"], depth=4)
+    yield data
+    data.close()
+
+def test_written_records_are_read_back(data):
+    data.write("COB-ETH", ticker={"last_trade_price": "0.5"}, book=BOOK, timestamp=1000)
+
+    record = data.read("COB-ETH", levels=1)
+
+    assert record['version'] == 1
+    assert record['timestamp'] == 1000
+    assert record['ticker']['last_trade_price'] == 0.5
+    assert record['bids'] == [(10.0, 2.0)]
+    assert record['asks'] == [(11.0, 1.0)]
+    assert data.read("ETH-BTC")['version'] == 0
+
+@pytest.fixture
+def switching():
+    # Switch threads as often as possible, so the writer interrupts reads
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+def test_reads_never_see_half_written_records(data, switching):
+    done = threading.Event()
+
+    def write():
+        for version in range(1, 10001):
+            value = float(version)
+            data.write("COB-ETH", ticker={"last_trade_price": value, "highest_bid": value}, book={"bids": [[value, 1, value]] * 4, "asks": [[value, 1, value]] * 4})
+
+        done.set()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+
+    torn, backwards, last = 0, 0, 0
+
+    while not done.is_set():
+        record = data.read("COB-ETH")
+
+        if record['version'] == 0:
+            continue
+
+        # Every field of one write holds the same value, so a torn copy mixes values
+        values = set(record['ticker'][field] for field in ('last_trade_price', 'highest_bid'))
+        values.update(price for level in record['bids'] + record['asks'] for price in level)
+
+        torn      += len(values) != 1
+        backwards += record['version'] < last
+        last       = record['version']
+
+    writer.join()
+
+    assert (torn, backwards) == (0, 0)
+    assert data.read("COB-ETH")['version'] == data.version("COB-ETH") == 10000
+
+def test_read_gives_up_on_an_unfinished_write(data):
+    # What a writer killed between the two increments of the sequence leaves behind
+    data._q[data._offsets["COB-ETH"]] += 1
+
+    with pytest.raises(TimeoutError):
+        data.read("COB-ETH", timeout=0.05)
+
+    assert data.read("ETH-BTC")['version'] == 0
+
+def test_long_pair_name_does_not_leave_a_region_behind():
+    name = "cobinhood-test-%d" % os.getpid()
+
+    with pytest.raises(ValueError):
+        SharedMarketData.create(["COB-ETH", "X" * 100], name=name)
+
+    with pytest.raises(FileNotFoundError):
+        SharedMarketData.attach(name)
@@ -0,0 +1,93 @@
+import pytest
+
+from cobinhood_api.cobinhood import Cobinhood_API
+from cobinhood_api.snapshot import SnapshotEngine
+
+from conftest import StubSession, error, ok
+
+class Market:
+    """ Trading pairs, stats, tickers and order books served to a Cobinhood_API """
+
+    def __init__(self):
+        self.price   = "0.001"
+        self.failing = set()
+
+        self.session = StubSession({
+            ("GET", "/v1/market/trading_pairs"): ok({"trading_pairs": [{"id": "COB-ETH"}, {"id": "ETH-BTC"}]}),
+            ("GET", "/v1/market/stats"): ok({"COB-ETH": {"id": "COB-ETH"}, "ETH-BTC": {"id": "ETH-BTC"}})
+        })
+
+        for pair in ("COB-ETH", "ETH-BTC"):
+            self.session.routes[("GET", "/v1/market/tickers/" + pair)] = lambda pair=pair, **kwargs: self.answer(pair, {"ticker": {"last_trade_price": self.price}})
+            self.session.routes[("GET", "/v1/market/orderbooks/" + pair)] = lambda pair=pair, **kwargs: self.answer(pair, {"orderbook": {"sequence": 1, "bids": [[self.price, "1", "5"]], "asks": []}})
+
+    def answer(self, pair, result):
+        return (400, error("invalid_trading_pair")) if pair in self.failing else ok(result)
+
+@pytest.fixture
+def market():
+    return Market()
+
+def test_refreshes_publish_new_versions(market):
+    engine = SnapshotEngine(Cobinhood_API("key", session=market.session))
+
+    for kind in ('pairs', 'stats', 'tickers', 'books'):
+        engine.refresh(kind)
+
+    snapshot = engine.snapshot
+    assert snapshot.version == 4
+    assert snapshot.pairs == ("COB-ETH", "ETH-BTC")
+    assert sorted(snapshot.stats) == ["COB-ETH", "ETH-BTC"]
+    assert snapshot.tickers["COB-ETH"]['last_trade_price'] == "0.001"
+    assert snapshot.books["ETH-BTC"].best_bid() == 0.001
+    assert set(snapshot.updated) == {'pairs', 'stats', 'tickers', 'books'}
+
+    market.price = "0.002"
+    engine.refresh('tickers')
+
+    # Readers holding the old snapshot keep seeing it unchanged
+    assert snapshot.tickers["COB-ETH"]['last_trade_price'] == "0.001"
+    assert engine.snapshot.tickers["COB-ETH"]['last_trade_price'] == "0.002"
+    assert engine.snapshot.books is snapshot.books
+
+def test_failed_pairs_keep_their_data(market):
+    engine = SnapshotEngine(Cobinhood_API("key", session=market.session), pairs=["COB-ETH", "ETH-BTC"])
+    engine.refresh('tickers')
+
+    market.price = "0.002"
+    market.failing.add("ETH-BTC")
+    engine.refresh('tickers')
+
+    assert engine.snapshot.tickers["COB-ETH"]['last_trade_price'] == "0.002"
+    assert engine.snapshot.tickers["ETH-BTC"]['last_trade_price'] == "0.001"
+    assert 'tickers' in engine.errors
+
+    market.failing.clear()
+    engine.refresh('tickers')
+    assert not 'tickers' in engine.errors
+
+def test_fixed_pairs_filter_stats_without_fetching_pairs(market):
+    engine = SnapshotEngine(Cobinhood_API("key", session=market.session), pairs=["COB-ETH"])
+
+    engine.refresh('pairs')
+    engine.refresh('stats')
+
+    assert engine.snapshot.pairs == ("COB-ETH",)
+    assert list(engine.snapshot.stats) == ["COB-ETH"]
+    assert market.session.count("GET", "/v1/market/trading_pairs") == 0
+
+def test_start_loads_everything_and_stop_ends_the_threads(market):
+    market.session.routes[("GET", "/v1/market/stats")] = (400, error("internal_error"))
+    engine = SnapshotEngine(Cobinhood_API("key", session=market.session), intervals={'pairs': 60, 'stats': 60, 'tickers': 60, 'books': None})
+
+    with engine:
+        assert engine.snapshot.pairs == ("COB-ETH", "ETH-BTC")
+        assert sorted(engine.snapshot.tickers) == ["COB-ETH", "ETH-BTC"]
+        assert engine.snapshot.books == {}
+        assert isinstance(engine.errors['stats'], ValueError)
+        assert len(engine._threads) == 3
+
+    assert engine._threads == []
+
+    with pytest.raises(ValueError):
+        engine.refresh('trades')
@@ -0,0 +1,68 @@
+import pytest
+
+from cobinhood_api.cobinhood import Cobinhood_API
+from cobinhood_api.store import HistoryStore
+
+from conftest import StubSession, ok
+
+class History:
+    """ Order history per pair served newest first, in pages """
+
+    def __init__(self):
+        self.orders  = []
+        self.session = StubSession({("GET", "/v1/trading/order_history"): self.page})
+
+    def add(self, order_id, pair, timestamp):
+        self.orders.append({"id": order_id, "trading_pair_id": pair, "timestamp": timestamp, "state": "filled"})
+
+    def page(self, params, **kwargs):
+        orders = sorted(self.orders, key=lambda order: order['timestamp'], reverse=True)
+
+        if 'trading_pair_id' in params:
+            orders = [order for order in orders if order['trading_pair_id'] == params['trading_pair_id']]
+
+        limit = int(params['limit'])
+        start = (int(params['page']) - 1) * limit
+
+        return ok({"order_history": orders[start:start + limit]})
+
+@pytest.fixture
+def history():
+    return History()
+
+@pytest.fixture
+def store(history):
+    store = HistoryStore(Cobinhood_API("key", session=history.session), ":memory:")
+    yield store
+    store.close()
+
+def test_sync_downloads_only_newer_orders(history, store):
+    for i in range(120):
+        history.add("o%d" % i, "COB-ETH", 1000 + i)
+
+    assert store.sync_orders() == 120
+
+    history.add("new", "COB-ETH", 2000)
+    del history.session.requests[:]
+
+    # The first page reaches back to the previous sync, so only the next one may be prefetched
+    assert store.sync_orders() == 1
+    assert [request[2]['params']['page'] for request in history.session.requests] == ["1", "2"]
+    assert store.orders(limit=1)[0]['id'] == "new"
+
+def test_watermark_is_kept_per_pair(history, store):
+    history.add("a", "COB-ETH", 1000)
+    history.add("b", "ETH-BTC", 900)
+
+    assert store.sync_orders("COB-ETH") == 1
+    assert store.sync_orders() == 1
+    assert [order['id'] for order in store.orders()] == ["a", "b"]
+    assert [order['id'] for order in store.orders("ETH-BTC")] == ["b"]
+
+def test_queries_by_time_range(history, store):
+    for i in range(5):
+        history.add("o%d" % i, "COB-ETH", 1000 + i)
+
+    store.sync_orders()
+
+    assert [order['id'] for order in store.orders(start_time=1001, end_time=1003)] == ["o3", "o2", "o1"]
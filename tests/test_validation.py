@@ -0,0 +1,67 @@
+import pytest
+
+from cobinhood_api.cobinhood import Cobinhood_API
+from cobinhood_api.decoding import Decoder
+from cobinhood_api.validation import OrderValidator
+
+from conftest import StubSession, error, ok
+
+PAIRS = ok({"trading_pairs": [
+    {"id": "COB-ETH", "quote_increment": "0.0000001", "base_increment": "1", "base_min_size": "10", "base_max_size": "1000000"},
+    {"id": "ETH-BTC", "quote_increment": "0.000001", "base_min_size": "0.01"}
+]})
+
+@pytest.fixture
+def validator():
+    return OrderValidator(PAIRS['result'])
+
+def test_valid_orders_pass(validator):
+    assert validator.check("COB-ETH", "bid", "limit", 100, "0.0012345") == []
+    assert validator.check("ETH-BTC", "ASK", "market", "0.5") == []
+
+    validator.validate("COB-ETH", "ask", "stop_limit", "10", 0.001)
+
+@pytest.mark.parametrize("order, message", [
+    (("COB-ETH", "buy", "limit", 100, "0.001"), "Side value invalid"),
+    (("COB-ETH", "bid", "fok", 100, "0.001"), "Type value invalid"),
+    (("PAY-ETH", "bid", "limit", 100, "0.001"), "Unknown trading pair PAY-ETH"),
+    (("COB-ETH", "bid", "limit", "many", "0.001"), "Size or price is not a number"),
+    (("COB-ETH", "bid", "limit", 5, "0.001"), "Size 5 is below the minimum of 10"),
+    (("COB-ETH", "bid", "limit", 2000000, "0.001"), "Size 2000000 is above the maximum of 1000000"),
+    (("COB-ETH", "bid", "limit", "10.5", "0.001"), "Size 10.5 is not a multiple of 1"),
+    (("COB-ETH", "bid", "limit", 100, "0.00000015"), "Price 0.00000015 is not a multiple of 0.0000001"),
+    (("COB-ETH", "bid", "limit", 100), "Price must be positive")
+])
+def test_invalid_orders_are_reported(validator, order, message):
+    assert message in validator.check(*order)
+
+    with pytest.raises(ValueError, match=message):
+        validator.validate(*order)
+
+def test_invalid_orders_are_not_sent():
+    session = StubSession({
+        ("GET", "/v1/market/trading_pairs"): PAIRS,
+        ("POST", "/v1/trading/orders"): ok({"order": {"id": "o1"}})
+    })
+    api = Cobinhood_API("key", session=session)
+
+    batch = api.place_orders([
+        {"pair": "COB-ETH", "side": "bid", "ttype": "limit", "size": 100, "price": "0.001"},
+        {"pair": "COB-ETH", "side": "bid", "ttype": "limit", "size": 1, "price": "0.001"}
+    ])
+
+    assert batch['result'] == {0: {"order": {"id": "o1"}}}
+    assert isinstance(batch['errors'][1], ValueError)
+    assert session.count("POST", "/v1/trading/orders") == 1
+
+    api.place_orders([])
+    assert session.count("GET", "/v1/market/trading_pairs") == 1
+
+def test_from_api_rejects_errors_and_scaled_decoders():
+    session = StubSession({("GET", "/v1/market/trading_pairs"): (400, error("invalid_request"))})
+
+    with pytest.raises(ValueError):
+        OrderValidator.from_api(Cobinhood_API("key", session=session))
+
+    with pytest.raises(ValueError):
+        OrderValidator.from_api(Cobinhood_API("key", session=StubSession(), decoder=Decoder(numbers="scaled")))
@@ -0,0 +1,116 @@
+import asyncio
+import json
+
+import pytest
+from aiohttp import web
+
+from cobinhood_api.websocket import CobinhoodWebSocket
+
+CHANNEL = "order-book.COB-ETH.1E-7"
+
+def frame(version, mtype, bids):
+    return json.dumps({"h": [CHANNEL, str(version), mtype], "d": {"bids": bids, "asks": []}})
+
+# Frames sent after each subscribe message; None closes the connection
+SCRIPT = [
+    [frame(1, "s", [["10", "1", "1"]]), frame(2, "u", [["9", "1", "1"]]), "not json", frame(3, "u", [["8"]])],
+    [frame(10, "s", [["8", "1", "1"]]), None],
+    [frame(20, "s", [["7", "1", "1"]]), frame(21, "u", [["6", "1", "1"]])]
+]
+
+class FakeExchange:
+    """ Local WebSocket server answering every subscribe with the next frames of SCRIPT """
+
+    def __init__(self):
+        self.connections = 0
+        self.subscribes  = 0
+
+    async def handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+
+        async for msg in ws:
+            if json.loads(msg.data).get('action') != "subscribe" or self.subscribes >= len(SCRIPT):
+                continue
+
+            self.subscribes += 1
+
+            for text in SCRIPT[self.subscribes - 1]:
+                if text is None:
+                    await ws.close()
+                    break
+
+                await ws.send_str(text)
+
+        return ws
+
+async def serve(exchange):
+    app = web.Application()
+    app.router.add_get("/", exchange.handle)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+
+    host, port = runner.addresses[0][:2]
+    return runner, "ws://%s:%d/" % (host, port)
+
+async def wait_for(condition, timeout=5):
+    deadline = asyncio.get_running_loop().time() + timeout
+
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+def test_bad_messages_resync_and_drops_reconnect(caplog):
+    async def main():
+        exchange    = FakeExchange()
+        runner, url = await serve(exchange)
+
+        try:
+            ws = CobinhoodWebSocket(url=url, reconnect_delay=0.01, ping_interval=60)
+            ws.subscribe_order_book("COB-ETH")
+            task = asyncio.ensure_future(ws.run())
+
+            book = ws.order_books["COB-ETH"]
+            await wait_for(lambda: book.sequence == 21)
+
+            assert [level.price for level in book.bids] == [7.0, 6.0]
+            assert exchange.subscribes == 3
+            assert exchange.connections == 2
+
+            await ws.close()
+            await task
+
+            items = [item async for item in ws]
+            assert [mtype for channel, mtype, data in items] == ['s', 'u', 's', 's', 'u']
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(main())
+
+    assert "not JSON" in caplog.text
+    assert "Could not handle message of " + CHANNEL in caplog.text
+
+class BrokenSession:
+    def ws_connect(self, url):
+        raise RuntimeError("broken")
+
+def test_iterator_ends_when_run_fails():
+    async def main():
+        ws   = CobinhoodWebSocket(session=BrokenSession())
+        task = asyncio.ensure_future(ws.run())
+
+        items = await asyncio.wait_for(_collect(ws), 5)
+        assert items == []
+
+        with pytest.raises(RuntimeError):
+            await task
+
+    asyncio.run(main())
+
+async def _collect(ws):
+    return [item async for item in ws]